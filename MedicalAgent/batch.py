@@ -0,0 +1,208 @@
+"""
+Headless batch processing of a directory (or glob) of consultation recordings.
+
+Runs the MedicalAgent pipeline for every .mp3/.wav/.m4a/.ogg/.flac file without
+the chat loop, with bounded cross-file concurrency. Work already present in
+`mcp_server/processing_files/<stem>/` is reused: a file with a transcript only
+runs the parallel processing stage, and a file whose artifacts are all up to
+date according to its manifest (same transcript, prompts and models) is
+skipped. Within the processing stage, agents whose artifact is up to date are
+skipped too; `--force` regenerates everything.
+A JSON run report with per-file, per-stage timings is written at the end.
+
+Usage (from the repository root):
+    python -m MedicalAgent.batch path/to/recordings --concurrency 2 --report batch_report.json
+    python -m MedicalAgent.batch "clinic/2025-06-*/*.mp3"
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from .agent import root_agent
+from .sub_agents.parallel_processing_agent.agent import parallel_processing_agent
+from .utils.artifact_manifest import STATE_FORCE_REPROCESS, stale_categories
+from .utils.context_cache import CONTEXT_CACHE, STATE_CONTEXT_CACHE_SCOPE
+from .utils.custom_adk_patches import mcp_session_stats, warm_up_shared_sessions
+from .utils.transcript_prefetch import STATE_AUDIO_FILENAME
+
+load_dotenv(Path(__file__).parent / ".env")
+
+APP_NAME = "MedicalAgentBatch"
+USER_ID = "batch"
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".m4a", ".ogg", ".flac")
+MCP_SERVER_DIR = Path(__file__).parent / "mcp_server"
+UPLOAD_DIR = MCP_SERVER_DIR / "upload"
+PROCESSING_DIR = MCP_SERVER_DIR / "processing_files"
+ARTIFACT_CATEGORIES = ["MedicalTemplate", "AssessmentPlan", "CriticReview", "MedicalSummary"]
+COPY_BLOCK_SIZE = 1024 * 1024
+
+
+def find_recordings(source: str) -> list:
+    """Returns the audio files in a directory, or matching a glob pattern, sorted by name."""
+    if os.path.isdir(source):
+        candidates = [str(path) for path in Path(source).iterdir()]
+    else:
+        candidates = glob.glob(source, recursive=True)
+    return sorted(path for path in candidates if Path(path).suffix.lower() in AUDIO_EXTENSIONS)
+
+
+def existing_outputs(stem: str) -> dict:
+    """Reports which processing files already exist for a recording."""
+    processing_dir = PROCESSING_DIR / stem
+    return {
+        "Transcript": (processing_dir / "Transcript.txt").exists(),
+        **{category: (processing_dir / f"{category}.txt").exists() for category in ARTIFACT_CATEGORIES},
+    }
+
+
+def stage_upload(audio_path: str) -> str:
+    """Copies a recording into the MCP upload directory (in chunks) unless it is already there."""
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    target = UPLOAD_DIR / Path(audio_path).name
+    if target.resolve() != Path(audio_path).resolve():
+        partial = target.with_name(f"{target.name}.part")
+        with open(audio_path, "rb") as src, open(partial, "wb") as dst:
+            shutil.copyfileobj(src, dst, length=COPY_BLOCK_SIZE)
+        os.replace(partial, target)
+    return target.name
+
+
+async def run_agent(runner: InMemoryRunner, message: str, state: dict = None) -> str:
+    """Runs one agent invocation in a fresh session and returns the final model text."""
+    session_id = f"batch-{uuid.uuid4()}"
+    # The session's context caches are scoped to it, so they can be deleted when it ends
+    state = {**(state or {}), STATE_CONTEXT_CACHE_SCOPE: session_id}
+    session = await runner.session_service.create_session(
+        app_name=APP_NAME, user_id=USER_ID, session_id=session_id, state=state
+    )
+    final_text = ""
+    async for event in runner.run_async(
+        user_id=USER_ID,
+        session_id=session.id,
+        new_message=types.Content(role="user", parts=[types.Part(text=message)]),
+    ):
+        if event.content and event.content.parts and event.content.parts[0].text:
+            final_text = event.content.parts[0].text
+    if CONTEXT_CACHE is not None:
+        # The consultation is finished: release its cached transcript prefix
+        await CONTEXT_CACHE.end_session(session.id)
+    return final_text
+
+
+async def process_recording(audio_path: str, runners: dict, semaphore: asyncio.Semaphore, force: bool) -> dict:
+    """Runs the missing pipeline stages for one recording and times them."""
+    stem = Path(audio_path).stem
+    result = {"file": audio_path, "stem": stem, "status": "done", "stages": {}, "error": None}
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            outputs = {} if force else existing_outputs(stem)
+            state = {STATE_FORCE_REPROCESS: True} if force else None
+            stale = stale_categories(stem) if outputs.get("Transcript") else []
+            if not outputs.get("Transcript"):
+                filename = stage_upload(audio_path)
+                stage_start = time.perf_counter()
+                await run_agent(runners["full"], f"Please process the uploaded audio file: {filename}", state=state)
+                result["stages"]["full_pipeline"] = {
+                    "status": "ran", "seconds": round(time.perf_counter() - stage_start, 3)
+                }
+            elif stale:
+                result["stale_artifacts"] = stale
+                stage_start = time.perf_counter()
+                await run_agent(
+                    runners["processing"],
+                    f"The transcript for audio file {stem} is ready. Generate the processing files for {stem}.",
+                    state={STATE_AUDIO_FILENAME: stem},
+                )
+                result["stages"]["transcription"] = {"status": "skipped", "seconds": 0.0}
+                result["stages"]["processing"] = {
+                    "status": "ran", "seconds": round(time.perf_counter() - stage_start, 3)
+                }
+            else:
+                result["status"] = "skipped"
+
+            outputs = existing_outputs(stem)
+            result["missing_outputs"] = [name for name, present in outputs.items() if not present]
+            if result["missing_outputs"] and result["status"] != "skipped":
+                result["status"] = "incomplete"
+        except Exception as e:
+            result["status"] = "failed"
+            result["error"] = f"{type(e).__name__}: {e}"
+        result["total_seconds"] = round(time.perf_counter() - start, 3)
+    print(f"[{result['status']}] {stem} ({result['total_seconds']}s)")
+    return result
+
+
+async def run_batch(source: str, concurrency: int, force: bool) -> dict:
+    """Processes every recording matched by `source` and builds the run report."""
+    recordings = find_recordings(source)
+    runners = {
+        "full": InMemoryRunner(agent=root_agent, app_name=APP_NAME),
+        "processing": InMemoryRunner(agent=parallel_processing_agent, app_name=APP_NAME),
+    }
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    # The MCP server starts while the first recordings wait for their first model call
+    warm_up_shared_sessions()
+
+    started_at = datetime.now(timezone.utc).isoformat()
+    start = time.perf_counter()
+    try:
+        results = await asyncio.gather(
+            *(process_recording(path, runners, semaphore, force) for path in recordings)
+        )
+        mcp_sessions = mcp_session_stats()
+    finally:
+        # Both runners hold references to the shared MCP toolsets
+        for runner in runners.values():
+            await runner.close()
+        if CONTEXT_CACHE is not None:
+            await CONTEXT_CACHE.close()
+
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    return {
+        "source": source,
+        "started_at": started_at,
+        "concurrency": concurrency,
+        "force": force,
+        "total_files": len(recordings),
+        "status_counts": counts,
+        "context_cache": CONTEXT_CACHE.stats() if CONTEXT_CACHE is not None else None,
+        "mcp_sessions": mcp_sessions,
+        "wall_seconds": round(time.perf_counter() - start, 3),
+        "files": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the MedicalAgent pipeline over a directory or glob of recordings."
+    )
+    parser.add_argument("source", help="Directory of audio files, or a glob pattern")
+    parser.add_argument("--concurrency", type=int, default=2, help="Recordings processed at once")
+    parser.add_argument("--report", default="batch_report.json", help="Where to write the JSON run report")
+    parser.add_argument("--force", action="store_true", help="Re-run every stage even if outputs are up to date")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_batch(args.source, args.concurrency, args.force))
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Processed {report['total_files']} files in {report['wall_seconds']}s: {report['status_counts']}")
+    print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Background job queue for consultation processing.
+
+Uploads are enqueued as jobs instead of being processed inside a Streamlit
+request. A worker pool runs the same pipeline stages as the batch CLI
+(`process_recording`), at most `--workers` consultations at a time. Job
+state (queued/running/done/failed, per-stage timings, errors) is kept in a
+SQLite database, so it survives browser reloads and service restarts: jobs
+that were running when the service stopped are queued again on start-up.
+
+HTTP API (JSON):
+    POST /jobs              {"audio_file": "CAR0002.mp3", "force": false} -> job
+    GET  /jobs/<job_id>     -> job
+    GET  /jobs?limit=20     -> {"jobs": [...]} most recent first
+    GET  /health            -> {"status": "ok", "workers": n, "mcp_sessions": [...]}
+
+Usage (from the repository root):
+    python -m MedicalAgent.jobs --workers 2 --port 8001
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from google.adk.runners import InMemoryRunner
+
+from .agent import root_agent
+from .batch import APP_NAME, AUDIO_EXTENSIONS, UPLOAD_DIR, process_recording
+from .sub_agents.parallel_processing_agent.agent import parallel_processing_agent
+from .utils.context_cache import CONTEXT_CACHE
+from .utils.custom_adk_patches import mcp_session_stats, warm_up_shared_sessions
+
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", str(Path(__file__).parent / "jobs.db"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_SERVICE_PORT = int(os.getenv("JOB_SERVICE_PORT", "8001"))
+JOB_POLL_SECONDS = 1.0
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobStore:
+    """Persistent job state in a WAL-mode SQLite database, shared by the HTTP threads and the workers."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            audio_file TEXT NOT NULL,
+            force INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            started_at TEXT,
+            finished_at TEXT,
+            queued_seconds REAL,
+            total_seconds REAL,
+            stages TEXT,
+            missing_outputs TEXT,
+            error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, created_at);
+        CREATE INDEX IF NOT EXISTS jobs_by_created ON jobs (created_at);
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._connection().executescript(self.SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_dict(row: Optional[sqlite3.Row]) -> Optional[dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["force"] = bool(job["force"])
+        job["stages"] = json.loads(job["stages"]) if job["stages"] else {}
+        job["missing_outputs"] = json.loads(job["missing_outputs"]) if job["missing_outputs"] else []
+        return job
+
+    def enqueue(self, audio_file: str, force: bool = False) -> dict:
+        job_id = f"job-{uuid.uuid4()}"
+        self._connection().execute(
+            "INSERT INTO jobs (job_id, audio_file, force, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+            (job_id, audio_file, int(force), _now()),
+        )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self._to_dict(self._connection().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone())
+
+    def recent(self, limit: int = 20) -> List[dict]:
+        rows = self._connection().execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def claim_next(self) -> Optional[dict]:
+        """Atomically moves the oldest queued job to running and returns it."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT job_id, created_at FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                queued_seconds = (
+                    datetime.now(timezone.utc) - datetime.fromisoformat(row["created_at"])
+                ).total_seconds()
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, queued_seconds = ? WHERE job_id = ?",
+                    (_now(), round(queued_seconds, 3), row["job_id"]),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row["job_id"]) if row is not None else None
+
+    def finish(self, job_id: str, status: str, total_seconds: float, stages: dict, missing_outputs: list, error: Optional[str]) -> None:
+        self._connection().execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, total_seconds = ?, stages = ?, missing_outputs = ?, error = ? "
+            "WHERE job_id = ?",
+            (status, _now(), total_seconds, json.dumps(stages), json.dumps(missing_outputs), error, job_id),
+        )
+
+    def requeue_interrupted(self) -> int:
+        """Jobs left running by a previous service process are queued again."""
+        cursor = self._connection().execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'"
+        )
+        return cursor.rowcount
+
+
+class JobService:
+    """Worker pool that drains the job queue through the processing pipeline."""
+
+    def __init__(self, store: JobStore, workers: int):
+        self.store = store
+        self.workers = max(1, workers)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def notify(self) -> None:
+        """Wakes an idle worker; safe to call from the HTTP threads."""
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run_job(self, job: dict, runners: dict, semaphore: asyncio.Semaphore) -> None:
+        audio_path = str(UPLOAD_DIR / job["audio_file"])
+        if not os.path.exists(audio_path):
+            await asyncio.to_thread(
+                self.store.finish, job["job_id"], "failed", 0.0, {}, [], f"Audio file not found: {job['audio_file']}"
+            )
+            return
+        result = await process_recording(audio_path, runners, semaphore, job["force"])
+        # "skipped" means every artifact was already up to date
+        status = "done" if result["status"] in ("done", "skipped") else "failed"
+        error = result["error"]
+        if result["status"] == "incomplete":
+            error = f"Missing outputs: {', '.join(result.get('missing_outputs', []))}"
+        await asyncio.to_thread(
+            self.store.finish,
+            job["job_id"], status, result["total_seconds"], result["stages"], result.get("missing_outputs", []), error,
+        )
+        logging.info(f"Job {job['job_id']} ({job['audio_file']}) {status} in {result['total_seconds']}s")
+
+    async def _worker(self, runners: dict, semaphore: asyncio.Semaphore) -> None:
+        while True:
+            job = await asyncio.to_thread(self.store.claim_next)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run_job(job, runners, semaphore)
+            except Exception as e:
+                logging.error(f"Job {job['job_id']} crashed: {e}", exc_info=True)
+                await asyncio.to_thread(
+                    self.store.finish, job["job_id"], "failed", 0.0, {}, [], f"{type(e).__name__}: {e}"
+                )
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        requeued = self.store.requeue_interrupted()
+        if requeued:
+            logging.info(f"Re-queued {requeued} jobs interrupted by the previous shutdown")
+        runners = {
+            "full": InMemoryRunner(agent=root_agent, app_name=APP_NAME),
+            "processing": InMemoryRunner(agent=parallel_processing_agent, app_name=APP_NAME),
+        }
+        semaphore = asyncio.Semaphore(self.workers)
+        warm_up_shared_sessions()
+        try:
+            await asyncio.gather(*(self._worker(runners, semaphore) for _ in range(self.workers)))
+        finally:
+            # Both runners hold references to the shared MCP toolsets
+            for runner in runners.values():
+                await runner.close()
+            if CONTEXT_CACHE is not None:
+                await CONTEXT_CACHE.close()
+
+
+def make_handler(store: JobStore, service: JobService):
+    """Builds the HTTP request handler bound to a store and service."""
+
+    class JobRequestHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = [part for part in url.path.split("/") if part]
+            if parts == ["health"]:
+                self._send_json(200, {"status": "ok", "workers": service.workers, "mcp_sessions": mcp_session_stats()})
+            elif parts == ["jobs"]:
+                try:
+                    limit = int(parse_qs(url.query).get("limit", ["20"])[0])
+                except ValueError:
+                    self._send_json(400, {"error": "limit must be an integer"})
+                    return
+                self._send_json(200, {"jobs": store.recent(max(1, min(limit, 200)))})
+            elif len(parts) == 2 and parts[0] == "jobs":
+                job = store.get(parts[1])
+                if job is None:
+                    self._send_json(404, {"error": f"Unknown job {parts[1]}"})
+                else:
+                    self._send_json(200, job)
+            else:
+                self._send_json(404, {"error": "Not found"})
+
+        def do_POST(self):
+            if urlparse(self.path).path.rstrip("/") != "/jobs":
+                self._send_json(404, {"error": "Not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except (ValueError, json.JSONDecodeError):
+                self._send_json(400, {"error": "Body must be a JSON object"})
+                return
+            audio_file = os.path.basename(str(request.get("audio_file") or ""))
+            if Path(audio_file).suffix.lower() not in AUDIO_EXTENSIONS:
+                self._send_json(400, {"error": f"audio_file must name a {'/'.join(AUDIO_EXTENSIONS)} file in the upload directory"})
+                return
+            job = store.enqueue(audio_file, force=bool(request.get("force")))
+            service.notify()
+            self._send_json(201, job)
+
+        def log_message(self, format, *args):
+            logging.debug(f"Job API: {format % args}")
+
+    return JobRequestHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the background job queue and its HTTP status API.")
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS, help="Consultations processed at once")
+    parser.add_argument("--port", type=int, default=JOB_SERVICE_PORT, help="Port of the HTTP status API")
+    parser.add_argument("--db", default=JOB_DB_PATH, help="SQLite file holding the job state")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    store = JobStore(args.db)
+    service = JobService(store, args.workers)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(store, service))
+    threading.Thread(target=server.serve_forever, name="job-api", daemon=True).start()
+    print(f"Job service: {args.workers} workers, status API on http://127.0.0.1:{args.port}")
+    try:
+        asyncio.run(service.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
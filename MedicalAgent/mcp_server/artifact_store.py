@@ -0,0 +1,370 @@
+"""
+Storage backends for the consultation processing files.
+
+save_processing_file / read_processing_file go through an artifact store
+instead of writing `processing_files/<consultation>/<category>.txt` directly:
+
+- FileArtifactStore ("files", default): the original flat-file layout, with
+  writes made atomic (temp file + rename) so a reader never sees a
+  half-written artifact. No history is kept.
+- SqliteArtifactStore ("sqlite"): one SQLite database in WAL mode, so the
+  parallel branches (and several server processes) can read while one
+  writes. Every save is an atomic upsert that adds a new version; earlier
+  versions stay available as history. Lookups by consultation, category and
+  date use indexes instead of walking the filesystem. The server always
+  mirrors the latest versions to the flat-file layout on every save
+  (create_artifact_store refuses sqlite without it), because the agents'
+  artifact manifest and the Streamlit app read those files. A database can
+  also be exported to that layout on demand, e.g. to rebuild it:
+
+      python artifact_store.py export --db artifacts.db --out processing_files
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import List, Optional
+
+
+@dataclass
+class StoredArtifact:
+    """One saved version of a processing file."""
+
+    consultation: str
+    category: str
+    version: int
+    size_bytes: int
+    created_at: str
+    location: str
+    content: Optional[str] = None
+
+    def summary(self) -> dict:
+        """Metadata without the content, for listings."""
+        info = asdict(self)
+        info.pop("content")
+        return info
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _write_file_atomic(path: str, content: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _in_date_range(created_at: str, since: str, until: str) -> bool:
+    return (not since or created_at >= since) and (not until or created_at < until)
+
+
+class FileArtifactStore:
+    """Flat files: <root_dir>/<consultation>/<category>.txt, written atomically."""
+
+    name = "files"
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+
+    def _path(self, consultation: str, category: str) -> str:
+        return os.path.join(self.root_dir, consultation, f"{category}.txt")
+
+    def _stat_artifact(self, consultation: str, category: str, content: Optional[str] = None) -> Optional[StoredArtifact]:
+        path = self._path(consultation, category)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return StoredArtifact(
+            consultation=consultation,
+            category=category,
+            version=1,
+            size_bytes=stat.st_size,
+            created_at=datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(),
+            location=path,
+            content=content,
+        )
+
+    def save(self, consultation: str, category: str, content: str) -> StoredArtifact:
+        _write_file_atomic(self._path(consultation, category), content)
+        return self._stat_artifact(consultation, category)
+
+    def read(self, consultation: str, category: str) -> Optional[StoredArtifact]:
+        try:
+            with open(self._path(consultation, category), "r", encoding="utf-8") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        return self._stat_artifact(consultation, category, content)
+
+    def find(self, consultation: str = "", category: str = "", since: str = "", until: str = "") -> List[StoredArtifact]:
+        if not os.path.isdir(self.root_dir):
+            return []
+        consultations = [consultation] if consultation else sorted(os.listdir(self.root_dir))
+        found = []
+        for name in consultations:
+            directory = os.path.join(self.root_dir, name)
+            if not os.path.isdir(directory):
+                continue
+            for filename in sorted(os.listdir(directory)):
+                stem, extension = os.path.splitext(filename)
+                if extension != ".txt" or (category and stem != category):
+                    continue
+                artifact = self._stat_artifact(name, stem)
+                if artifact and _in_date_range(artifact.created_at, since, until):
+                    found.append(artifact)
+        return found
+
+    def history(self, consultation: str, category: str) -> List[StoredArtifact]:
+        # Flat files keep no history: only the current version exists
+        artifact = self._stat_artifact(consultation, category)
+        return [artifact] if artifact else []
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteArtifactStore:
+    """Versioned artifacts in a WAL-mode SQLite database."""
+
+    name = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS artifact_versions (
+            consultation TEXT NOT NULL,
+            category TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            size_bytes INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (consultation, category, version)
+        );
+        CREATE INDEX IF NOT EXISTS artifact_versions_by_category ON artifact_versions (category, created_at);
+        CREATE INDEX IF NOT EXISTS artifact_versions_by_date ON artifact_versions (created_at);
+        CREATE TABLE IF NOT EXISTS latest_artifacts (
+            consultation TEXT NOT NULL,
+            category TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (consultation, category)
+        );
+        CREATE INDEX IF NOT EXISTS latest_artifacts_by_category ON latest_artifacts (category, updated_at);
+        CREATE INDEX IF NOT EXISTS latest_artifacts_by_date ON latest_artifacts (updated_at);
+    """
+
+    def __init__(self, db_path: str, export_dir: Optional[str] = None, busy_timeout_ms: int = 10000):
+        """
+        Args:
+            db_path (str): SQLite database file (created if missing).
+            export_dir (str): If set, every save is also mirrored to the flat-file layout here.
+            busy_timeout_ms (int): How long a writer waits for another writer's lock.
+        """
+        self.db_path = db_path
+        self.export_dir = export_dir
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._connection().executescript(self.SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; the file-IO pool threads each get their own."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _location(self, consultation: str, category: str, version: int) -> str:
+        if self.export_dir:
+            return os.path.join(self.export_dir, consultation, f"{category}.txt")
+        return f"sqlite://{self.db_path}#{consultation}/{category}@v{version}"
+
+    def _to_artifact(self, row: sqlite3.Row, with_content: bool) -> StoredArtifact:
+        return StoredArtifact(
+            consultation=row["consultation"],
+            category=row["category"],
+            version=row["version"],
+            size_bytes=row["size_bytes"],
+            created_at=row["created_at"],
+            location=self._location(row["consultation"], row["category"], row["version"]),
+            content=row["content"] if with_content else None,
+        )
+
+    def save(self, consultation: str, category: str, content: str) -> StoredArtifact:
+        """Atomically adds a new version and makes it the latest; identical content is not duplicated."""
+        encoded = content.encode("utf-8")
+        digest = hashlib.sha256(encoded).hexdigest()
+        created_at = _now()
+        conn = self._connection()
+        # BEGIN IMMEDIATE takes the write lock up front, so concurrent savers
+        # (threads or server processes) serialise on version allocation
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT v.version, v.sha256, v.created_at FROM latest_artifacts l "
+                "JOIN artifact_versions v USING (consultation, category, version) "
+                "WHERE l.consultation = ? AND l.category = ?",
+                (consultation, category),
+            ).fetchone()
+            if row is not None and row["sha256"] == digest:
+                version, created_at = row["version"], row["created_at"]
+            else:
+                version = (row["version"] if row is not None else 0) + 1
+                conn.execute(
+                    "INSERT INTO artifact_versions (consultation, category, version, content, size_bytes, sha256, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (consultation, category, version, content, len(encoded), digest, created_at),
+                )
+                conn.execute(
+                    "INSERT INTO latest_artifacts (consultation, category, version, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (consultation, category) DO UPDATE SET version = excluded.version, updated_at = excluded.updated_at",
+                    (consultation, category, version, created_at),
+                )
+                if self.export_dir:
+                    # Mirror while holding the write lock so the file always matches the latest version
+                    _write_file_atomic(os.path.join(self.export_dir, consultation, f"{category}.txt"), content)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return StoredArtifact(
+            consultation=consultation,
+            category=category,
+            version=version,
+            size_bytes=len(encoded),
+            created_at=created_at,
+            location=self._location(consultation, category, version),
+            content=None,
+        )
+
+    def read(self, consultation: str, category: str) -> Optional[StoredArtifact]:
+        row = self._connection().execute(
+            "SELECT v.* FROM latest_artifacts l JOIN artifact_versions v USING (consultation, category, version) "
+            "WHERE l.consultation = ? AND l.category = ?",
+            (consultation, category),
+        ).fetchone()
+        return self._to_artifact(row, with_content=True) if row is not None else None
+
+    def read_version(self, consultation: str, category: str, version: int) -> Optional[StoredArtifact]:
+        row = self._connection().execute(
+            "SELECT * FROM artifact_versions WHERE consultation = ? AND category = ? AND version = ?",
+            (consultation, category, version),
+        ).fetchone()
+        return self._to_artifact(row, with_content=True) if row is not None else None
+
+    def find(self, consultation: str = "", category: str = "", since: str = "", until: str = "") -> List[StoredArtifact]:
+        """Latest versions matching the filters; `since`/`until` are ISO dates (until is exclusive)."""
+        clauses, params = [], []
+        for column, value, operator in (
+            ("l.consultation", consultation, "="),
+            ("l.category", category, "="),
+            ("l.updated_at", since, ">="),
+            ("l.updated_at", until, "<"),
+        ):
+            if value:
+                clauses.append(f"{column} {operator} ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connection().execute(
+            "SELECT v.consultation, v.category, v.version, v.size_bytes, v.created_at FROM latest_artifacts l "
+            f"JOIN artifact_versions v USING (consultation, category, version) {where} "
+            "ORDER BY l.consultation, l.category",
+            params,
+        ).fetchall()
+        return [self._to_artifact(row, with_content=False) for row in rows]
+
+    def history(self, consultation: str, category: str) -> List[StoredArtifact]:
+        """Every saved version of an artifact, newest first."""
+        rows = self._connection().execute(
+            "SELECT consultation, category, version, size_bytes, created_at FROM artifact_versions "
+            "WHERE consultation = ? AND category = ? ORDER BY version DESC",
+            (consultation, category),
+        ).fetchall()
+        return [self._to_artifact(row, with_content=False) for row in rows]
+
+    def export(self, export_dir: str, consultation: str = "") -> int:
+        """Writes the latest version of every (or one consultation's) artifact as flat files."""
+        exported = 0
+        for artifact in self.find(consultation=consultation):
+            latest = self.read(artifact.consultation, artifact.category)
+            _write_file_atomic(os.path.join(export_dir, latest.consultation, f"{latest.category}.txt"), latest.content)
+            exported += 1
+        return exported
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logging.warning(f"Error closing artifact store connection: {e}")
+        self._local = threading.local()
+
+
+def create_artifact_store(backend: str, processing_dir: str, db_path: str, export_files: bool = True):
+    """
+    Builds the configured artifact store.
+
+    Args:
+        backend (str): "files" or "sqlite".
+        processing_dir (str): The flat-file processing_files directory.
+        db_path (str): SQLite database path (sqlite backend only).
+        export_files (bool): Mirror sqlite saves to the flat-file layout;
+            required (True) for the sqlite backend.
+
+    Raises:
+        ValueError: For sqlite without export_files. The agents' artifact
+            manifest and the Streamlit app read the flat files, so they would
+            never see the artifacts.
+    """
+    if backend == "sqlite":
+        if not export_files:
+            raise ValueError(
+                "ARTIFACT_STORE_BACKEND=sqlite requires ARTIFACT_STORE_EXPORT_FILES=true: "
+                "the artifact manifest and the Streamlit app read processing_files/<stem>/<category>.txt"
+            )
+        return SqliteArtifactStore(db_path, export_dir=processing_dir)
+    if backend != "files":
+        logging.warning(f"Unknown ARTIFACT_STORE_BACKEND '{backend}', using flat files")
+    return FileArtifactStore(processing_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the SQLite artifact store to the flat-file layout.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    export_parser = subcommands.add_parser("export", help="Write the latest artifacts as <out>/<consultation>/<category>.txt")
+    export_parser.add_argument("--db", required=True, help="SQLite artifact database")
+    export_parser.add_argument("--out", required=True, help="Directory to export into")
+    export_parser.add_argument("--consultation", default="", help="Only export this consultation")
+    args = parser.parse_args()
+
+    store = SqliteArtifactStore(args.db)
+    try:
+        count = store.export(args.out, consultation=args.consultation)
+    finally:
+        store.close()
+    print(f"Exported {count} artifacts to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
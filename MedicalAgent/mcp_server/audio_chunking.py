@@ -0,0 +1,199 @@
+"""
+Splits audio files into overlapping time windows for chunked transcription.
+
+WAV files are cut on sample-frame boundaries with the standard library `wave`
+module. MP3 files are cut on MPEG audio frame boundaries found by parsing the
+frame headers, so each window is a valid, independently decodable MP3 stream.
+
+Splitting only computes window boundaries (MP3 headers are scanned through a
+memory map); each window's bytes are read from disk when `AudioChunk.read()`
+is called, so at most the windows currently being transcribed are in memory.
+"""
+
+import bisect
+import io
+import mmap
+import os
+import wave
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+# MPEG Layer III bitrate tables (kbit/s) indexed by the header bitrate index
+MP3_BITRATES_V1 = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+MP3_BITRATES_V2 = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+MP3_SAMPLE_RATES_V1 = [44100, 48000, 32000]
+
+
+@dataclass
+class AudioChunk:
+    """One window of audio ready to be sent to the model."""
+
+    index: int
+    start_seconds: float
+    end_seconds: float
+    size_bytes: int
+    mime_type: str
+    _loader: Callable[[], bytes] = field(repr=False)
+
+    def read(self) -> bytes:
+        """Reads this window's audio bytes from disk."""
+        return self._loader()
+
+
+def _byte_range_loader(file_path: str, start: int, length: int) -> Callable[[], bytes]:
+    def load() -> bytes:
+        with open(file_path, "rb") as f:
+            f.seek(start)
+            return f.read(length)
+    return load
+
+
+def _window_starts(duration: float, window_seconds: float, overlap_seconds: float) -> List[float]:
+    """Returns the start time of every window covering `duration`."""
+    step = max(window_seconds - overlap_seconds, 1.0)
+    starts = [0.0]
+    while starts[-1] + window_seconds < duration:
+        starts.append(starts[-1] + step)
+    return starts
+
+
+def _skip_id3v2(data: bytes) -> int:
+    """Returns the offset of the first byte after an ID3v2 tag (0 if there is none)."""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def parse_mp3_frames(data) -> List[Tuple[int, int, float]]:
+    """
+    Finds the MPEG Layer III frames of an MP3 stream.
+
+    Args:
+        data (bytes | mmap.mmap): The MP3 file contents.
+
+    Returns:
+        list: (byte offset, frame length, frame duration in seconds) per frame.
+    """
+    frames = []
+    offset = _skip_id3v2(data)
+    end = len(data) - 4
+    while offset <= end:
+        b1, b2 = data[offset + 1], data[offset + 2]
+        version = (b1 >> 3) & 0x3
+        layer = (b1 >> 1) & 0x3
+        bitrate_index = b2 >> 4
+        sample_rate_index = (b2 >> 2) & 0x3
+        if (
+            data[offset] != 0xFF
+            or (b1 & 0xE0) != 0xE0
+            or version == 1
+            or layer != 1
+            or bitrate_index in (0, 15)
+            or sample_rate_index == 3
+        ):
+            # Not a Layer III frame header: resynchronise on the next byte
+            offset += 1
+            continue
+
+        if version == 3:
+            bitrate = MP3_BITRATES_V1[bitrate_index] * 1000
+            sample_rate = MP3_SAMPLE_RATES_V1[sample_rate_index]
+            samples_per_frame, coefficient = 1152, 144
+        else:
+            bitrate = MP3_BITRATES_V2[bitrate_index] * 1000
+            sample_rate = MP3_SAMPLE_RATES_V1[sample_rate_index] // (2 if version == 2 else 4)
+            samples_per_frame, coefficient = 576, 72
+
+        frame_length = coefficient * bitrate // sample_rate + ((b2 >> 1) & 0x1)
+        frames.append((offset, frame_length, samples_per_frame / sample_rate))
+        offset += frame_length
+    return frames
+
+
+def _split_mp3(audio_file_path: str, window_seconds: float, overlap_seconds: float) -> List[AudioChunk]:
+    file_size = os.path.getsize(audio_file_path)
+    if file_size == 0:
+        return []
+    with open(audio_file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        frames = parse_mp3_frames(data)
+    if not frames:
+        return [AudioChunk(0, 0.0, 0.0, file_size, "audio/mp3", _byte_range_loader(audio_file_path, 0, file_size))]
+
+    frame_starts = []
+    elapsed = 0.0
+    for _, _, frame_duration in frames:
+        frame_starts.append(elapsed)
+        elapsed += frame_duration
+
+    chunks = []
+    for index, start in enumerate(_window_starts(elapsed, window_seconds, overlap_seconds)):
+        first = bisect.bisect_left(frame_starts, start)
+        last = max(bisect.bisect_left(frame_starts, start + window_seconds) - 1, first)
+        byte_start = frames[first][0]
+        byte_end = frames[last][0] + frames[last][1]
+        chunks.append(
+            AudioChunk(
+                index=index,
+                start_seconds=frame_starts[first],
+                end_seconds=frame_starts[last] + frames[last][2],
+                size_bytes=byte_end - byte_start,
+                mime_type="audio/mp3",
+                _loader=_byte_range_loader(audio_file_path, byte_start, byte_end - byte_start),
+            )
+        )
+    return chunks
+
+
+def _wav_window_loader(file_path: str, start_frame: int, frame_count: int) -> Callable[[], bytes]:
+    def load() -> bytes:
+        with wave.open(file_path, "rb") as reader:
+            reader.setpos(start_frame)
+            buffer = io.BytesIO()
+            with wave.open(buffer, "wb") as writer:
+                writer.setparams(reader.getparams())
+                writer.writeframes(reader.readframes(frame_count))
+            return buffer.getvalue()
+    return load
+
+
+def _split_wav(audio_file_path: str, window_seconds: float, overlap_seconds: float) -> List[AudioChunk]:
+    chunks = []
+    with wave.open(audio_file_path, "rb") as reader:
+        params = reader.getparams()
+    frame_rate = params.framerate
+    bytes_per_frame = params.sampwidth * params.nchannels
+    duration = params.nframes / frame_rate
+    for index, start in enumerate(_window_starts(duration, window_seconds, overlap_seconds)):
+        start_frame = int(start * frame_rate)
+        frame_count = min(int(window_seconds * frame_rate), params.nframes - start_frame)
+        chunks.append(
+            AudioChunk(
+                index=index,
+                start_seconds=start_frame / frame_rate,
+                end_seconds=(start_frame + frame_count) / frame_rate,
+                size_bytes=frame_count * bytes_per_frame + 44,
+                mime_type="audio/wav",
+                _loader=_wav_window_loader(audio_file_path, start_frame, frame_count),
+            )
+        )
+    return chunks
+
+
+def split_audio(audio_file_path: str, window_seconds: float, overlap_seconds: float) -> List[AudioChunk]:
+    """
+    Splits an audio file into overlapping windows without loading it into memory.
+
+    Args:
+        audio_file_path (str): Path to a .mp3 or .wav file.
+        window_seconds (float): Length of each window.
+        overlap_seconds (float): Audio shared by consecutive windows.
+
+    Returns:
+        list: AudioChunk objects in playback order.
+    """
+    if Path(audio_file_path).suffix.lower() == ".wav":
+        return _split_wav(audio_file_path, window_seconds, overlap_seconds)
+    return _split_mp3(audio_file_path, window_seconds, overlap_seconds)
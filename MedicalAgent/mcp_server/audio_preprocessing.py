@@ -0,0 +1,384 @@
+"""
+Audio normalisation before transcription.
+
+`probe_audio` identifies the real container and codec from the file's magic
+bytes (not its extension) and reads the sample rate and channel count where
+the header carries them. `prepare_audio` then produces the smallest
+reasonable input for the speech model: mono, resampled to a speech rate and
+compactly encoded, labelled with the correct MIME type.
+
+- With ffmpeg on PATH every supported format (mp3, wav, m4a, ogg, flac) is
+  transcoded to mono MPEG-2 Layer III at the target rate. The result is still
+  an MP3, so the chunked transcription path can split it on frame boundaries.
+- Without ffmpeg, PCM WAV is downmixed and resampled in-process (audioop,
+  streamed block by block); other formats are passed through unchanged.
+
+With `vad_options`, the decoded PCM also goes through the voice activity
+detector (voice_activity.py), and only the speech is encoded. This needs
+ffmpeg, or a PCM WAV input. The decoded PCM is written to a scratch file and
+memory-mapped, and the speech is streamed to the encoder block by block, so
+a long recording is never held in memory. The returned offset map relates
+the speech-only stream to the original recording.
+
+The prepared file is only used if it is smaller than the original.
+`prepare_audio` is a plain module-level function so it can run in a process
+pool: transcoding is CPU-bound and must not hold up the server's threads.
+"""
+
+import logging
+import mimetypes
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import time
+import warnings
+import wave
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+with warnings.catch_warnings():
+    # audioop is deprecated (removed in Python 3.13); without it WAV is passed through
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        import audioop
+    except ImportError:
+        audioop = None
+
+from audio_chunking import MP3_SAMPLE_RATES_V1, _skip_id3v2
+from voice_activity import find_speech
+
+SUPPORTED_AUDIO_EXTENSIONS = (".mp3", ".wav", ".m4a", ".ogg", ".flac")
+
+# MIME types the model accepts, by detected container
+CONTAINER_MIME_TYPES = {
+    "mp3": "audio/mp3",
+    "wav": "audio/wav",
+    "flac": "audio/flac",
+    "ogg": "audio/ogg",
+    "mp4": "audio/mp4",
+}
+
+PCM_BLOCK_FRAMES = 64 * 1024
+
+
+@dataclass
+class AudioInfo:
+    """What the file actually contains."""
+
+    container: str
+    codec: str
+    mime_type: str
+    sample_rate: Optional[int]
+    channels: Optional[int]
+    size_bytes: int
+
+
+@dataclass
+class PreparedAudio:
+    """The audio to send to the model, and how it was produced."""
+
+    path: str
+    mime_type: str
+    container: str
+    codec: str
+    method: str  # "ffmpeg", "pcm" or "passthrough"
+    original_bytes: int
+    prepared_bytes: int
+    seconds: float
+    is_temporary: bool
+    # OffsetMap.to_json() when silence was stripped
+    speech_offsets: Optional[str] = None
+    removed_seconds: float = 0.0
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - self.prepared_bytes
+
+
+def _probe_wav(head: bytes) -> tuple:
+    position = 12
+    while position + 8 <= len(head):
+        chunk_id, chunk_size = head[position:position + 4], struct.unpack("<I", head[position + 4:position + 8])[0]
+        if chunk_id == b"fmt " and position + 24 <= len(head):
+            audio_format, channels, sample_rate = struct.unpack("<HHI", head[position + 8:position + 16])
+            bits = struct.unpack("<H", head[position + 22:position + 24])[0]
+            codec = f"pcm_s{bits}le" if audio_format == 1 else f"wav_format_0x{audio_format:04x}"
+            return codec, sample_rate, channels
+        position += 8 + chunk_size + (chunk_size & 1)
+    return "unknown", None, None
+
+
+def _probe_mp3(head: bytes) -> tuple:
+    position = _skip_id3v2(head)
+    while position + 4 <= len(head):
+        b1, b2, b3 = head[position + 1], head[position + 2], head[position + 3]
+        if head[position] == 0xFF and (b1 & 0xE0) == 0xE0:
+            version = (b1 >> 3) & 0x3
+            sample_rate_index = (b2 >> 2) & 0x3
+            if version != 1 and sample_rate_index != 3:
+                sample_rate = MP3_SAMPLE_RATES_V1[sample_rate_index]
+                if version != 3:
+                    sample_rate //= 2 if version == 2 else 4
+                channels = 1 if (b3 >> 6) == 3 else 2
+                return "mp3", sample_rate, channels
+        position += 1
+    return "mp3", None, None
+
+
+def probe_audio(audio_file_path: str) -> AudioInfo:
+    """Detects the container and codec of an audio file from its contents."""
+    size_bytes = os.path.getsize(audio_file_path)
+    with open(audio_file_path, "rb") as f:
+        head = f.read(64 * 1024)
+
+    sample_rate = channels = None
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        container = "wav"
+        codec, sample_rate, channels = _probe_wav(head)
+    elif head[:4] == b"fLaC":
+        container, codec = "flac", "flac"
+        if len(head) >= 26:
+            # STREAMINFO: 20-bit sample rate, 3-bit (channels - 1)
+            packed = int.from_bytes(head[18:21], "big")
+            sample_rate, channels = packed >> 4, ((packed >> 1) & 0x7) + 1
+    elif head[:4] == b"OggS":
+        container = "ogg"
+        if b"OpusHead" in head:
+            index = head.index(b"OpusHead")
+            codec, channels, sample_rate = "opus", head[index + 9], 48000
+        elif b"\x01vorbis" in head:
+            index = head.index(b"\x01vorbis")
+            codec = "vorbis"
+            channels = head[index + 11]
+            sample_rate = struct.unpack("<I", head[index + 12:index + 16])[0]
+        else:
+            codec = "unknown"
+    elif head[4:8] == b"ftyp":
+        container = "mp4"
+        codec = "aac" if b"mp4a" in head else "unknown"
+    elif head[:3] == b"ID3" or (len(head) > 1 and head[0] == 0xFF and (head[1] & 0xE0) == 0xE0):
+        container = "mp3"
+        codec, sample_rate, channels = _probe_mp3(head)
+    else:
+        container = codec = "unknown"
+
+    mime_type = CONTAINER_MIME_TYPES.get(container) or mimetypes.guess_type(audio_file_path)[0] or "application/octet-stream"
+    return AudioInfo(container, codec, mime_type, sample_rate, channels, size_bytes)
+
+
+def _transcode_ffmpeg(audio_file_path: str, output_path: str, sample_rate: int, bitrate_kbps: int) -> None:
+    subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+            "-i", audio_file_path,
+            "-vn", "-ac", "1", "-ar", str(sample_rate),
+            "-c:a", "libmp3lame", "-b:a", f"{bitrate_kbps}k",
+            output_path,
+        ],
+        check=True,
+        capture_output=True,
+    )
+
+
+def _map_samples(path: str, offset: int, count: int) -> np.ndarray:
+    """Memory-maps `count` int16 samples of a file, starting at byte `offset`."""
+    if count == 0:
+        # NumPy cannot map an empty range
+        return np.zeros(0, dtype="<i2")
+    return np.memmap(path, dtype="<i2", mode="r", offset=offset, shape=(count,))
+
+
+def _decode_ffmpeg(audio_file_path: str, sample_rate: int, pcm_path: str) -> np.ndarray:
+    """Decodes any supported format to mono int16 PCM at `sample_rate` into `pcm_path`, and maps it."""
+    subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+            "-i", audio_file_path,
+            "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", pcm_path,
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return _map_samples(pcm_path, 0, os.path.getsize(pcm_path) // 2)
+
+
+def _segment_blocks(samples: np.ndarray, segments: list):
+    """Yields the samples of `segments` as bytes, at most PCM_BLOCK_FRAMES samples at a time."""
+    for start, end in segments:
+        for block_start in range(start, end, PCM_BLOCK_FRAMES):
+            yield samples[block_start:min(block_start + PCM_BLOCK_FRAMES, end)].astype("<i2").tobytes()
+
+
+def _encode_ffmpeg(samples: np.ndarray, segments: list, sample_rate: int, output_path: str, bitrate_kbps: int) -> None:
+    """Encodes the samples of `segments` to MP3, streaming them to ffmpeg."""
+    args = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+        "-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "-i", "-",
+        "-c:a", "libmp3lame", "-b:a", f"{bitrate_kbps}k",
+        output_path,
+    ]
+    process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        for block in _segment_blocks(samples, segments):
+            process.stdin.write(block)
+    except BrokenPipeError:
+        # ffmpeg stopped reading; its exit status is reported below
+        pass
+    _, stderr = process.communicate()
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, args, stderr=stderr)
+
+
+def _map_wav_samples(path: str) -> tuple:
+    """Memory-maps the samples of a 16-bit mono WAV written by `_convert_pcm_wav`."""
+    with open(path, "rb") as f:
+        with wave.open(f, "rb") as src:
+            frame_count, sample_rate = src.getnframes(), src.getframerate()
+            # Reading the header leaves the file at the start of the sample data
+            data_offset = f.tell()
+    return _map_samples(path, data_offset, frame_count), sample_rate
+
+
+def _write_wav_segments(path: str, samples: np.ndarray, segments: list, sample_rate: int) -> None:
+    with wave.open(path, "wb") as dst:
+        dst.setnchannels(1)
+        dst.setsampwidth(2)
+        dst.setframerate(sample_rate)
+        for block in _segment_blocks(samples, segments):
+            dst.writeframes(block)
+
+
+def _convert_pcm_wav(audio_file_path: str, output_path: str, sample_rate: int) -> None:
+    """Downmixes and resamples PCM WAV to 16-bit mono, one block at a time."""
+    with wave.open(audio_file_path, "rb") as src, wave.open(output_path, "wb") as dst:
+        channels, width, rate = src.getnchannels(), src.getsampwidth(), src.getframerate()
+        target_rate = min(sample_rate, rate)
+        dst.setnchannels(1)
+        dst.setsampwidth(2)
+        dst.setframerate(target_rate)
+        state = None
+        while True:
+            block = src.readframes(PCM_BLOCK_FRAMES)
+            if not block:
+                break
+            if width == 1:
+                # 8-bit WAV is unsigned
+                block = audioop.bias(block, 1, -128)
+            if channels == 2:
+                block = audioop.tomono(block, width, 0.5, 0.5)
+            elif channels > 2:
+                raise ValueError(f"Unsupported channel count for in-process conversion: {channels}")
+            block = audioop.lin2lin(block, width, 2)
+            if target_rate != rate:
+                block, state = audioop.ratecv(block, 2, 1, rate, target_rate, state)
+            dst.writeframes(block)
+
+
+def _create_output_file(audio_file_path: str, work_dir: str, suffix: str) -> str:
+    """Creates an empty, uniquely named output file in `work_dir` (closed, so ffmpeg or wave can overwrite it)."""
+    fd, output_path = tempfile.mkstemp(prefix=f"{Path(audio_file_path).stem}-", suffix=suffix, dir=work_dir)
+    os.close(fd)
+    return output_path
+
+
+def prepare_audio(
+    audio_file_path: str,
+    work_dir: str,
+    sample_rate: int = 16000,
+    bitrate_kbps: int = 32,
+    normalize: bool = True,
+    vad_options: Optional[dict] = None,
+) -> PreparedAudio:
+    """
+    Normalises an audio file for transcription.
+
+    Args:
+        audio_file_path (str): The uploaded recording.
+        work_dir (str): Where the prepared (temporary) file is written.
+        sample_rate (int): Target sample rate for speech.
+        bitrate_kbps (int): Target MP3 bitrate when transcoding with ffmpeg.
+        normalize (bool): False only detects the format (for the MIME type).
+        vad_options (dict): When set, silence is stripped; passed to `find_speech`.
+
+    Returns:
+        PreparedAudio: The file to send; `is_temporary` files should be deleted after use.
+    """
+    start = time.perf_counter()
+    info = probe_audio(audio_file_path)
+    already_compact = (
+        info.container in ("mp3", "ogg", "mp4")
+        and info.channels == 1
+        and info.sample_rate is not None
+        and info.sample_rate <= sample_rate
+    )
+
+    method, output_path, offset_map = "passthrough", None, None
+    if normalize and (vad_options is not None or not already_compact):
+        os.makedirs(work_dir, exist_ok=True)
+        # Full-length decoded PCM, mapped instead of read while the speech is found
+        scratch_path = None
+        try:
+            if shutil.which("ffmpeg"):
+                output_path = _create_output_file(audio_file_path, work_dir, ".mp3")
+                if vad_options is not None:
+                    scratch_path = _create_output_file(audio_file_path, work_dir, ".pcm")
+                    samples = _decode_ffmpeg(audio_file_path, sample_rate, scratch_path)
+                    segments, offset_map = find_speech(samples, sample_rate, **vad_options)
+                    _encode_ffmpeg(samples, segments, sample_rate, output_path, bitrate_kbps)
+                    del samples
+                else:
+                    _transcode_ffmpeg(audio_file_path, output_path, sample_rate, bitrate_kbps)
+                method = "ffmpeg"
+            elif info.container == "wav" and info.codec.startswith("pcm_") and audioop is not None:
+                output_path = _create_output_file(audio_file_path, work_dir, ".wav")
+                if vad_options is not None:
+                    scratch_path = _create_output_file(audio_file_path, work_dir, ".wav")
+                    _convert_pcm_wav(audio_file_path, scratch_path, sample_rate)
+                    samples, rate = _map_wav_samples(scratch_path)
+                    segments, offset_map = find_speech(samples, rate, **vad_options)
+                    _write_wav_segments(output_path, samples, segments, rate)
+                    del samples
+                else:
+                    _convert_pcm_wav(audio_file_path, output_path, sample_rate)
+                method = "pcm"
+        except (subprocess.CalledProcessError, ValueError, wave.Error, OSError) as e:
+            logging.warning(f"Audio normalisation of {audio_file_path} failed, sending the original: {e}")
+            method = "passthrough"
+        finally:
+            if scratch_path and os.path.exists(scratch_path):
+                os.remove(scratch_path)
+
+    if method != "passthrough" and os.path.getsize(output_path) < info.size_bytes:
+        prepared_info = probe_audio(output_path)
+        return PreparedAudio(
+            path=output_path,
+            mime_type=prepared_info.mime_type,
+            container=info.container,
+            codec=info.codec,
+            method=method,
+            original_bytes=info.size_bytes,
+            prepared_bytes=prepared_info.size_bytes,
+            seconds=time.perf_counter() - start,
+            is_temporary=True,
+            speech_offsets=offset_map.to_json() if offset_map is not None else None,
+            removed_seconds=offset_map.removed_seconds if offset_map is not None else 0.0,
+        )
+
+    if output_path and os.path.exists(output_path):
+        os.remove(output_path)
+    return PreparedAudio(
+        path=audio_file_path,
+        mime_type=info.mime_type,
+        container=info.container,
+        codec=info.codec,
+        method="passthrough",
+        original_bytes=info.size_bytes,
+        prepared_bytes=info.size_bytes,
+        seconds=time.perf_counter() - start,
+        is_temporary=False,
+    )
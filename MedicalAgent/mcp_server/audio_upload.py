@@ -0,0 +1,198 @@
+"""
+Audio upload backends and the memory budget for in-flight transcriptions.
+
+A backend turns an audio file on disk into a `types.Part` for generate_content:
+
+- `InlineUploadBackend` reads the file into an inline part. Simple, but the
+  whole recording is held in memory for the request, plus its base64 form in
+  the request body (`inline_request_bytes`).
+- `GeminiFilesUploadBackend` streams the file from disk to the Gemini Files
+  API and references it by URI, so memory use is independent of file size.
+- `LocalFileUploadBackend` is a test-only stand-in with the same upload/delete
+  semantics: files are copied in fixed-size blocks into a local store and
+  referenced by `file://` URI. Only the offline fake model accepts such URIs;
+  the Gemini API rejects them.
+
+`MemoryBudget` bounds the audio bytes held in memory by concurrent
+transcriptions; callers block until their reservation fits.
+"""
+
+import logging
+import math
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+# Imported where parts are built, so loading this module does not load the Gemini SDK
+if TYPE_CHECKING:
+    from google.genai import types
+
+# Block size used for every streamed copy of audio data
+COPY_BLOCK_SIZE = 1024 * 1024
+
+
+@dataclass
+class UploadedAudio:
+    """Handle to audio made available to the model."""
+
+    name: str
+    uri: str
+    mime_type: str
+    size_bytes: int
+
+
+class MemoryBudget:
+    """Byte-counting semaphore that applies backpressure to audio buffering."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._in_use = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def reserve(self, size_bytes: int):
+        """Blocks until `size_bytes` fit in the budget, holds them for the block."""
+        with self._condition:
+            # A single reservation larger than the budget runs alone rather than deadlocking
+            while self._in_use and self._in_use + size_bytes > self.max_bytes:
+                self._condition.wait()
+            self._in_use += size_bytes
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_use -= size_bytes
+                self._condition.notify_all()
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+
+def inline_request_bytes(size_bytes: int) -> int:
+    """Memory an inline part of `size_bytes` of audio needs: the bytes plus their base64 encoding."""
+    return size_bytes + math.ceil(size_bytes / 3) * 4
+
+
+def read_audio_bytes(audio_file_path: str) -> bytes:
+    """Reads an audio file in one read; the SDK's inline parts only accept `bytes`."""
+    with open(audio_file_path, "rb") as f:
+        return f.read()
+
+
+class InlineUploadBackend:
+    """Sends the audio inline in the request body."""
+
+    name = "inline"
+    buffers_audio = True
+
+    def upload(self, audio_file_path: str, mime_type: str) -> UploadedAudio:
+        return UploadedAudio(
+            name=Path(audio_file_path).name,
+            uri=audio_file_path,
+            mime_type=mime_type,
+            size_bytes=os.path.getsize(audio_file_path),
+        )
+
+    def to_part(self, uploaded: UploadedAudio) -> "types.Part":
+        from google.genai import types
+
+        return types.Part.from_bytes(data=read_audio_bytes(uploaded.uri), mime_type=uploaded.mime_type)
+
+    def delete(self, uploaded: UploadedAudio) -> None:
+        pass
+
+
+class GeminiFilesUploadBackend:
+    """Streams the audio to the Gemini Files API and references it by URI."""
+
+    name = "files"
+    buffers_audio = False
+
+    def __init__(self, client):
+        self._client = client
+
+    def upload(self, audio_file_path: str, mime_type: str) -> UploadedAudio:
+        from google.genai import types
+
+        uploaded = self._client.files.upload(
+            file=audio_file_path,
+            config=types.UploadFileConfig(mime_type=mime_type),
+        )
+        return UploadedAudio(
+            name=uploaded.name,
+            uri=uploaded.uri,
+            mime_type=uploaded.mime_type or mime_type,
+            size_bytes=os.path.getsize(audio_file_path),
+        )
+
+    def to_part(self, uploaded: UploadedAudio) -> "types.Part":
+        from google.genai import types
+
+        return types.Part.from_uri(file_uri=uploaded.uri, mime_type=uploaded.mime_type)
+
+    def delete(self, uploaded: UploadedAudio) -> None:
+        try:
+            self._client.files.delete(name=uploaded.name)
+        except Exception as e:
+            # Uploaded files expire on their own; a failed delete is not fatal
+            logging.warning(f"Could not delete uploaded audio {uploaded.name}: {e}")
+
+
+class LocalFileUploadBackend:
+    """Test-only stand-in for the Files API backed by a local directory (fake model only)."""
+
+    name = "local"
+    buffers_audio = False
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        os.makedirs(self.store_dir, exist_ok=True)
+
+    def upload(self, audio_file_path: str, mime_type: str) -> UploadedAudio:
+        name = f"files/{uuid.uuid4().hex}{Path(audio_file_path).suffix.lower()}"
+        stored_path = os.path.join(self.store_dir, Path(name).name)
+        with open(audio_file_path, "rb") as src, open(stored_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, length=COPY_BLOCK_SIZE)
+        return UploadedAudio(
+            name=name,
+            uri=Path(stored_path).resolve().as_uri(),
+            mime_type=mime_type,
+            size_bytes=os.path.getsize(stored_path),
+        )
+
+    def to_part(self, uploaded: UploadedAudio) -> "types.Part":
+        from google.genai import types
+
+        return types.Part.from_uri(file_uri=uploaded.uri, mime_type=uploaded.mime_type)
+
+    def delete(self, uploaded: UploadedAudio) -> None:
+        stored_path = os.path.join(self.store_dir, Path(uploaded.name).name)
+        if os.path.exists(stored_path):
+            os.remove(stored_path)
+
+
+def select_upload_backend(backend_name: str, audio_file_path: str, inline_max_bytes: int, client, local_store_dir: str):
+    """
+    Picks the upload backend for one audio file.
+
+    Args:
+        backend_name (str): "inline", "files", "local" or "auto" (inline for
+            files up to `inline_max_bytes`, Files API above that).
+        audio_file_path (str): The audio file to upload.
+        inline_max_bytes (int): Size limit for inline uploads in "auto" mode.
+        client: The genai client used by the Files API backend.
+        local_store_dir (str): Directory used by the test-only local stand-in.
+    """
+    if backend_name == "auto":
+        backend_name = "inline" if os.path.getsize(audio_file_path) <= inline_max_bytes else "files"
+    if backend_name == "files":
+        return GeminiFilesUploadBackend(client)
+    if backend_name == "local":
+        return LocalFileUploadBackend(local_store_dir)
+    return InlineUploadBackend()
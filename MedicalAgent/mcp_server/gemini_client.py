@@ -0,0 +1,231 @@
+"""
+Long-lived, pooled Gemini clients for the MCP server.
+
+Creating a `genai.Client` per transcription pays for auth resolution and a new
+HTTP connection (TCP + TLS) on every call. The pool creates clients lazily, up
+to a fixed size, and keeps them, and their keep-alive connections, for the
+life of the server process. Every generate_content call is timed and flagged
+as cold (first request on that client) or warm. Client construction and the
+TCP/TLS connects made during each call (reported by httpx's connection trace)
+are timed separately, so the connection cost is measured rather than inferred.
+"""
+
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Optional
+
+import tracing
+
+# google.genai is imported when the first client is created, so servers that
+# never transcribe do not load it
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai import types
+
+
+class GeminiClientPool:
+    """Fixed-size pool of lazily created, reusable genai clients."""
+
+    def __init__(
+        self,
+        size: int,
+        keepalive_seconds: float = 300.0,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        acquire_timeout_seconds: float = 600.0,
+    ):
+        """
+        Args:
+            size (int): Maximum number of clients (and connection pools).
+            keepalive_seconds (float): How long idle connections are kept open.
+            base_url (str): Optional endpoint override, e.g. a local stand-in.
+            api_key (str): Optional API key; by default resolved from the environment.
+            acquire_timeout_seconds (float): How long acquire waits for a busy
+                client before raising TimeoutError.
+        """
+        self.size = max(1, size)
+        self.keepalive_seconds = keepalive_seconds
+        self.base_url = base_url
+        self.api_key = api_key
+        self.acquire_timeout_seconds = acquire_timeout_seconds
+        # Connect time of the request running on each thread, fed by the httpx trace
+        self._call_timing = threading.local()
+        self._idle: "queue.LifoQueue[genai.Client]" = queue.LifoQueue()
+        self._all_clients = []
+        self._reserved_slots = 0
+        self._warm_clients = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {
+            "clients_created": 0,
+            "setup_seconds": 0.0,
+            "connections_opened": 0,
+            "connect_seconds": 0.0,
+            "cold_calls": 0,
+            "cold_request_seconds": 0.0,
+            "warm_calls": 0,
+            "warm_request_seconds": 0.0,
+            "errors": 0,
+        }
+
+    def _http_options(self) -> "types.HttpOptions":
+        from google.genai import types
+
+        options = {}
+        if self.base_url:
+            options["base_url"] = self.base_url
+        # Newer google-genai versions forward client_args to httpx, which lets
+        # idle keep-alive connections outlive the short httpx default and lets
+        # every request carry the connection trace that times its connects
+        if "client_args" in types.HttpOptions.model_fields:
+            import httpx
+
+            options["client_args"] = {
+                "limits": httpx.Limits(
+                    max_keepalive_connections=20,
+                    keepalive_expiry=self.keepalive_seconds,
+                ),
+                "event_hooks": {"request": [self._attach_connection_trace]},
+            }
+        return types.HttpOptions(**options)
+
+    def _attach_connection_trace(self, request) -> None:
+        """httpx request hook: times the TCP connect and TLS handshake, if the request opens a connection."""
+        timing = self._call_timing
+
+        def trace(event_name: str, info: dict) -> None:
+            if event_name == "connection.connect_tcp.started":
+                timing.connect_started = time.perf_counter()
+            elif event_name in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+                started = getattr(timing, "connect_started", None)
+                if started is not None:
+                    # TLS completes after TCP on the same connection; keep the later end
+                    timing.connect_ended = time.perf_counter()
+            elif event_name == "connection.connect_tcp.failed":
+                timing.connect_started = None
+
+        request.extensions["trace"] = trace
+
+    def _create_client(self) -> "genai.Client":
+        from google import genai
+
+        start = time.perf_counter()
+        kwargs = {"http_options": self._http_options()}
+        if self.api_key:
+            kwargs["api_key"] = self.api_key
+        client = genai.Client(**kwargs)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._all_clients.append(client)
+            self._stats["clients_created"] += 1
+            self._stats["setup_seconds"] += elapsed
+        logging.info(f"Gemini client {len(self._all_clients)}/{self.size} created in {elapsed:.3f}s")
+        return client
+
+    @contextmanager
+    def acquire(self):
+        """Yields a client, creating one if the pool is not yet full, else waiting for one."""
+        if self._closed:
+            raise RuntimeError("Gemini client pool has been shut down")
+        try:
+            client = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._reserved_slots < self.size
+                if can_create:
+                    self._reserved_slots += 1
+            if can_create:
+                try:
+                    client = self._create_client()
+                except Exception:
+                    # Give the slot back, or failed creations would leave nothing to wait for
+                    with self._lock:
+                        self._reserved_slots -= 1
+                    raise
+            else:
+                try:
+                    client = self._idle.get(timeout=self.acquire_timeout_seconds)
+                except queue.Empty:
+                    raise TimeoutError(
+                        f"No Gemini client became free within {self.acquire_timeout_seconds:g}s"
+                    ) from None
+        try:
+            yield client
+        finally:
+            self._idle.put(client)
+
+    def generate_content(self, client: "genai.Client", **kwargs):
+        """Calls client.models.generate_content and records its latency."""
+        cold = id(client) not in self._warm_clients
+        self._call_timing.connect_started = None
+        self._call_timing.connect_ended = None
+        start = time.perf_counter()
+        with tracing.span("gemini generate_content", model=kwargs.get("model"), cold_client=cold) as span:
+            try:
+                response = client.models.generate_content(**kwargs)
+            except Exception:
+                with self._lock:
+                    self._stats["errors"] += 1
+                raise
+            usage = response.usage_metadata
+            if usage is not None:
+                tracing.set_attributes(
+                    span, prompt_tokens=usage.prompt_token_count, output_tokens=usage.candidates_token_count
+                )
+        elapsed = time.perf_counter() - start
+        connect_seconds = None
+        if self._call_timing.connect_started is not None and self._call_timing.connect_ended is not None:
+            connect_seconds = self._call_timing.connect_ended - self._call_timing.connect_started
+        with self._lock:
+            self._warm_clients.add(id(client))
+            kind = "cold" if cold else "warm"
+            self._stats[f"{kind}_calls"] += 1
+            self._stats[f"{kind}_request_seconds"] += elapsed
+            if connect_seconds is not None:
+                self._stats["connections_opened"] += 1
+                self._stats["connect_seconds"] += connect_seconds
+        connected = f", {connect_seconds:.3f}s connecting" if connect_seconds is not None else ""
+        logging.info(
+            f"Gemini {kwargs.get('model')} request ({'cold' if cold else 'warm'} client): {elapsed:.3f}s{connected}"
+        )
+        return response
+
+    def stats(self) -> dict:
+        """Returns call counts, mean cold/warm latencies and measured setup/connect times.
+
+        mean_setup_seconds is the client construction time and
+        mean_connect_seconds the TCP/TLS time of a new connection, the costs
+        pooling saves on every reused call.
+        """
+        with self._lock:
+            raw = dict(self._stats)
+        stats = {key: round(value, 4) if isinstance(value, float) else value for key, value in raw.items()}
+        for kind in ("cold", "warm"):
+            calls = raw[f"{kind}_calls"]
+            stats[f"mean_{kind}_request_seconds"] = round(raw[f"{kind}_request_seconds"] / calls, 4) if calls else None
+        stats["mean_setup_seconds"] = (
+            round(raw["setup_seconds"] / raw["clients_created"], 4) if raw["clients_created"] else None
+        )
+        stats["mean_connect_seconds"] = (
+            round(raw["connect_seconds"] / raw["connections_opened"], 4) if raw["connections_opened"] else None
+        )
+        return stats
+
+    def shutdown(self) -> None:
+        """Closes every client and its connection pool."""
+        self._closed = True
+        with self._lock:
+            clients, self._all_clients = self._all_clients, []
+            self._warm_clients.clear()
+        for client in clients:
+            close = getattr(client, "close", None)
+            try:
+                if close is not None:
+                    close()
+                else:
+                    client._api_client._httpx_client.close()
+            except Exception as e:
+                logging.warning(f"Error closing Gemini client: {e}")
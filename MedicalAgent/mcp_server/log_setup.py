@@ -0,0 +1,125 @@
+"""
+Non-blocking, rotating logging for the MCP server processes.
+
+Log calls on the tool hot path only put the record on an in-memory queue
+(QueueHandler); a QueueListener thread does the formatting and the disk
+writes to a size-rotated file. Each server process writes its own file,
+named after its pid, so the pooled server processes neither interleave in
+one file nor truncate each other's logs on start-up.
+
+Large payloads (transcripts, templates) should go through
+`summarize_payload` before being logged: long strings are cut to a prefix
+and tagged with their length and a short hash, so equal payloads can still
+be matched across log lines.
+"""
+
+import atexit
+import glob
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from typing import Any, Optional
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_STANDARD_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def summarize_payload(value: Any, max_chars: int = 200) -> Any:
+    """Returns a copy of `value` with every string longer than `max_chars` truncated and hashed."""
+    if isinstance(value, str):
+        if len(value) <= max_chars:
+            return value
+        digest = hashlib.sha256(value.encode("utf-8")).hexdigest()[:12]
+        return f"{value[:max_chars]}... [{len(value)} chars, sha256:{digest}]"
+    if isinstance(value, dict):
+        return {key: summarize_payload(item, max_chars) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [summarize_payload(item, max_chars) for item in value]
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any fields passed with `extra=`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "pid": record.process,
+            "location": f"{record.filename}:{record.lineno}",
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def _prune_old_logs(log_dir: str, base_name: str, max_age_days: float) -> None:
+    """Deletes per-process logs (and their rotations) of processes that stopped long ago."""
+    cutoff = time.time() - max_age_days * 24 * 3600
+    for path in glob.glob(os.path.join(log_dir, f"{base_name}.*.log*")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def configure_logging(
+    log_dir: str,
+    base_name: str,
+    level: str = "INFO",
+    json_mode: bool = False,
+    max_bytes: int = 5 * 1024 * 1024,
+    backup_count: int = 3,
+    max_age_days: float = 7.0,
+) -> Optional[logging.handlers.QueueListener]:
+    """
+    Routes the root logger through a queue to a rotating per-process file.
+
+    Args:
+        log_dir (str): Directory for the log files.
+        base_name (str): File prefix; the file is `<base_name>.<pid>.log`.
+        level (str): Root log level name, e.g. "INFO" or "DEBUG".
+        json_mode (bool): Write one JSON object per line instead of plain text.
+        max_bytes (int): Rotate the file when it reaches this size.
+        backup_count (int): Rotated files kept per process.
+        max_age_days (float): Other processes' logs untouched for longer are deleted.
+
+    Returns:
+        QueueListener: The running listener (stopped automatically at exit).
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    _prune_old_logs(log_dir, base_name, max_age_days)
+    log_path = os.path.join(log_dir, f"{base_name}.{os.getpid()}.log")
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )
+    if json_mode:
+        file_handler.setFormatter(JsonFormatter())
+    else:
+        file_handler.setFormatter(
+            logging.Formatter("%(asctime)s - %(process)d - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s")
+        )
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+    logging.info(f"Logging to {log_path} ({'json' if json_mode else 'text'}, level {level.upper()})")
+    return listener
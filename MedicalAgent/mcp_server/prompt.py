@@ -16,4 +16,8 @@ Doctor: Hello, this is Dr. Smith. How can I help you today?
 Patient: Hi, I've been having pain in my lower back for the past few days.
 Doctor: Okay, can you describe the pain for me?
 Patient: It's a sharp, stabbing feeling... mostly when I [inaudible] or twist too fast.
-'''
\ No newline at end of file
+'''
+CHUNK_TRANSCRIPTION_PROMPT = TRANSCRIPTION_PROMPT + '''
+This recording is segment {segment} of {total} cut from a longer call, and overlaps the neighbouring segments by a few seconds.
+It may start or end in the middle of a sentence: transcribe only what is audible, do not complete cut-off words or sentences.
+'''
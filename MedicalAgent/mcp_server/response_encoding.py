@@ -0,0 +1,160 @@
+"""
+Wire encoding of MCP tool responses.
+
+"json" (legacy): the whole response dict as one pretty-printed JSON TextContent.
+File contents end up escaped inside a JSON string, and the agent side parses
+them a second time, with the indentation whitespace tokenised by the model.
+
+"compact": the response metadata as one compact JSON TextContent, with every
+file body moved out into its own raw TextContent part. In the metadata each
+"content" string becomes "content_part": <index of the part>, and the
+"file_path" fields, which duplicate the path already given in "message", are
+dropped. `decode_parts` reassembles the dict; the agents' client
+(utils.custom_adk_patches.tool_response_payload) uses it too.
+
+`ResponseEncodingStats` counts every response and measures both encodings
+for a sample of them, grouped by consultation: the first `sample_first`
+responses of each consultation, then every `sample_every`-th one. Every
+consultation reports the bytes and (estimated) tokens saved, without every
+response of a long session being encoded twice.
+"""
+
+import json
+import threading
+from typing import Any, Dict, List
+
+DROPPED_KEYS = ("file_path",)
+
+
+def encode_legacy(payload: dict) -> List[str]:
+    """The original encoding: one indented JSON document."""
+    return [json.dumps(payload, indent=2)]
+
+
+def encode_compact(payload: dict) -> List[str]:
+    """Compact metadata JSON followed by one raw part per file body."""
+    parts: List[str] = [""]
+
+    def strip(value: Any) -> Any:
+        if isinstance(value, dict):
+            stripped = {}
+            for key, item in value.items():
+                if key in DROPPED_KEYS:
+                    continue
+                if key == "content" and isinstance(item, str) and item:
+                    stripped["content_part"] = len(parts)
+                    parts.append(item)
+                else:
+                    stripped[key] = strip(item)
+            return stripped
+        if isinstance(value, list):
+            return [strip(item) for item in value]
+        return value
+
+    parts[0] = json.dumps(strip(payload), separators=(",", ":"), ensure_ascii=False)
+    return parts
+
+
+def decode_parts(texts: List[str]) -> dict:
+    """Rebuilds the response dict from either encoding."""
+    payload = json.loads(texts[0])
+
+    def restore(value: Any) -> Any:
+        if isinstance(value, dict):
+            restored = {}
+            for key, item in value.items():
+                if key == "content_part" and isinstance(item, int) and 0 < item < len(texts):
+                    restored["content"] = texts[item]
+                else:
+                    restored[key] = restore(item)
+            return restored
+        if isinstance(value, list):
+            return [restore(item) for item in value]
+        return value
+
+    return restore(payload)
+
+
+def model_visible_chars(texts: List[str]) -> int:
+    """Characters the model sees: each part is JSON-escaped once more inside the function response."""
+    return sum(len(json.dumps(text)) for text in texts)
+
+
+def estimate_tokens(chars: int) -> int:
+    """Rough token estimate (4 characters per token)."""
+    return chars // 4
+
+
+class ResponseEncodingStats:
+    """Accumulates legacy vs compact response sizes per consultation."""
+
+    def __init__(self, sample_first: int = 0, sample_every: int = 1):
+        """
+        Args:
+            sample_first (int): Measure both encodings for the first n responses
+                of every consultation.
+            sample_every (int): After those, measure every n-th response of the
+                consultation (1: all of them, 0: none).
+        """
+        self.sample_first = max(0, sample_first)
+        self.sample_every = max(0, sample_every)
+        self._lock = threading.Lock()
+        self._by_consultation: Dict[str, Dict[str, int]] = {}
+
+    def _entry(self, consultation: str) -> Dict[str, int]:
+        return self._by_consultation.setdefault(consultation or "(none)", {
+            "responses": 0,
+            "sampled_responses": 0,
+            "legacy_bytes": 0,
+            "compact_bytes": 0,
+            "legacy_tokens_estimate": 0,
+            "compact_tokens_estimate": 0,
+        })
+
+    def should_sample(self, consultation: str) -> bool:
+        """Says whether the encodings of the consultation's next response should be measured."""
+        with self._lock:
+            position = self._entry(consultation)["responses"] + 1
+        if position <= self.sample_first:
+            return True
+        return bool(self.sample_every) and position % self.sample_every == 0
+
+    def count(self, consultation: str) -> None:
+        """Counts a response that was not sampled."""
+        with self._lock:
+            self._entry(consultation)["responses"] += 1
+
+    def record(self, consultation: str, legacy: List[str], compact: List[str]) -> None:
+        """Counts a sampled response and adds the sizes of both encodings."""
+        legacy_bytes = sum(len(text.encode("utf-8")) for text in legacy)
+        compact_bytes = sum(len(text.encode("utf-8")) for text in compact)
+        legacy_tokens = estimate_tokens(model_visible_chars(legacy))
+        compact_tokens = estimate_tokens(model_visible_chars(compact))
+        with self._lock:
+            entry = self._entry(consultation)
+            entry["responses"] += 1
+            entry["sampled_responses"] += 1
+            entry["legacy_bytes"] += legacy_bytes
+            entry["compact_bytes"] += compact_bytes
+            entry["legacy_tokens_estimate"] += legacy_tokens
+            entry["compact_tokens_estimate"] += compact_tokens
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-consultation totals; the byte and token figures cover the sampled responses only."""
+        with self._lock:
+            snapshot = {name: dict(entry) for name, entry in self._by_consultation.items()}
+        for entry in snapshot.values():
+            entry["bytes_saved"] = entry["legacy_bytes"] - entry["compact_bytes"]
+            entry["tokens_saved_estimate"] = entry["legacy_tokens_estimate"] - entry["compact_tokens_estimate"]
+        return snapshot
+
+
+def consultation_of(arguments: dict) -> str:
+    """Best-effort consultation id (audio file stem) from a tool call's arguments."""
+    for key in ("audio_filename", "audio_file_path", "filename"):
+        value = (arguments or {}).get(key)
+        if isinstance(value, str) and value.strip():
+            name = value.strip().replace("\\", "/").rsplit("/", 1)[-1]
+            return name.rsplit(".", 1)[0] if "." in name else name
+    return ""
+
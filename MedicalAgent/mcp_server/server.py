@@ -3,37 +3,139 @@ import json
 import logging
 import os
 import shutil
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import mcp.server.stdio
 from dotenv import load_dotenv
 
-# ADK Tool Imports
-from google.adk.tools.function_tool import FunctionTool
-from google.adk.tools.mcp_tool.conversion_utils import adk_to_mcp_tool_type
-
 # MCP Server Imports
 from mcp import types as mcp_types
 from mcp.server.lowlevel import NotificationOptions, Server
 from mcp.server.models import InitializationOptions
 
 # Fetch the transcription prompt
-from prompt import TRANSCRIPTION_PROMPT
-from google.genai import types
-from google import genai
+from prompt import CHUNK_TRANSCRIPTION_PROMPT, TRANSCRIPTION_PROMPT
+from audio_chunking import split_audio
+from audio_upload import MemoryBudget, inline_request_bytes, select_upload_backend
+from transcript_stitching import stitch_transcripts
+from transcription_cache import TranscriptionCache
+from artifact_store import create_artifact_store
+from log_setup import configure_logging, summarize_payload
+from response_encoding import ResponseEncodingStats, consultation_of, encode_compact, encode_legacy
+from gemini_client import GeminiClientPool
+from tool_execution import create_executor, default_worker_count, offload_tool, parse_concurrency_limits
+from tool_schemas import ServerTool, ToolSchemaCache
+import tracing
+
+# The Gemini SDK, NumPy (audio preprocessing) and ADK (see tool_schemas.py) are
+# imported on first use, not before the handshake: most servers only ever
+# serve the processing-file tools
+if TYPE_CHECKING:
+    from google import genai
+    from voice_activity import OffsetMap
 
 load_dotenv()
 
+# --- Transcription Settings ---
+TRANSCRIPTION_MODEL = "gemini-2.5-flash-preview-05-20"
+
+# "single" sends the whole file in one request, "chunked" always splits it into
+# overlapping windows, "auto" splits only when the audio is longer than one window
+TRANSCRIPTION_MODE = os.getenv("TRANSCRIPTION_MODE", "auto").lower()
+TRANSCRIPTION_CHUNK_SECONDS = float(os.getenv("TRANSCRIPTION_CHUNK_SECONDS", "300"))
+TRANSCRIPTION_CHUNK_OVERLAP_SECONDS = float(os.getenv("TRANSCRIPTION_CHUNK_OVERLAP_SECONDS", "15"))
+TRANSCRIPTION_MAX_WORKERS = int(os.getenv("TRANSCRIPTION_MAX_WORKERS", "4"))
+
+# How whole files reach the model: "inline", "files" (Gemini Files API),
+# "local" (test-only Files API stand-in, fake model only) or "auto" (inline up to the size limit)
+AUDIO_UPLOAD_BACKEND = os.getenv("AUDIO_UPLOAD_BACKEND", "auto").lower()
+AUDIO_INLINE_MAX_BYTES = int(os.getenv("AUDIO_INLINE_MAX_BYTES", str(20 * 1024 * 1024)))
+AUDIO_LOCAL_STORE_DIR = os.path.join(os.path.dirname(__file__), "upload_store")
+
+# Uploads are normalised (mono, speech sample rate, compact encoding) in a
+# process pool before transcription; the uplink speed only feeds the logged
+# estimate of upload time saved
+AUDIO_PREPROCESS = os.getenv("AUDIO_PREPROCESS", "true").lower() in ("1", "true", "yes")
+AUDIO_PREPROCESS_SAMPLE_RATE = int(os.getenv("AUDIO_PREPROCESS_SAMPLE_RATE", "16000"))
+AUDIO_PREPROCESS_BITRATE_KBPS = int(os.getenv("AUDIO_PREPROCESS_BITRATE_KBPS", "32"))
+AUDIO_PREPROCESS_WORKERS = int(os.getenv("AUDIO_PREPROCESS_WORKERS", "2"))
+AUDIO_PREPROCESS_DIR = os.path.join(os.path.dirname(__file__), "preprocessed")
+AUDIO_UPLINK_MBPS = float(os.getenv("AUDIO_UPLINK_MBPS", "10"))
+
+# Voice activity detection strips silence and dead air from the normalised
+# audio; the offset map back to the original recording is saved as SpeechOffsets
+AUDIO_VAD = os.getenv("AUDIO_VAD", "true").lower() in ("1", "true", "yes")
+AUDIO_VAD_OPTIONS = {
+    "margin_db": float(os.getenv("AUDIO_VAD_MARGIN_DB", "10")),
+    "min_silence_ms": int(os.getenv("AUDIO_VAD_MIN_SILENCE_MS", "600")),
+    "padding_ms": int(os.getenv("AUDIO_VAD_PADDING_MS", "200")),
+}
+
+# Long-lived Gemini clients shared by every transcription in this process
+GEMINI_CLIENTS = GeminiClientPool(
+    size=int(os.getenv("GEMINI_CLIENT_POOL_SIZE", str(TRANSCRIPTION_MAX_WORKERS))),
+    keepalive_seconds=float(os.getenv("GEMINI_KEEPALIVE_SECONDS", "300")),
+    base_url=os.getenv("GEMINI_BASE_URL") or None,
+    acquire_timeout_seconds=float(os.getenv("GEMINI_CLIENT_ACQUIRE_TIMEOUT_SECONDS", "600")),
+)
+
+# Audio bytes all concurrent transcriptions may hold in memory at once
+TRANSCRIPTION_MEMORY_BUDGET = MemoryBudget(
+    int(os.getenv("TRANSCRIPTION_MEMORY_BUDGET_BYTES", str(256 * 1024 * 1024)))
+)
+
+TRANSCRIPTION_CACHE = TranscriptionCache(
+    cache_dir=os.getenv(
+        "TRANSCRIPTION_CACHE_DIR",
+        os.path.join(os.path.dirname(__file__), "transcription_cache"),
+    ),
+    max_bytes=int(os.getenv("TRANSCRIPTION_CACHE_MAX_BYTES", str(200 * 1024 * 1024))),
+    max_age_seconds=float(os.getenv("TRANSCRIPTION_CACHE_MAX_AGE_SECONDS", str(30 * 24 * 3600))),
+)
+
+# Processing files go through a pluggable store: flat files (default) or a
+# versioned SQLite database in WAL mode, mirrored to the flat files by default
+PROCESSING_DIR = os.path.join(os.path.dirname(__file__), "processing_files")
+ARTIFACT_STORE = create_artifact_store(
+    os.getenv("ARTIFACT_STORE_BACKEND", "files").lower(),
+    PROCESSING_DIR,
+    os.getenv("ARTIFACT_STORE_DB_PATH", os.path.join(os.path.dirname(__file__), "artifacts.db")),
+    export_files=os.getenv("ARTIFACT_STORE_EXPORT_FILES", "true").lower() in ("1", "true", "yes"),
+)
+
+# "compact": minified metadata JSON plus file bodies as raw TextContent parts;
+# "json": the original single indented JSON document
+MCP_RESPONSE_MODE = os.getenv("MCP_RESPONSE_MODE", "compact").lower()
+# Both encodings are measured for the first responses of each consultation and
+# every n-th one after that, not on the hot path of every call
+RESPONSE_ENCODING_STATS = ResponseEncodingStats(
+    sample_first=int(os.getenv("MCP_RESPONSE_STATS_SAMPLE_FIRST", "10")),
+    sample_every=int(os.getenv("MCP_RESPONSE_STATS_SAMPLE_EVERY", "20")),
+)
+
 # --- Logging Setup ---
-LOG_FILE_PATH = os.path.join(os.path.dirname(__file__), "mcp_server_activity.log")
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s",
-    handlers=[
-        logging.FileHandler(LOG_FILE_PATH, mode="w"),
-    ],
+# Queue-based and rotating, one file per server process: mcp_server_activity.<pid>.log
+LOG_DIR = os.getenv("MCP_LOG_DIR", os.path.join(os.path.dirname(__file__), "logs"))
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("MCP_LOG_PAYLOAD_MAX_CHARS", "200"))
+LOG_LISTENER = configure_logging(
+    LOG_DIR,
+    "mcp_server_activity",
+    level=os.getenv("MCP_LOG_LEVEL", "INFO"),
+    json_mode=os.getenv("MCP_LOG_FORMAT", "text").lower() == "json",
+    max_bytes=int(os.getenv("MCP_LOG_MAX_BYTES", str(5 * 1024 * 1024))),
+    backup_count=int(os.getenv("MCP_LOG_BACKUP_COUNT", "3")),
 )
 
+# --- Tracing ---
+# With TRACE_FILE set, tool calls join the calling agent's trace (see tracing.py)
+if tracing.configure_tracing("mcp_server"):
+    logging.info(f"Tracing spans to {tracing.trace_file()}")
+
 
 def get_audio_file(filename: str) -> dict:
     """Gets the specified audio file from the upload directory.
@@ -67,11 +169,14 @@ def get_audio_file(filename: str) -> dict:
             }
         
         # Validate it's an audio file
+        from audio_preprocessing import SUPPORTED_AUDIO_EXTENSIONS
+
         file_extension = Path(file_path).suffix.lower()
-        if file_extension not in ['.mp3', '.wav']:
+        if file_extension not in SUPPORTED_AUDIO_EXTENSIONS:
             return {
                 "success": False,
-                "message": f"Invalid audio format: {file_extension}. Only .mp3 and .wav are supported.",
+                "message": f"Invalid audio format: {file_extension}. "
+                           f"Supported formats: {', '.join(SUPPORTED_AUDIO_EXTENSIONS)}.",
                 "audio_file_path": "",
                 "filename": ""
             }
@@ -96,6 +201,146 @@ def get_audio_file(filename: str) -> dict:
         }
 
 
+_AUDIO_PREPROCESS_EXECUTOR = None
+
+
+def _audio_preprocess_executor():
+    """The process pool for audio normalisation, created on first use."""
+    global _AUDIO_PREPROCESS_EXECUTOR
+    if _AUDIO_PREPROCESS_EXECUTOR is None:
+        _AUDIO_PREPROCESS_EXECUTOR = create_executor("process", AUDIO_PREPROCESS_WORKERS, name="audio-preprocess")
+    return _AUDIO_PREPROCESS_EXECUTOR
+
+
+def _prepare_for_transcription(audio_file_path: str):
+    """Normalises the upload off-thread and logs the size change and estimated upload time saved."""
+    # Imported on first use, not at server start (it loads NumPy); the pool
+    # workers import it themselves to run it
+    from audio_preprocessing import prepare_audio
+
+    with tracing.span("prepare_audio", audio_file=Path(audio_file_path).name) as span:
+        prepared = _audio_preprocess_executor().submit(
+            prepare_audio,
+            audio_file_path,
+            AUDIO_PREPROCESS_DIR,
+            AUDIO_PREPROCESS_SAMPLE_RATE,
+            AUDIO_PREPROCESS_BITRATE_KBPS,
+            AUDIO_PREPROCESS,
+            AUDIO_VAD_OPTIONS if AUDIO_VAD else None,
+        ).result()
+        tracing.set_attributes(
+            span,
+            method=prepared.method,
+            original_bytes=prepared.original_bytes,
+            prepared_bytes=prepared.prepared_bytes,
+            silence_seconds_removed=round(prepared.removed_seconds, 2),
+        )
+    upload_seconds_saved = prepared.bytes_saved * 8 / (AUDIO_UPLINK_MBPS * 1_000_000)
+    logging.info(
+        f"Audio prepared ({prepared.method}): {Path(audio_file_path).name} "
+        f"[{prepared.container}/{prepared.codec}] {prepared.original_bytes} -> {prepared.prepared_bytes} bytes "
+        f"as {prepared.mime_type} in {prepared.seconds:.2f}s, "
+        f"~{upload_seconds_saved:.1f}s upload saved at {AUDIO_UPLINK_MBPS:g} Mbit/s, "
+        f"{prepared.removed_seconds:.1f}s of silence removed",
+        extra={
+            "event": "audio_prepared",
+            "audio_method": prepared.method,
+            "original_bytes": prepared.original_bytes,
+            "prepared_bytes": prepared.prepared_bytes,
+            "upload_seconds_saved": round(upload_seconds_saved, 2),
+            "silence_seconds_removed": round(prepared.removed_seconds, 2),
+        },
+    )
+    return prepared
+
+
+def _transcribe_whole_file(audio_file_path: str, mime_type: str) -> str:
+    """Transcribes the whole audio file in a single model request."""
+    with GEMINI_CLIENTS.acquire() as client:
+        return _transcribe_whole_file_with(client, audio_file_path, mime_type)
+
+
+def _transcribe_whole_file_with(client: "genai.Client", audio_file_path: str, mime_type: str) -> str:
+    backend = select_upload_backend(
+        AUDIO_UPLOAD_BACKEND, audio_file_path, AUDIO_INLINE_MAX_BYTES, client, AUDIO_LOCAL_STORE_DIR
+    )
+    uploaded = backend.upload(audio_file_path, mime_type=mime_type)
+    try:
+        # Only backends that buffer the audio count against the memory budget,
+        # together with the base64 copy in the request body
+        reserved_bytes = inline_request_bytes(uploaded.size_bytes) if backend.buffers_audio else 0
+        with TRANSCRIPTION_MEMORY_BUDGET.reserve(reserved_bytes):
+            response = GEMINI_CLIENTS.generate_content(
+                client,
+                model=TRANSCRIPTION_MODEL,
+                contents=[
+                    TRANSCRIPTION_PROMPT,
+                    backend.to_part(uploaded),
+                ]
+            )
+        logging.info(f"Transcribed {uploaded.size_bytes} bytes via the '{backend.name}' upload backend")
+        return response.text
+    finally:
+        backend.delete(uploaded)
+
+
+def _transcribe_in_chunks(audio_file_path: str, mime_type: str, offset_map: "OffsetMap" = None) -> str:
+    """Transcribes overlapping windows concurrently and stitches them into one transcript."""
+    if Path(audio_file_path).suffix.lower() not in (".mp3", ".wav"):
+        # Only MP3 and WAV can be cut without decoding; send other formats whole
+        return _transcribe_whole_file(audio_file_path, mime_type)
+    chunks = split_audio(audio_file_path, TRANSCRIPTION_CHUNK_SECONDS, TRANSCRIPTION_CHUNK_OVERLAP_SECONDS)
+    if len(chunks) <= 1 and TRANSCRIPTION_MODE != "chunked":
+        return _transcribe_whole_file(audio_file_path, mime_type)
+
+    from google.genai import types
+
+    def transcribe_chunk(chunk) -> str:
+        # Windows are read from disk only once the memory budget admits them. The
+        # client is taken before the reservation, as in _transcribe_whole_file, so
+        # that the two paths cannot each hold what the other is waiting for
+        reserved_bytes = inline_request_bytes(chunk.size_bytes)
+        with GEMINI_CLIENTS.acquire() as client, TRANSCRIPTION_MEMORY_BUDGET.reserve(reserved_bytes):
+            response = GEMINI_CLIENTS.generate_content(
+                client,
+                model=TRANSCRIPTION_MODEL,
+                contents=[
+                    CHUNK_TRANSCRIPTION_PROMPT.format(segment=chunk.index + 1, total=len(chunks)),
+                    types.Part.from_bytes(data=chunk.read(), mime_type=chunk.mime_type),
+                ]
+            )
+        original_range = ""
+        if offset_map is not None:
+            original_range = (
+                f", {offset_map.to_original(chunk.start_seconds):.1f}s-"
+                f"{offset_map.to_original(chunk.end_seconds):.1f}s of the recording"
+            )
+        logging.info(
+            f"Transcribed chunk {chunk.index + 1}/{len(chunks)} "
+            f"({chunk.start_seconds:.1f}s-{chunk.end_seconds:.1f}s{original_range})"
+        )
+        return response.text or ""
+
+    with ThreadPoolExecutor(max_workers=TRANSCRIPTION_MAX_WORKERS) as pool:
+        # Chunk model calls are traced under the tool call that started them
+        chunk_transcripts = list(pool.map(tracing.bind_context(transcribe_chunk), chunks))
+
+    return stitch_transcripts(chunk_transcripts)
+
+
+def _transcription_options() -> dict:
+    """Settings besides model and prompt that change the transcript, for the cache key."""
+    return {
+        "mode": TRANSCRIPTION_MODE,
+        "chunk_seconds": TRANSCRIPTION_CHUNK_SECONDS,
+        "chunk_overlap_seconds": TRANSCRIPTION_CHUNK_OVERLAP_SECONDS,
+        "preprocess": AUDIO_PREPROCESS,
+        "sample_rate": AUDIO_PREPROCESS_SAMPLE_RATE,
+        "bitrate_kbps": AUDIO_PREPROCESS_BITRATE_KBPS,
+        "vad": AUDIO_VAD_OPTIONS if AUDIO_VAD else None,
+    }
+
+
 def transcribe_audio_file(audio_file_path: str) -> dict:
     """Transcribes an audio file and saves the transcript to processing_files directory.
     
@@ -114,51 +359,62 @@ def transcribe_audio_file(audio_file_path: str) -> dict:
         }
 
     try:
+        from audio_preprocessing import SUPPORTED_AUDIO_EXTENSIONS
+        from voice_activity import OffsetMap
+
         # Validate it's an audio file
         file_extension = Path(audio_file_path).suffix.lower()
-        if file_extension not in ['.mp3', '.wav']:
+        if file_extension not in SUPPORTED_AUDIO_EXTENSIONS:
             return {
                 "success": False,
-                "message": f"Unsupported audio format: {file_extension}. Only .mp3 and .wav are supported.",
+                "message": f"Unsupported audio format: {file_extension}. "
+                           f"Supported formats: {', '.join(SUPPORTED_AUDIO_EXTENSIONS)}.",
                 "transcript_file_path": ""
             }
 
         # Get audio filename (e.g., "CAR0002" from "CAR0002.mp3")
         audio_filename = Path(audio_file_path).stem
 
-        # Create processing_files/CAR0002 directory if it doesn't exist
-        processing_dir = os.path.join(os.path.dirname(__file__), "processing_files", audio_filename)
-        os.makedirs(processing_dir, exist_ok=True)
-
-        # Save as Transcript.txt
-        transcript_file_path = os.path.join(processing_dir, "Transcript.txt")
-
-        #Transcription Logic
-        client = genai.Client()
-        with open(audio_file_path, 'rb') as f:
-            audio_bytes = f.read()
-
-        response = client.models.generate_content(
-            model='gemini-2.5-flash-preview-05-20',
-            contents=[
-                TRANSCRIPTION_PROMPT,
-                types.Part.from_bytes(
-                        data=audio_bytes,
-                        mime_type='audio/mp3',
-                )
-            ]
+        # Same audio bytes + model + prompt + settings => reuse the earlier transcript
+        cache_key = TRANSCRIPTION_CACHE.make_key(
+            audio_file_path, TRANSCRIPTION_MODEL, TRANSCRIPTION_PROMPT, _transcription_options()
         )
-        transcript = response.text
+        transcript = TRANSCRIPTION_CACHE.get(cache_key)
+        cache_hit = transcript is not None
+
+        if cache_hit:
+            speech_offsets = TRANSCRIPTION_CACHE.get_speech_offsets(cache_key)
+            if speech_offsets:
+                ARTIFACT_STORE.save(audio_filename, "SpeechOffsets", speech_offsets)
+        else:
+            #Transcription Logic
+            prepared = _prepare_for_transcription(audio_file_path)
+            if prepared.speech_offsets:
+                # Maps times in the speech-only audio back to the recording
+                ARTIFACT_STORE.save(audio_filename, "SpeechOffsets", prepared.speech_offsets)
+            try:
+                if TRANSCRIPTION_MODE == "single":
+                    transcript = _transcribe_whole_file(prepared.path, prepared.mime_type)
+                else:
+                    offset_map = OffsetMap.from_json(prepared.speech_offsets) if prepared.speech_offsets else None
+                    transcript = _transcribe_in_chunks(prepared.path, prepared.mime_type, offset_map)
+            finally:
+                if prepared.is_temporary:
+                    os.remove(prepared.path)
+            TRANSCRIPTION_CACHE.put(cache_key, transcript, prepared.speech_offsets)
         
-        # Save transcript to file
-        with open(transcript_file_path, 'w', encoding='utf-8') as f:
-            f.write(transcript)
+        # Save as CAR0002/Transcript.txt
+        transcript_file_path = ARTIFACT_STORE.save(audio_filename, "Transcript", transcript).location
 
-        logging.info(f"Audio file transcribed: {audio_file_path} -> {transcript_file_path}")
+        logging.info(
+            f"Audio file transcribed ({'cache hit' if cache_hit else 'cache miss'}): "
+            f"{audio_file_path} -> {transcript_file_path}"
+        )
         
         return {
             "success": True,
-            "message": f"Audio transcribed successfully and saved to {audio_filename}/Transcript.txt",
+            "message": f"Audio transcribed successfully and saved to {audio_filename}/Transcript.txt"
+                       + (" (reused cached transcript)" if cache_hit else ""),
             "transcript_file_path": transcript_file_path
         }
 
@@ -171,6 +427,66 @@ def transcribe_audio_file(audio_file_path: str) -> dict:
         }
 
 
+def _worker_stats_note() -> str:
+    """Warns that per-process counters miss the transcriptions run in process-pool workers."""
+    if TOOL_EXECUTOR_KIND != "process":
+        return ""
+    # The counters live in whichever worker ran each transcription; only the
+    # entry count and size (read from disk) cover them
+    return " (MCP_TOOL_EXECUTOR=process: counters cover this server process only, not its workers)"
+
+
+def get_transcription_cache_stats() -> dict:
+    """Reports the transcription cache hit/miss counters and current usage.
+    
+    Returns:
+        dict: A dictionary with keys 'success' (bool), 'message' (str),
+              and 'stats' (dict) with hits, misses, writes, evictions,
+              hit_rate, entries and total_bytes.
+    """
+    try:
+        stats = TRANSCRIPTION_CACHE.stats()
+        return {
+            "success": True,
+            "message": f"Transcription cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries"
+                       + _worker_stats_note(),
+            "stats": stats
+        }
+    except Exception as e:
+        logging.error(f"Error reading transcription cache stats: {e}", exc_info=True)
+        return {
+            "success": False,
+            "message": f"Error reading transcription cache stats: {e}",
+            "stats": {}
+        }
+
+
+def get_gemini_client_stats() -> dict:
+    """Reports Gemini client pool usage and cold/warm request latencies.
+    
+    Returns:
+        dict: A dictionary with keys 'success' (bool), 'message' (str),
+              and 'stats' (dict) with clients created, setup time and
+              mean cold/warm request times.
+    """
+    try:
+        stats = GEMINI_CLIENTS.stats()
+        return {
+            "success": True,
+            "message": f"Gemini clients: {stats['clients_created']} created, "
+                       f"{stats['cold_calls']} cold and {stats['warm_calls']} warm calls"
+                       + _worker_stats_note(),
+            "stats": stats
+        }
+    except Exception as e:
+        logging.error(f"Error reading Gemini client stats: {e}", exc_info=True)
+        return {
+            "success": False,
+            "message": f"Error reading Gemini client stats: {e}",
+            "stats": {}
+        }
+
+
 def save_processing_file(file_category: str, contents: str, audio_filename: str) -> dict:
     """Saves content to a specific file category in the processing directory.
     
@@ -205,25 +521,20 @@ def save_processing_file(file_category: str, contents: str, audio_filename: str)
         contents = ""  # Allow empty content
 
     try:
-        # Create processing_files/CAR0002 directory if it doesn't exist
-        processing_dir = os.path.join(os.path.dirname(__file__), "processing_files", audio_filename.strip())
-        os.makedirs(processing_dir, exist_ok=True)
-
-        # Generate filename (e.g., AssessmentPlan.txt)
+        # Atomic upsert (e.g. CAR0002/AssessmentPlan.txt): readers never see a partial file
         filename = f"{file_category}.txt"
-        file_path = os.path.join(processing_dir, filename)
-        
-        # Save content to file
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(contents)
+        artifact = ARTIFACT_STORE.save(audio_filename.strip(), file_category, contents)
 
-        file_size = len(contents.encode('utf-8'))
-        logging.info(f"{file_category} file saved: {audio_filename}/{filename} ({file_size} bytes)")
+        file_size = artifact.size_bytes
+        logging.info(
+            f"{file_category} file saved: {audio_filename}/{filename} ({file_size} bytes, version {artifact.version})"
+        )
         
         return {
             "success": True,
             "message": f"{file_category} saved successfully to {audio_filename}/{filename} ({file_size} bytes)",
-            "file_path": file_path
+            "file_path": artifact.location,
+            "version": artifact.version
         }
 
     except Exception as e:
@@ -267,40 +578,27 @@ def read_processing_file(file_category: str, audio_filename: str) -> dict:
         }
 
     try:
-        processing_dir = os.path.join(os.path.dirname(__file__), "processing_files", audio_filename.strip())
-        
-        if not os.path.exists(processing_dir):
-            return {
-                "success": False,
-                "message": f"Processing directory not found: processing_files/{audio_filename}",
-                "file_path": "",
-                "content": ""
-            }
-
         # Generate filename (e.g., AssessmentPlan.txt or Transcript.txt)
         filename = f"{file_category}.txt"
-        file_path = os.path.join(processing_dir, filename)
+        artifact = ARTIFACT_STORE.read(audio_filename.strip(), file_category)
         
-        if not os.path.exists(file_path):
+        if artifact is None:
             return {
                 "success": False,
                 "message": f"{file_category} file not found: {audio_filename}/{filename}",
                 "file_path": "",
                 "content": ""
             }
-        
-        # Read the file content
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
 
-        file_size = os.path.getsize(file_path)
+        file_size = artifact.size_bytes
         logging.info(f"{file_category} file read: {audio_filename}/{filename} ({file_size} bytes)")
         
         return {
             "success": True,
             "message": f"{file_category} file read successfully: {audio_filename}/{filename} ({file_size} bytes)",
-            "file_path": file_path,
-            "content": content
+            "file_path": artifact.location,
+            "content": artifact.content,
+            "version": artifact.version
         }
 
     except UnicodeDecodeError as e:
@@ -321,47 +619,270 @@ def read_processing_file(file_category: str, audio_filename: str) -> dict:
         }
 
 
+def read_processing_files(file_categories: list[str], audio_filename: str) -> dict:
+    """Reads several file categories from the processing directory in one call.
+
+    Args:
+        file_categories (list[str]): The file categories to read, each one of:
+                            'CriticReview', 'MedicalTemplate', 'AssessmentPlan', 'MedicalSummary', 'Transcript'
+        audio_filename (str): The audio filename (e.g., "CAR0002") to locate the directory.
+
+    Returns:
+        dict: A dictionary with keys 'success' (bool, True only if every file was read),
+              'message' (str), and 'files' (dict) mapping each category to the
+              read_processing_file result for it.
+    """
+    if not file_categories:
+        return {
+            "success": False,
+            "message": "At least one file category must be given.",
+            "files": {}
+        }
+
+    # Preserve the requested order and drop duplicates
+    files = {category: read_processing_file(category, audio_filename) for category in dict.fromkeys(file_categories)}
+    failed = [category for category, result in files.items() if not result["success"]]
+    if failed:
+        message = f"Read {len(files) - len(failed)}/{len(files)} files for {audio_filename}; failed: {', '.join(failed)}"
+    else:
+        message = f"Read {len(files)} files for {audio_filename}: {', '.join(files)}"
+    return {
+        "success": not failed,
+        "message": message,
+        "files": files
+    }
+
+
+def save_processing_files(file_categories: list[str], contents: list[str], audio_filename: str) -> dict:
+    """Saves several file categories to the processing directory in one call.
+
+    Args:
+        file_categories (list[str]): The file categories to save, each one of:
+                            'CriticReview', 'MedicalTemplate', 'AssessmentPlan', 'MedicalSummary'
+        contents (list[str]): The content for each category, in the same order as file_categories.
+        audio_filename (str): The audio filename (e.g., "CAR0002") to create the directory.
+
+    Returns:
+        dict: A dictionary with keys 'success' (bool, True only if every file was saved),
+              'message' (str), and 'files' (dict) mapping each category to the
+              save_processing_file result for it.
+    """
+    if not file_categories or len(file_categories) != len(contents or []):
+        return {
+            "success": False,
+            "message": "file_categories and contents must be non-empty lists of the same length.",
+            "files": {}
+        }
+
+    files = {
+        category: save_processing_file(category, content, audio_filename)
+        for category, content in zip(file_categories, contents)
+    }
+    failed = [category for category, result in files.items() if not result["success"]]
+    if failed:
+        message = f"Saved {len(files) - len(failed)}/{len(files)} files for {audio_filename}; failed: {', '.join(failed)}"
+    else:
+        message = f"Saved {len(files)} files for {audio_filename}: {', '.join(files)}"
+    return {
+        "success": not failed,
+        "message": message,
+        "files": files
+    }
+
+
+def find_processing_files(audio_filename: str, file_category: str, since: str, until: str) -> dict:
+    """Lists the latest processing files, filtered by consultation, category and date.
+
+    Args:
+        audio_filename (str): Only this consultation (e.g., "CAR0002"); empty for all.
+        file_category (str): Only this category (e.g., "MedicalTemplate"); empty for all.
+        since (str): Only files saved on or after this ISO date (e.g., "2025-06-01"); empty for no limit.
+        until (str): Only files saved before this ISO date; empty for no limit.
+
+    Returns:
+        dict: A dictionary with keys 'success' (bool), 'message' (str), and
+              'files' (list) with each file's consultation, category, version,
+              size_bytes, created_at and location.
+    """
+    try:
+        artifacts = ARTIFACT_STORE.find(
+            consultation=(audio_filename or "").strip(),
+            category=(file_category or "").strip(),
+            since=(since or "").strip(),
+            until=(until or "").strip(),
+        )
+        return {
+            "success": True,
+            "message": f"Found {len(artifacts)} processing files",
+            "files": [artifact.summary() for artifact in artifacts]
+        }
+    except Exception as e:
+        logging.error(f"Error finding processing files: {e}", exc_info=True)
+        return {
+            "success": False,
+            "message": f"Error finding processing files: {e}",
+            "files": []
+        }
+
+
+def get_processing_file_history(file_category: str, audio_filename: str) -> dict:
+    """Lists every saved version of a processing file, newest first.
+
+    Args:
+        file_category (str): The file category (e.g., "MedicalTemplate").
+        audio_filename (str): The audio filename (e.g., "CAR0002").
+
+    Returns:
+        dict: A dictionary with keys 'success' (bool), 'message' (str), and
+              'versions' (list) with each version's metadata. The flat-file
+              backend keeps only the current version.
+    """
+    try:
+        versions = ARTIFACT_STORE.history((audio_filename or "").strip(), file_category)
+        return {
+            "success": True,
+            "message": f"{len(versions)} versions of {audio_filename}/{file_category}.txt ({ARTIFACT_STORE.name} store)",
+            "versions": [artifact.summary() for artifact in versions]
+        }
+    except Exception as e:
+        logging.error(f"Error reading history of {file_category} file: {e}", exc_info=True)
+        return {
+            "success": False,
+            "message": f"Error reading history of {file_category} file: {e}",
+            "versions": []
+        }
+
+
+def get_response_encoding_stats() -> dict:
+    """Reports, per consultation, the response bytes and estimated tokens saved by compact encoding.
+
+    Returns:
+        dict: A dictionary with keys 'success' (bool), 'message' (str), 'mode' (str),
+              and 'consultations' (dict) with legacy vs compact byte and token counts.
+    """
+    consultations = RESPONSE_ENCODING_STATS.stats()
+    saved = sum(entry["bytes_saved"] for entry in consultations.values())
+    sampled = sum(entry["sampled_responses"] for entry in consultations.values())
+    return {
+        "success": True,
+        "message": (
+            f"Response mode '{MCP_RESPONSE_MODE}': {saved} bytes saved over {sampled} sampled responses "
+            f"in {len(consultations)} consultations"
+        ),
+        "mode": MCP_RESPONSE_MODE,
+        "consultations": consultations
+    }
+
+
 # --- MCP Server Setup ---
 logging.info(
     "Creating MCP Server instance for AUDIO AND FILE HANDLING..."
 )  # Changed print to logging.info
 app = Server("Audio Processing MCP Server")
 
-# Wrap database utility functions as ADK FunctionTools
+# --- Tool Execution ---
+# Blocking tools (transcription) run on TOOL_EXECUTOR so they never stall the
+# event loop. File tools get their own small thread pool, so short reads and
+# writes from the parallel agents never queue behind a running transcription.
+TOOL_EXECUTOR_KIND = os.getenv("MCP_TOOL_EXECUTOR", "thread").lower()
+TOOL_EXECUTOR = create_executor(
+    TOOL_EXECUTOR_KIND,
+    int(os.getenv("MCP_TOOL_EXECUTOR_WORKERS", str(default_worker_count()))),
+    name="mcp-tool",
+)
+FILE_IO_EXECUTOR = create_executor(
+    "thread",
+    int(os.getenv("MCP_FILE_IO_WORKERS", "4")),
+    name="mcp-file-io",
+)
+
+# Per-tool concurrency limits, e.g. "transcribe_audio_file=2,get_audio_file=4"
+TOOL_CONCURRENCY_LIMITS = parse_concurrency_limits(
+    os.getenv("MCP_TOOL_CONCURRENCY_LIMITS", "transcribe_audio_file=2")
+)
+
+
+def _blocking_tool(func):
+    return ServerTool(offload_tool(func, TOOL_EXECUTOR, TOOL_CONCURRENCY_LIMITS.get(func.__name__)))
+
+
+def _file_tool(func):
+    return ServerTool(offload_tool(func, FILE_IO_EXECUTOR, TOOL_CONCURRENCY_LIMITS.get(func.__name__)))
+
+
+# Wrap database utility functions as tools (run like ADK FunctionTools, without importing ADK)
 ADK_AUDIO_TOOLS = {
     #"upload_audio_file": FunctionTool(func=upload_audio_file),
-    "get_audio_file": FunctionTool(func=get_audio_file),
-    "transcribe_audio_file": FunctionTool(func=transcribe_audio_file),
-    "read_processing_file": FunctionTool(func=read_processing_file),
-    "save_processing_file": FunctionTool(func=save_processing_file),
+    "get_audio_file": _file_tool(get_audio_file),
+    "transcribe_audio_file": _blocking_tool(transcribe_audio_file),
+    "get_transcription_cache_stats": _file_tool(get_transcription_cache_stats),
+    "get_gemini_client_stats": _file_tool(get_gemini_client_stats),
+    "get_response_encoding_stats": _file_tool(get_response_encoding_stats),
+    "read_processing_file": _file_tool(read_processing_file),
+    "save_processing_file": _file_tool(save_processing_file),
+    "read_processing_files": _file_tool(read_processing_files),
+    "save_processing_files": _file_tool(save_processing_files),
+    "find_processing_files": _file_tool(find_processing_files),
+    "get_processing_file_history": _file_tool(get_processing_file_history),
 }
 
 
+# list_tools schemas, built by ADK once and cached on disk for every later server start
+TOOL_SCHEMAS = ToolSchemaCache(
+    os.getenv("MCP_TOOL_SCHEMA_CACHE", os.path.join(os.path.dirname(__file__), "tool_schemas.json")),
+    ADK_AUDIO_TOOLS,
+)
+
+
 @app.list_tools()
 async def list_mcp_tools() -> list[mcp_types.Tool]:
     """MCP handler to list tools this server exposes."""
     logging.info(
         "MCP Server: Received list_tools request."
     )  # Changed print to logging.info
-    mcp_tools_list = []
-    for tool_name, adk_tool_instance in ADK_AUDIO_TOOLS.items():
-        if not adk_tool_instance.name:
-            adk_tool_instance.name = tool_name
-
-        mcp_tool_schema = adk_to_mcp_tool_type(adk_tool_instance)
-        logging.info(  # Changed print to logging.info
+    # Off the event loop: a stale cache means importing ADK to rebuild it
+    mcp_tools_list = await asyncio.get_running_loop().run_in_executor(FILE_IO_EXECUTOR, TOOL_SCHEMAS.tools)
+    for mcp_tool_schema in mcp_tools_list:
+        logging.debug(
             f"MCP Server: Advertising tool: {mcp_tool_schema.name}, InputSchema: {mcp_tool_schema.inputSchema}"
         )
-        mcp_tools_list.append(mcp_tool_schema)
     return mcp_tools_list
 
 
+def _request_trace_context() -> dict:
+    """Trace context the client sent in the request's _meta (see tracing.py)."""
+    try:
+        meta = app.request_context.meta
+    except LookupError:
+        return {}
+    if meta is None:
+        return {}
+    return {key: value for key, value in meta.model_dump().items() if isinstance(value, str)}
+
+
 @app.call_tool()
 async def call_mcp_tool(name: str, arguments: dict) -> list[mcp_types.TextContent]:
     """MCP handler to execute a tool call requested by an MCP client."""
+    with tracing.span(
+        f"mcp_server {name}",
+        parent_carrier=_request_trace_context(),
+        server=True,
+        tool=name,
+        consultation=consultation_of(arguments) or None,
+    ) as span:
+        response = await _run_adk_tool(name, arguments)
+        tracing.set_attributes(span, response_bytes=sum(len(part.text.encode("utf-8")) for part in response))
+        return response
+
+
+async def _run_adk_tool(name: str, arguments: dict) -> list[mcp_types.TextContent]:
+    """Runs an exposed ADK tool and encodes its response for the client."""
     logging.info(
-        f"MCP Server: Received call_tool request for '{name}' with args: {arguments}"
-    )  
+        f"MCP Server: Received call_tool request for '{name}' with args: "
+        f"{summarize_payload(arguments, LOG_PAYLOAD_MAX_CHARS)}",
+        extra={"tool": name, "event": "call_tool"},
+    )
+    start = time.perf_counter()
 
     if name in ADK_AUDIO_TOOLS:
         adk_tool_instance = ADK_AUDIO_TOOLS[name]
@@ -370,11 +891,25 @@ async def call_mcp_tool(name: str, arguments: dict) -> list[mcp_types.TextConten
                 args=arguments,
                 tool_context=None,  
             )
-            logging.info( 
-                f"MCP Server: ADK tool '{name}' executed. Response: {adk_tool_response}"
+            # Transcripts and templates are truncated and hashed, never logged in full
+            elapsed = time.perf_counter() - start
+            logging.info(
+                f"MCP Server: ADK tool '{name}' executed in {elapsed:.3f}s. "
+                f"Response: {summarize_payload(adk_tool_response, LOG_PAYLOAD_MAX_CHARS)}",
+                extra={"tool": name, "event": "tool_result", "seconds": round(elapsed, 4)},
             )
-            response_text = json.dumps(adk_tool_response, indent=2)
-            return [mcp_types.TextContent(type="text", text=response_text)]
+            encode = encode_compact if MCP_RESPONSE_MODE == "compact" else encode_legacy
+            response_parts = encode(adk_tool_response)
+            consultation = consultation_of(arguments)
+            if RESPONSE_ENCODING_STATS.should_sample(consultation):
+                RESPONSE_ENCODING_STATS.record(
+                    consultation,
+                    response_parts if encode is encode_legacy else encode_legacy(adk_tool_response),
+                    response_parts if encode is encode_compact else encode_compact(adk_tool_response),
+                )
+            else:
+                RESPONSE_ENCODING_STATS.count(consultation)
+            return [mcp_types.TextContent(type="text", text=text) for text in response_parts]
 
         except Exception as e:
             logging.error(
@@ -399,9 +934,47 @@ async def call_mcp_tool(name: str, arguments: dict) -> list[mcp_types.TextConten
 
 
 # --- MCP Server Runner ---
+# Longest JSON-RPC request line accepted on stdin (saves carry whole transcripts)
+STDIN_LINE_LIMIT_BYTES = 64 * 1024 * 1024
+
+
+class _EventLoopStdin:
+    """Async line iterator over stdin, read by the event loop instead of a worker thread.
+
+    The MCP client stops the server with SIGTERM. mcp's default stdin reader
+    sits in a thread blocked on sys.stdin, which keeps the interpreter from
+    shutting down after the cleanup below has run.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader):
+        self._reader = reader
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        line = await self._reader.readline()
+        if not line:
+            raise StopAsyncIteration
+        return line.decode("utf-8")
+
+
+async def _open_stdin():
+    """Returns stdin as an _EventLoopStdin, or None (mcp's default reader) if the loop cannot watch it."""
+    reader = asyncio.StreamReader(limit=STDIN_LINE_LIMIT_BYTES)
+    try:
+        await asyncio.get_running_loop().connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), sys.stdin.buffer
+        )
+    except ValueError:
+        # Regular files are not pipes, sockets or terminals
+        return None
+    return _EventLoopStdin(reader)
+
+
 async def run_mcp_stdio_server():
     """Runs the MCP server, listening for connections over standard input/output."""
-    async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+    async with mcp.server.stdio.stdio_server(stdin=await _open_stdin()) as (read_stream, write_stream):
         logging.info(
             "MCP Stdio Server: Starting handshake with client..."
         )  
@@ -426,6 +999,9 @@ if __name__ == "__main__":
     logging.info(
         "Launching AUDIO PROCESSING MCP Server via stdio..."
     )  
+    # The MCP client stops the server with SIGTERM; leave through the cleanup
+    # below (process pools, stores, buffered trace spans) instead of dying on the spot
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     try:
         asyncio.run(run_mcp_stdio_server())
     except KeyboardInterrupt:
@@ -437,6 +1013,15 @@ if __name__ == "__main__":
             f"MCP Server (stdio) encountered an unhandled error: {e}", exc_info=True
         )  
     finally:
+        tracing.flush()
+        # Process pools are joined here: the interpreter joins them at exit
+        # anyway, and a pool left shutting down races that join on Python 3.11
+        TOOL_EXECUTOR.shutdown(wait=TOOL_EXECUTOR_KIND == "process", cancel_futures=True)
+        FILE_IO_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+        if _AUDIO_PREPROCESS_EXECUTOR is not None:
+            _AUDIO_PREPROCESS_EXECUTOR.shutdown(wait=True, cancel_futures=True)
+        GEMINI_CLIENTS.shutdown()
+        ARTIFACT_STORE.close()
         logging.info(
             "MCP Server (stdio) process exiting."
         )
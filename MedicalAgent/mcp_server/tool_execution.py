@@ -0,0 +1,110 @@
+"""
+Runs synchronous tool functions off the MCP server's asyncio event loop.
+
+A tool's `run_async` calls a plain function directly, so a blocking tool (a
+minute-long Gemini transcription) stalls every other request the server is
+handling. `offload_tool` wraps a tool function in a coroutine that runs it on
+an executor and, optionally, under a per-tool concurrency limit. The wrapper
+keeps the original signature and docstring, so the tool schema is unchanged
+and the call is awaited natively.
+"""
+
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+# Process-pool workers start as fresh interpreters, never as forks of the
+# server: a fork would inherit its SQLite connections, its logging queue
+# (whose listener thread does not exist in the child) and the trace span
+# processor. forkserver is not used either, as it imports the server script
+# once and forks every worker from that state.
+PROCESS_START_METHOD = "spawn"
+
+
+def create_executor(kind: str, max_workers: int, name: str) -> Executor:
+    """
+    Creates the executor that blocking tools run on.
+
+    Args:
+        kind (str): "thread" or "process". Process workers import the module
+            that defines the submitted function (the server script is
+            re-imported without running the server) and set up their own
+            logging, stores and clients there.
+        max_workers (int): Pool size.
+        name (str): Thread name prefix, used in logs.
+    """
+    if kind == "process":
+        return ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context(PROCESS_START_METHOD),
+            initializer=_exit_with_parent,
+        )
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+
+def _exit_with_parent() -> None:
+    """Process-pool initializer: ends the worker once the server that started it is gone."""
+    # Workers receive both ends of their task queue, so they never see EOF
+    # when the server is killed and would otherwise wait forever
+    parent = multiprocessing.parent_process()
+    if parent is None:
+        return
+
+    def watch_parent():
+        parent.join()
+        os._exit(0)
+
+    threading.Thread(target=watch_parent, name="parent-watch", daemon=True).start()
+
+
+def parse_concurrency_limits(spec: str) -> Dict[str, int]:
+    """Parses "tool_a=2,tool_b=1" into {"tool_a": 2, "tool_b": 1}."""
+    limits = {}
+    for item in spec.split(","):
+        if "=" in item:
+            tool_name, limit = item.split("=", 1)
+            limits[tool_name.strip()] = max(1, int(limit))
+    return limits
+
+
+def offload_tool(func: Callable, executor: Executor, max_concurrency: Optional[int] = None) -> Callable:
+    """
+    Wraps a synchronous tool function as a coroutine running on `executor`.
+
+    Args:
+        func: The synchronous tool function.
+        executor: Executor the function runs on.
+        max_concurrency: Optional limit on simultaneous calls of this tool;
+            further calls wait without occupying an executor worker.
+
+    Returns:
+        An async function with the same name, signature and docstring.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+    # Thread workers run the call in a copy of the caller's context, as
+    # asyncio.to_thread does, so it stays inside the caller's trace span.
+    # Process workers cannot receive a context.
+    copy_context = isinstance(executor, ThreadPoolExecutor)
+
+    @functools.wraps(func)
+    async def run_offloaded(**kwargs):
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, **kwargs)
+        if copy_context:
+            call = functools.partial(contextvars.copy_context().run, call)
+        if semaphore is None:
+            return await loop.run_in_executor(executor, call)
+        async with semaphore:
+            return await loop.run_in_executor(executor, call)
+
+    return run_offloaded
+
+
+def default_worker_count() -> int:
+    return min(8, (os.cpu_count() or 1) + 2)
@@ -0,0 +1,150 @@
+"""
+MCP tool definitions served without importing ADK at start-up.
+
+Importing `google.adk` pulls in the Gemini SDK and Vertex AI, seconds of
+start-up that every spawned server used to pay before its handshake, even
+though most servers only ever read and write processing files.
+
+- `ServerTool` runs a tool function the way ADK's FunctionTool does (same
+  argument handling and missing-argument error), without ADK.
+- `ToolSchemaCache` serves the list_tools schemas. They are still built by
+  ADK's `adk_to_mcp_tool_type`, once, and stored in a JSON file under a
+  fingerprint of the tool signatures and docstrings and the google-adk and
+  mcp versions. A server whose cache matches never imports ADK; a stale or
+  missing cache is rebuilt on the first list_tools. Either way the schemas
+  are built once per process, not on every list_tools.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from importlib import metadata
+from typing import Any, Callable, Dict, List, Optional
+
+from mcp import types as mcp_types
+
+
+class ServerTool:
+    """A tool function as the server runs it: name, description and FunctionTool's call semantics."""
+
+    def __init__(self, func: Callable[..., Any]):
+        self.func = func
+        self.name = func.__name__
+        self.description = inspect.cleandoc(func.__doc__) if func.__doc__ else ""
+        self.signature = inspect.signature(func)
+
+    def mandatory_args(self) -> List[str]:
+        return [
+            name
+            for name, param in self.signature.parameters.items()
+            if param.default is inspect.Parameter.empty
+            and param.kind not in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)
+        ]
+
+    async def run_async(self, *, args: Dict[str, Any], tool_context: Any = None) -> Any:
+        missing_args = [arg for arg in self.mandatory_args() if arg not in args]
+        if missing_args:
+            # Same wording as ADK's FunctionTool, so the model reacts the same way
+            missing_args_str = "\n".join(missing_args)
+            return {
+                "error": f"""Invoking `{self.name}()` failed as the following mandatory input parameters are not present:
+{missing_args_str}
+You could retry calling this tool, but it is IMPORTANT for you to provide all the mandatory parameters."""
+            }
+        if inspect.iscoroutinefunction(self.func):
+            return await self.func(**args)
+        return self.func(**args)
+
+
+def _package_version(name: str) -> str:
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+class ToolSchemaCache:
+    """list_tools schemas for a set of ServerTools, built by ADK once and kept on disk."""
+
+    def __init__(self, path: str, tools: Dict[str, ServerTool]):
+        """
+        Args:
+            path (str): JSON cache file, shared by every server process.
+            tools (dict): Exposed tool name -> ServerTool.
+        """
+        self.path = path
+        self._server_tools = tools
+        self._tools: Optional[List[mcp_types.Tool]] = None
+        self._lock = threading.Lock()
+        self.source = ""  # "cache" or "adk" once loaded
+        self.load_seconds = 0.0
+
+    def fingerprint(self) -> str:
+        """Changes whenever a tool's name, signature or docstring, or the schema builder, changes."""
+        described = [
+            [name, str(tool.signature), tool.description] for name, tool in sorted(self._server_tools.items())
+        ]
+        key = json.dumps([_package_version("google-adk"), _package_version("mcp"), described])
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def tools(self) -> List[mcp_types.Tool]:
+        """Returns the MCP tool schemas, loading or building them on first use."""
+        with self._lock:
+            if self._tools is None:
+                start = time.perf_counter()
+                fingerprint = self.fingerprint()
+                self._tools = self._load(fingerprint)
+                self.source = "cache"
+                if self._tools is None:
+                    self._tools = self._build()
+                    self.source = "adk"
+                    self._store(fingerprint, self._tools)
+                self.load_seconds = time.perf_counter() - start
+                logging.info(
+                    f"Tool schemas for {len(self._tools)} tools from {self.source} in {self.load_seconds:.3f}s",
+                    extra={"event": "tool_schemas", "source": self.source, "seconds": round(self.load_seconds, 4)},
+                )
+            return self._tools
+
+    def _load(self, fingerprint: str) -> Optional[List[mcp_types.Tool]]:
+        try:
+            with open(self.path, encoding="utf-8") as cache_file:
+                cached = json.load(cache_file)
+            if cached.get("fingerprint") != fingerprint:
+                return None
+            return [mcp_types.Tool.model_validate(entry) for entry in cached["tools"]]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable tool schema cache {self.path}: {e}")
+            return None
+
+    def _build(self) -> List[mcp_types.Tool]:
+        # Only a cold or stale cache pays for importing ADK
+        from google.adk.tools.function_tool import FunctionTool
+        from google.adk.tools.mcp_tool.conversion_utils import adk_to_mcp_tool_type
+
+        schemas = []
+        for name, tool in self._server_tools.items():
+            adk_tool = FunctionTool(func=tool.func)
+            adk_tool.name = name
+            schemas.append(adk_to_mcp_tool_type(adk_tool))
+        return schemas
+
+    def _store(self, fingerprint: str, schemas: List[mcp_types.Tool]) -> None:
+        cached = {
+            "fingerprint": fingerprint,
+            "tools": [schema.model_dump(mode="json", exclude_none=True) for schema in schemas],
+        }
+        # Written to a private temp file and renamed, so concurrent servers never read half a cache
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as cache_file:
+                json.dump(cached, cache_file, indent=1)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Could not write tool schema cache {self.path}: {e}")
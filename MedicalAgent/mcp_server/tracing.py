@@ -0,0 +1,448 @@
+"""
+Span tracing of a consultation across the agent process and the MCP servers.
+
+Tracing is off unless TRACE_FILE is set; OpenTelemetry is only imported
+then, so untraced processes start as fast as before. When it is on, every
+process (the agent tree and each MCP server it spawns) appends its finished
+spans to the same JSONL file, one object per line:
+
+- ADK's own spans: `invocation`, `agent_run [<agent>]` for every agent in
+  the tree, `call_llm` for every model call (tokens in/out are read from the
+  response's usage metadata) and `execute_tool <tool>`.
+- `mcp_connect` around spawning an MCP server and its handshake,
+  `mcp_client <tool>` around each MCP request on the agent side, and
+  `mcp_server <tool>` around `call_mcp_tool` in the server. The client sends
+  its trace context in the request's `_meta` (W3C traceparent), so server
+  spans join the agent's trace across the stdio boundary.
+- Server-side work: audio preparation and every Gemini transcription call.
+
+Request and response bodies (transcripts, templates, tool arguments) are
+never written; only names, timings, token counts and small attributes are.
+
+The report renders one trace as a waterfall and walks its critical path:
+
+    python tracing.py traces trace.jsonl
+    python tracing.py report trace.jsonl [--trace <trace_id>]
+"""
+
+import argparse
+import json
+import os
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Attributes that carry prompts, transcripts or tool payloads
+_DROPPED_ATTRIBUTE_PREFIXES = (
+    "gcp.vertex.agent.llm_request",
+    "gcp.vertex.agent.llm_response",
+    "gcp.vertex.agent.tool_call_args",
+    "gcp.vertex.agent.tool_response",
+    "gcp.vertex.agent.data",
+    "gen_ai.tool.description",
+)
+
+# Span name prefix -> category used by the report
+_CATEGORIES = (
+    ("invocation", "invocation"),
+    ("agent_run", "agent"),
+    ("call_llm", "model"),
+    ("gemini", "model"),
+    ("execute_tool", "tool"),
+    ("mcp_client", "mcp_client"),
+    ("mcp_connect", "mcp_client"),
+    ("mcp_server", "mcp_server"),
+)
+
+_TRACER_NAME = "medical_agent"
+_configured_lock = threading.Lock()
+_configured: Dict[str, bool] = {}
+
+
+def trace_file() -> Optional[str]:
+    return os.getenv("TRACE_FILE") or None
+
+
+def tracing_enabled() -> bool:
+    return bool(_configured)
+
+
+def _category(name: str) -> str:
+    for prefix, category in _CATEGORIES:
+        if name.startswith(prefix):
+            return category
+    return "internal"
+
+
+def _usage_from_llm_response(llm_response_json: str) -> dict:
+    """Token counts from the usage metadata of ADK's serialised LlmResponse."""
+    try:
+        usage = json.loads(llm_response_json).get("usage_metadata") or {}
+    except (ValueError, AttributeError):
+        return {}
+    return {
+        key: usage[field]
+        for key, field in (
+            ("prompt_tokens", "prompt_token_count"),
+            ("output_tokens", "candidates_token_count"),
+            ("cached_tokens", "cached_content_token_count"),
+        )
+        if usage.get(field) is not None
+    }
+
+
+def span_record(span, service: str) -> dict:
+    """Flattens a finished OpenTelemetry span into one JSON-serialisable line."""
+    raw_attributes = dict(span.attributes or {})
+    attributes = {
+        key: value
+        for key, value in raw_attributes.items()
+        if not key.startswith(_DROPPED_ATTRIBUTE_PREFIXES)
+    }
+    if "gcp.vertex.agent.llm_response" in raw_attributes:
+        attributes.update(_usage_from_llm_response(raw_attributes["gcp.vertex.agent.llm_response"]))
+    if span.name.startswith("agent_run ["):
+        attributes["agent"] = span.name[len("agent_run ["):-1]
+
+    parent = span.parent
+    return {
+        "trace_id": f"{span.context.trace_id:032x}",
+        "span_id": f"{span.context.span_id:016x}",
+        "parent_id": f"{parent.span_id:016x}" if parent is not None else None,
+        "name": span.name,
+        "category": _category(span.name),
+        "service": service,
+        "pid": os.getpid(),
+        "start": span.start_time / 1e9,
+        "end": span.end_time / 1e9,
+        "duration_ms": round((span.end_time - span.start_time) / 1e6, 3),
+        "status": "error" if span.status.status_code.name == "ERROR" else "ok",
+        "attributes": attributes,
+    }
+
+
+class JsonlSpanExporter:
+    """OpenTelemetry span exporter appending one JSON line per span to a shared file."""
+
+    def __init__(self, path: str, service: str):
+        self.path = path
+        self.service = service
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans):
+        from opentelemetry.sdk.trace.export import SpanExportResult
+
+        lines = "".join(json.dumps(span_record(span, self.service), default=str) + "\n" for span in spans)
+        # One O_APPEND write per batch, so lines from several processes never interleave
+        with self._lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, lines.encode("utf-8"))
+            finally:
+                os.close(fd)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+def configure_tracing(service: str, path: Optional[str] = None) -> bool:
+    """
+    Exports this process's spans to the trace file.
+
+    Joins an SDK tracer provider that is already installed (`adk web` sets
+    one up for its trace view) instead of replacing it.
+
+    Args:
+        service (str): Process label written on every span, e.g. "agents" or "mcp_server".
+        path (str): JSONL file; defaults to TRACE_FILE.
+
+    Returns:
+        bool: True when tracing is on.
+    """
+    path = path or trace_file()
+    if not path:
+        return False
+    with _configured_lock:
+        if path in _configured:
+            return True
+        from opentelemetry import trace
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+        provider = trace.get_tracer_provider()
+        if not isinstance(provider, TracerProvider):
+            provider = TracerProvider()
+            trace.set_tracer_provider(provider)
+        # Batched on a background thread; the provider flushes it at exit
+        provider.add_span_processor(
+            BatchSpanProcessor(JsonlSpanExporter(path, service), schedule_delay_millis=500)
+        )
+        _configured[path] = True
+    return True
+
+
+def flush() -> None:
+    """Writes out spans still waiting in the batch processor."""
+    if tracing_enabled():
+        from opentelemetry import trace
+
+        force_flush = getattr(trace.get_tracer_provider(), "force_flush", None)
+        if force_flush is not None:
+            force_flush()
+
+
+@contextmanager
+def span(name: str, parent_carrier: Optional[dict] = None, server: bool = False, **attributes) -> Iterator[object]:
+    """
+    Opens a span as the current one; yields None when tracing is off.
+
+    Args:
+        name (str): Span name; its prefix picks the report category.
+        parent_carrier (dict): Trace context received from another process.
+        server (bool): Marks the span as the server side of a remote call.
+        **attributes: Span attributes; None values are left out.
+    """
+    if not tracing_enabled():
+        yield None
+        return
+    from opentelemetry import trace
+    from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+
+    parent = TraceContextTextMapPropagator().extract(parent_carrier) if parent_carrier else None
+    with trace.get_tracer(_TRACER_NAME).start_as_current_span(
+        name,
+        context=parent,
+        kind=trace.SpanKind.SERVER if server else trace.SpanKind.INTERNAL,
+        attributes={key: value for key, value in attributes.items() if value is not None},
+    ) as current:
+        yield current
+
+
+def set_attributes(current, **attributes) -> None:
+    """Sets attributes on a span from `span()`; a no-op when tracing is off."""
+    if current is not None:
+        for key, value in attributes.items():
+            if value is not None:
+                current.set_attribute(key, value)
+
+
+def inject_context() -> Dict[str, str]:
+    """Returns the current trace context as W3C headers, e.g. {"traceparent": ...}."""
+    if not tracing_enabled():
+        return {}
+    from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+
+    carrier: Dict[str, str] = {}
+    TraceContextTextMapPropagator().inject(carrier)
+    return carrier
+
+
+def bind_context(func: Callable) -> Callable:
+    """Wraps `func` to run under the caller's current span, e.g. on a worker thread."""
+    if not tracing_enabled():
+        return func
+    from opentelemetry import context
+
+    parent = context.get_current()
+
+    def run_in_context(*args, **kwargs):
+        token = context.attach(parent)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            context.detach(token)
+
+    return run_in_context
+
+
+# --- Report ---
+
+def load_spans(path: str) -> List[dict]:
+    spans = []
+    with open(path, encoding="utf-8") as trace_lines:
+        for line in trace_lines:
+            line = line.strip()
+            if line:
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    pass  # A line cut short by a killed process
+    return spans
+
+
+def group_traces(spans: List[dict]) -> Dict[str, List[dict]]:
+    traces: Dict[str, List[dict]] = defaultdict(list)
+    for record in spans:
+        traces[record["trace_id"]].append(record)
+    return traces
+
+
+def _roots(trace_spans: List[dict]) -> List[dict]:
+    span_ids = {record["span_id"] for record in trace_spans}
+    return sorted(
+        (record for record in trace_spans if record["parent_id"] not in span_ids),
+        key=lambda record: record["start"],
+    )
+
+
+def _children(trace_spans: List[dict]) -> Dict[Optional[str], List[dict]]:
+    children: Dict[Optional[str], List[dict]] = defaultdict(list)
+    for record in trace_spans:
+        children[record["parent_id"]].append(record)
+    for siblings in children.values():
+        siblings.sort(key=lambda record: record["start"])
+    return children
+
+
+def _label(record: dict, agent: Optional[str]) -> str:
+    attributes = record["attributes"]
+    label = record["name"]
+    if record["category"] == "model":
+        label += f" ({attributes.get('agent') or agent or record['service']}"
+        if "prompt_tokens" in attributes or "output_tokens" in attributes:
+            label += f", {attributes.get('prompt_tokens', '?')} in / {attributes.get('output_tokens', '?')} out"
+        label += ")"
+    if record["status"] == "error":
+        label += " [error]"
+    return label
+
+
+def waterfall(trace_spans: List[dict], width: int = 50) -> List[str]:
+    """One line per span in tree order: offset, duration, name and a timeline bar."""
+    roots = _roots(trace_spans)
+    if not roots:
+        return []
+    children = _children(trace_spans)
+    trace_start = min(record["start"] for record in trace_spans)
+    trace_end = max(record["end"] for record in trace_spans)
+    scale = width / max(trace_end - trace_start, 1e-9)
+    lines = []
+
+    def walk(record: dict, depth: int, agent: Optional[str]) -> None:
+        agent = record["attributes"].get("agent", agent)
+        offset = int((record["start"] - trace_start) * scale)
+        length = max(1, int(round((record["end"] - record["start"]) * scale)))
+        bar = " " * offset + "#" * min(length, width - offset)
+        lines.append(
+            f"{(record['start'] - trace_start) * 1000:9.1f} {record['duration_ms']:9.1f}  "
+            f"|{bar:<{width}}|  {'  ' * depth}{_label(record, agent)}"
+        )
+        for child in children.get(record["span_id"], []):
+            walk(child, depth + 1, agent)
+
+    for root in roots:
+        walk(root, 0, None)
+    return lines
+
+
+def critical_path(trace_spans: List[dict]) -> List[dict]:
+    """
+    Spans on the critical path, in start order, with the time each contributes itself.
+
+    Walking back from the end of a span, the child that finished last is on
+    the path; the walk then continues from that child's start. The time not
+    covered by a critical child is the span's own (self) time, so the self
+    times add up to the root's duration.
+    """
+    roots = _roots(trace_spans)
+    if not roots:
+        return []
+    children = _children(trace_spans)
+    path = []
+
+    def walk(record: dict, agent: Optional[str]) -> None:
+        agent = record["attributes"].get("agent", agent)
+        entry = {"span": record, "agent": agent, "self_ms": 0.0}
+        path.append(entry)
+        cursor = record["end"]
+        for child in sorted(children.get(record["span_id"], []), key=lambda item: item["end"], reverse=True):
+            if child["end"] > cursor or child["end"] <= record["start"]:
+                continue  # Overlaps a later critical child, so it is not what the parent waited on
+            entry["self_ms"] += (cursor - child["end"]) * 1000
+            walk(child, agent)
+            cursor = max(child["start"], record["start"])
+        entry["self_ms"] += (cursor - record["start"]) * 1000
+
+    walk(max(roots, key=lambda record: record["end"] - record["start"]), None)
+    return sorted(path, key=lambda entry: entry["span"]["start"])
+
+
+def category_totals(trace_spans: List[dict]) -> Dict[str, dict]:
+    totals: Dict[str, dict] = defaultdict(lambda: {"spans": 0, "seconds": 0.0})
+    for record in trace_spans:
+        entry = totals[record["category"]]
+        entry["spans"] += 1
+        entry["seconds"] += record["duration_ms"] / 1000
+        for key in ("prompt_tokens", "output_tokens"):
+            if key in record["attributes"]:
+                entry[key] = entry.get(key, 0) + record["attributes"][key]
+    return {category: {**entry, "seconds": round(entry["seconds"], 3)} for category, entry in totals.items()}
+
+
+def _trace_summary(trace_id: str, trace_spans: List[dict]) -> str:
+    roots = _roots(trace_spans)
+    start = min(record["start"] for record in trace_spans)
+    end = max(record["end"] for record in trace_spans)
+    root_name = roots[0]["name"] if roots else "?"
+    return f"{trace_id}  {(end - start):8.2f}s  {len(trace_spans):5d} spans  {root_name}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Waterfall and critical-path reports for TRACE_FILE span logs.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    list_parser = subcommands.add_parser("traces", help="List the traces in a span file")
+    list_parser.add_argument("path", help="JSONL span file (TRACE_FILE)")
+    report_parser = subcommands.add_parser("report", help="Waterfall and critical path of one trace")
+    report_parser.add_argument("path", help="JSONL span file (TRACE_FILE)")
+    report_parser.add_argument("--trace", help="Trace id (default: the most recent consultation)")
+    report_parser.add_argument("--width", type=int, default=50, help="Width of the timeline bars")
+    args = parser.parse_args()
+
+    traces = group_traces(load_spans(args.path))
+    if not traces:
+        print(f"No spans in {args.path}")
+        return
+    by_start = sorted(traces, key=lambda trace_id: min(record["start"] for record in traces[trace_id]))
+    if args.command == "traces":
+        for trace_id in by_start:
+            print(_trace_summary(trace_id, traces[trace_id]))
+        return
+
+    # Default to the latest consultation, i.e. trace rooted at a runner invocation
+    invocations = [trace_id for trace_id in by_start if any(root["name"] == "invocation" for root in _roots(traces[trace_id]))]
+    trace_id = args.trace or (invocations or by_start)[-1]
+    if trace_id not in traces:
+        parser.error(f"Trace {trace_id} not found in {args.path}")
+    trace_spans = traces[trace_id]
+
+    print(_trace_summary(trace_id, trace_spans))
+    print()
+    print(f"{'start ms':>9} {'dur ms':>9}  {'timeline':<{args.width + 2}}  span")
+    for line in waterfall(trace_spans, args.width):
+        print(line)
+
+    print()
+    print("Critical path (self time):")
+    for entry in critical_path(trace_spans):
+        if entry["self_ms"] >= 0.05:
+            record = entry["span"]
+            print(f"{entry['self_ms']:10.1f} ms  {_label(record, entry['agent'])}  [{record['service']}]")
+
+    print()
+    print("Totals by category:")
+    for category, entry in sorted(category_totals(trace_spans).items()):
+        tokens = ""
+        if "prompt_tokens" in entry or "output_tokens" in entry:
+            tokens = f", {entry.get('prompt_tokens', 0)} tokens in / {entry.get('output_tokens', 0)} out"
+        print(f"  {category:<12} {entry['spans']:4d} spans  {entry['seconds']:9.3f}s summed{tokens}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Stitches transcripts of overlapping audio windows into a single transcript.
+
+Consecutive windows share a few seconds of audio, so the tail of one chunk
+transcript and the head of the next describe the same speech. The overlap is
+found by fuzzy-matching lines, de-duplicated, and used to keep the
+Doctor/Patient labels consistent when a chunk was diarised the other way round.
+"""
+
+import logging
+import re
+from difflib import SequenceMatcher
+from typing import List, Optional, Tuple
+
+# Only this many lines at each boundary are considered as overlap
+MAX_OVERLAP_LINES = 20
+
+# Minimum similarity for two lines to count as the same utterance
+LINE_MATCH_THRESHOLD = 0.85
+
+# Short backchannels ("Okay.", "Yes.") are too common to anchor an overlap
+MIN_MATCH_CHARS = 12
+
+SPEAKER_SWAP = {"Doctor": "Patient", "Patient": "Doctor"}
+
+_LINE_PATTERN = re.compile(r"^\s*(Doctor|Patient|Unknown)\s*:\s*(.*)$")
+
+
+def _parse_line(line: str) -> Tuple[Optional[str], str]:
+    """Splits a transcript line into (speaker label or None, text)."""
+    match = _LINE_PATTERN.match(line)
+    if match:
+        return match.group(1), match.group(2).strip()
+    return None, line.strip()
+
+
+def _normalise(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+def _same_utterance(a: str, b: str) -> bool:
+    a, b = _normalise(a), _normalise(b)
+    if len(a) < MIN_MATCH_CHARS or len(b) < MIN_MATCH_CHARS:
+        return False
+    return a == b or SequenceMatcher(None, a, b).ratio() >= LINE_MATCH_THRESHOLD
+
+
+def _merge(merged: List[Tuple[Optional[str], str]], chunk: List[Tuple[Optional[str], str]]):
+    """Appends `chunk` to `merged`, dropping the overlap and aligning speaker labels."""
+    tail_start = max(len(merged) - MAX_OVERLAP_LINES, 0)
+    head = chunk[:MAX_OVERLAP_LINES]
+
+    matches = []
+    for i in range(tail_start, len(merged)):
+        for j, (_, text) in enumerate(head):
+            if _same_utterance(merged[i][1], text):
+                matches.append((i, j))
+                break
+
+    if not matches:
+        logging.warning("Transcript stitching: no overlap found between chunks, concatenating")
+        merged.extend(chunk)
+        return
+
+    same = swapped = 0
+    for i, j in matches:
+        previous_label, label = merged[i][0], chunk[j][0]
+        if previous_label == label:
+            same += 1
+        elif SPEAKER_SWAP.get(label) == previous_label:
+            swapped += 1
+    if swapped > same:
+        chunk = [(SPEAKER_SWAP.get(label, label), text) for label, text in chunk]
+
+    # Keep everything up to the last shared utterance, then continue with the new chunk
+    last_i, last_j = matches[-1]
+    del merged[last_i + 1:]
+    merged.extend(chunk[last_j + 1:])
+
+
+def stitch_transcripts(chunk_transcripts: List[str]) -> str:
+    """
+    Combines chunk transcripts (in playback order) into one transcript.
+
+    Args:
+        chunk_transcripts (list): Transcript text of each overlapping window.
+
+    Returns:
+        str: The de-duplicated transcript with consistent speaker labels.
+    """
+    merged: List[Tuple[Optional[str], str]] = []
+    for transcript in chunk_transcripts:
+        lines = [_parse_line(line) for line in transcript.splitlines() if line.strip()]
+        if not merged:
+            merged.extend(lines)
+        else:
+            _merge(merged, lines)
+    return "\n".join(f"{label}: {text}" if label else text for label, text in merged) + "\n"
@@ -0,0 +1,170 @@
+"""
+Content-addressed on-disk cache for audio transcriptions.
+
+Entries are keyed by a streaming SHA-256 of the audio bytes, the model name,
+a hash of the transcription prompt and the settings that change the transcript
+(transcription mode, preprocessing and voice activity detection), so the same
+recording uploaded under a different filename (or retried by an agent) is only
+transcribed once. An entry may carry the speech offset map produced with the
+transcript. The cache is bounded both by total size and by entry age.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+# Read the audio in 1 MiB blocks so hashing never buffers the whole file
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path: str, block_size: int = HASH_BLOCK_SIZE) -> str:
+    """Returns the SHA-256 hex digest of a file, read in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_text(text: str) -> str:
+    """Returns the SHA-256 hex digest of a UTF-8 string."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class TranscriptionCache:
+    """Size- and age-bounded transcription cache stored as one file per entry."""
+
+    def __init__(self, cache_dir: str, max_bytes: int, max_age_seconds: float):
+        """
+        Args:
+            cache_dir (str): Directory holding the cached transcripts.
+            max_bytes (int): Total size above which the oldest entries are evicted.
+            max_age_seconds (float): Entries not used for longer than this are evicted.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, audio_file_path: str, model: str, prompt: str, options: dict = None) -> str:
+        """Builds the cache key for an audio file, model, prompt and transcription settings."""
+        options_hash = hash_text(json.dumps(options or {}, sort_keys=True))
+        return hash_text(f"{hash_file(audio_file_path)}:{model}:{hash_text(prompt)}:{options_hash}")
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def _offsets_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.offsets.json")
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        """Removes a file, tolerating another server process removing it first."""
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _remove_entry(self, entry_path: str) -> bool:
+        """Removes a transcript entry and its speech offsets."""
+        self._remove(entry_path[: -len(".txt")] + ".offsets.json")
+        return self._remove(entry_path)
+
+    def get(self, key: str):
+        """Returns the cached transcript for `key`, or None on a miss."""
+        entry_path = self._entry_path(key)
+        with self._lock:
+            try:
+                if time.time() - os.path.getmtime(entry_path) > self.max_age_seconds:
+                    self._stats["evictions"] += self._remove_entry(entry_path)
+                    raise FileNotFoundError(entry_path)
+                with open(entry_path, "r", encoding="utf-8") as f:
+                    transcript = f.read()
+                # Touch the entry so eviction is least-recently-used
+                os.utime(entry_path)
+            except FileNotFoundError:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            return transcript
+
+    def get_speech_offsets(self, key: str):
+        """Returns the speech offset map stored with `key`'s transcript, or None."""
+        try:
+            with open(self._offsets_path(key), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, path: str, text: str) -> None:
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def put(self, key: str, transcript: str, speech_offsets: str = None) -> None:
+        """Stores a transcript (and its speech offset map) atomically and enforces the cache bounds."""
+        # The offsets go first: a reader that finds the transcript also finds them
+        if speech_offsets:
+            self._write(self._offsets_path(key), speech_offsets)
+        else:
+            self._remove(self._offsets_path(key))
+        self._write(self._entry_path(key), transcript)
+        with self._lock:
+            self._stats["writes"] += 1
+        self.evict()
+
+    def evict(self) -> int:
+        """Removes expired entries, then the least recently used ones over the size limit."""
+        removed = 0
+        now = time.time()
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".txt"):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if now - stat.st_mtime > self.max_age_seconds:
+                    removed += self._remove_entry(path)
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+            total_bytes = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total_bytes <= self.max_bytes:
+                    break
+                removed += self._remove_entry(path)
+                total_bytes -= size
+
+            self._stats["evictions"] += removed
+        if removed:
+            logging.info(f"Transcription cache evicted {removed} entries")
+        return removed
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters plus the current entry count and size."""
+        with self._lock:
+            sizes = [
+                os.path.getsize(os.path.join(self.cache_dir, name))
+                for name in os.listdir(self.cache_dir)
+                if name.endswith(".txt")
+            ]
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+                "entries": len(sizes),
+                "total_bytes": sum(sizes),
+                "max_bytes": self.max_bytes,
+                "max_age_seconds": self.max_age_seconds,
+            }
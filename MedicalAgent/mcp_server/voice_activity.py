@@ -0,0 +1,204 @@
+"""
+Energy / zero-crossing voice activity detection on decoded PCM.
+
+The signal is cut into fixed-size frames (FRAME_MS) and two features are
+computed with NumPy, FEATURE_BLOCK_FRAMES frames at a time so the float copy
+stays small however long the recording (which may be a memory-mapped file):
+log energy relative to full scale and zero-crossing rate. A frame is speech when its energy is at least
+`margin_db` above the recording's noise floor (a low percentile of the frame
+energies) and its zero-crossing rate is below `max_zcr`. Broadband noise
+(line hiss, keyboard clicks) crosses zero far more often than voiced speech.
+
+The frame decisions are then smoothed. Gaps shorter than `min_silence_ms`
+are bridged, bursts shorter than `min_speech_ms` are dropped, and
+`padding_ms` is kept on both sides of every segment so word onsets and
+trailing consonants survive.
+
+`find_speech` returns the segments to keep and an `OffsetMap`, which
+translates a time in the speech-only stream back to the original recording.
+`strip_silence` also concatenates the segments in memory.
+"""
+
+import json
+from dataclasses import asdict, dataclass
+from typing import List, Tuple
+
+import numpy as np
+
+FRAME_MS = 30
+INT16_FULL_SCALE = 32768.0
+
+# Frames converted to float at once (about 4 MB of float32 at 16 kHz)
+FEATURE_BLOCK_FRAMES = 2048
+
+
+@dataclass
+class SpeechSegment:
+    """One kept stretch of audio, in seconds."""
+
+    original_start: float
+    speech_start: float
+    duration: float
+
+
+class OffsetMap:
+    """Maps times in the speech-only stream back to the original recording."""
+
+    def __init__(self, segments: List[SpeechSegment], original_seconds: float):
+        self.segments = segments
+        self.original_seconds = original_seconds
+        self._speech_starts = np.array([segment.speech_start for segment in segments])
+
+    @property
+    def speech_seconds(self) -> float:
+        return sum(segment.duration for segment in self.segments)
+
+    @property
+    def removed_seconds(self) -> float:
+        return self.original_seconds - self.speech_seconds
+
+    def to_original(self, speech_seconds: float) -> float:
+        """Returns the original-recording time of a point in the speech-only stream."""
+        if not self.segments:
+            return speech_seconds
+        index = max(0, int(np.searchsorted(self._speech_starts, speech_seconds, side="right")) - 1)
+        segment = self.segments[index]
+        return segment.original_start + min(max(speech_seconds - segment.speech_start, 0.0), segment.duration)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "original_seconds": round(self.original_seconds, 3),
+            "speech_seconds": round(self.speech_seconds, 3),
+            "segments": [{key: round(value, 3) for key, value in asdict(segment).items()} for segment in self.segments],
+        })
+
+    @classmethod
+    def from_json(cls, text: str) -> "OffsetMap":
+        data = json.loads(text)
+        return cls([SpeechSegment(**segment) for segment in data["segments"]], data["original_seconds"])
+
+
+def frame_features(samples: np.ndarray, frame_length: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes per-frame energy (dBFS) and zero-crossing rate.
+
+    Args:
+        samples (np.ndarray): Mono int16 PCM.
+        frame_length (int): Samples per frame; a trailing partial frame is ignored.
+
+    Returns:
+        tuple: (energy_db, zcr), one value per frame.
+    """
+    frame_count = len(samples) // frame_length
+    energy_db = np.empty(frame_count)
+    zcr = np.empty(frame_count)
+    for first in range(0, frame_count, FEATURE_BLOCK_FRAMES):
+        last = min(first + FEATURE_BLOCK_FRAMES, frame_count)
+        block = samples[first * frame_length:last * frame_length].reshape(last - first, frame_length)
+        frames = block.astype(np.float32)
+        frames /= INT16_FULL_SCALE
+        energy_db[first:last] = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        signs = np.signbit(block)
+        zcr[first:last] = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame_length - 1)
+    return energy_db, zcr
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start (inclusive) and end (exclusive) indices of the True runs in `mask`."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def _merge_close(starts: np.ndarray, ends: np.ndarray, min_gap: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Merges runs separated by fewer than `min_gap` frames."""
+    if len(starts) < 2:
+        return starts, ends
+    keep_gap = (starts[1:] - ends[:-1]) >= min_gap
+    return starts[np.concatenate(([True], keep_gap))], ends[np.concatenate((keep_gap, [True]))]
+
+
+def detect_speech(
+    samples: np.ndarray,
+    sample_rate: int,
+    margin_db: float = 10.0,
+    min_energy_db: float = -55.0,
+    max_zcr: float = 0.35,
+    noise_percentile: float = 10.0,
+    min_speech_ms: int = 150,
+    min_silence_ms: int = 600,
+    padding_ms: int = 200,
+) -> List[Tuple[int, int]]:
+    """
+    Finds the speech in a recording.
+
+    Args:
+        samples (np.ndarray): Mono int16 PCM.
+        sample_rate (int): Samples per second.
+        margin_db (float): How far above the noise floor a frame must be.
+        min_energy_db (float): Frames quieter than this (dBFS) are never speech.
+        max_zcr (float): Frames crossing zero more often than this are noise.
+        noise_percentile (float): Percentile of frame energies taken as the noise floor.
+        min_speech_ms (int): Shorter bursts are dropped.
+        min_silence_ms (int): Shorter gaps are kept as part of the speech.
+        padding_ms (int): Audio kept before and after every segment.
+
+    Returns:
+        list: (start_sample, end_sample) pairs in playback order.
+    """
+    frame_length = max(2, sample_rate * FRAME_MS // 1000)
+    if len(samples) < frame_length:
+        return [(0, len(samples))] if len(samples) else []
+    energy_db, zcr = frame_features(samples, frame_length)
+    threshold = max(min_energy_db, float(np.percentile(energy_db, noise_percentile)) + margin_db)
+    starts, ends = _runs((energy_db > threshold) & (zcr < max_zcr))
+
+    starts, ends = _merge_close(starts, ends, max(1, min_silence_ms // FRAME_MS))
+    long_enough = (ends - starts) >= max(1, min_speech_ms // FRAME_MS)
+    starts, ends = starts[long_enough], ends[long_enough]
+
+    padding = padding_ms // FRAME_MS
+    frame_count = len(energy_db)
+    starts, ends = _merge_close(np.maximum(starts - padding, 0), np.minimum(ends + padding, frame_count), 0)
+
+    segments = [(int(start) * frame_length, int(end) * frame_length) for start, end in zip(starts, ends)]
+    if segments and ends[-1] == frame_count:
+        # Keep the trailing partial frame with a segment that runs to the end
+        segments[-1] = (segments[-1][0], len(samples))
+    return segments
+
+
+def find_speech(samples: np.ndarray, sample_rate: int, **options) -> Tuple[List[Tuple[int, int]], OffsetMap]:
+    """
+    Finds the audio to keep, without copying it.
+
+    Args:
+        samples (np.ndarray): Mono int16 PCM.
+        sample_rate (int): Samples per second.
+        **options: Passed to `detect_speech`.
+
+    Returns:
+        tuple: ((start_sample, end_sample) pairs, OffsetMap). When no speech is
+            found the whole recording is kept, so nothing is lost silently.
+    """
+    segments = detect_speech(samples, sample_rate, **options) or [(0, len(samples))]
+    offsets, speech_start = [], 0
+    for start, end in segments:
+        offsets.append(SpeechSegment(start / sample_rate, speech_start / sample_rate, (end - start) / sample_rate))
+        speech_start += end - start
+    return segments, OffsetMap(offsets, len(samples) / sample_rate)
+
+
+def strip_silence(samples: np.ndarray, sample_rate: int, **options) -> Tuple[np.ndarray, OffsetMap]:
+    """
+    Removes non-speech audio.
+
+    Args:
+        samples (np.ndarray): Mono int16 PCM.
+        sample_rate (int): Samples per second.
+        **options: Passed to `detect_speech`.
+
+    Returns:
+        tuple: (speech-only int16 PCM, OffsetMap), as for `find_speech`.
+    """
+    segments, offset_map = find_speech(samples, sample_rate, **options)
+    return np.concatenate([samples[start:end] for start, end in segments]), offset_map
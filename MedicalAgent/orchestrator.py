@@ -0,0 +1,142 @@
+"""
+Deterministic, code-driven orchestration of the consultation pipeline.
+
+In the default (LLM) mode the root MedicalAgent and AudioProcessor spend
+several model round-trips deciding to call get_audio_file, then
+transcribe_audio_file, then to hand over to parallel_processing_agent. When
+the user's message already names the audio file, PipelineOrchestrator runs
+those steps directly in code and only uses LLM turns for the free-form Q&A
+that follows (ConsultationQA).
+
+Enable it with ORCHESTRATION_MODE=code.
+"""
+
+import logging
+import os
+import re
+import time
+from typing import AsyncGenerator, Optional
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+from pydantic import PrivateAttr
+
+from .utils.custom_adk_patches import CustomMCPToolset, tool_response_payload
+from .utils.transcript_prefetch import STATE_AUDIO_FILENAME, STATE_TRANSCRIPT_SOURCE
+
+# Model turns the LLM-routed flow spends before useful work starts: root decides
+# to transfer, AudioProcessor calls get_audio_file, calls transcribe_audio_file,
+# transfers back, and root transfers to parallel_processing_agent. The time
+# this saves is measured by benchmarks/offline_pipeline.py --orchestration llm|code
+ROUTING_LLM_TURNS_SKIPPED = 5
+
+AUDIO_FILENAME_PATTERN = re.compile(r"([\w\-.]+\.(?:mp3|wav|m4a|ogg|flac))\b", re.IGNORECASE)
+
+
+class PipelineOrchestrator(BaseAgent):
+    """Runs get_audio_file -> transcribe_audio_file -> parallel processing in code."""
+
+    processing_agent: BaseAgent
+    qa_agent: LlmAgent
+    mcp_toolset: CustomMCPToolset
+
+    # MCP tools by name, listed on the first direct call
+    _tools: dict = PrivateAttr(default_factory=dict)
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def __init__(self, name: str, processing_agent: BaseAgent, qa_agent: LlmAgent, mcp_toolset: CustomMCPToolset, **kwargs):
+        super().__init__(
+            name=name,
+            processing_agent=processing_agent,
+            qa_agent=qa_agent,
+            mcp_toolset=mcp_toolset,
+            sub_agents=[processing_agent, qa_agent],
+            **kwargs,
+        )
+
+    async def _call_tool(self, name: str, args: dict) -> dict:
+        """Calls an MCP tool on the shared server directly, without a model turn."""
+        tool = self._tools.get(name)
+        if tool is None:
+            # Listed once; the tools reconnect their session themselves
+            self._tools = {tool.name: tool for tool in await self.mcp_toolset.get_tools()}
+            tool = self._tools.get(name)
+            if tool is None:
+                # Degraded server or renamed tool: reported like any other failed stage
+                return {"success": False, "message": f"MCP server does not expose the tool '{name}'"}
+        response = await tool.run_async(args=args, tool_context=None)
+        return tool_response_payload(response)
+
+    def _message_event(self, ctx: InvocationContext, text: str, state_delta: Optional[dict] = None) -> Event:
+        return Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            actions=EventActions(state_delta=state_delta or {}),
+        )
+
+    @staticmethod
+    def _requested_audio_file(ctx: InvocationContext) -> Optional[str]:
+        if not ctx.user_content or not ctx.user_content.parts:
+            return None
+        text = " ".join(part.text for part in ctx.user_content.parts if part.text)
+        match = AUDIO_FILENAME_PATTERN.search(text)
+        return match.group(1).strip() if match else None
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        filename = self._requested_audio_file(ctx)
+        if not filename or ctx.session.state.get("processed_audio_file") == filename:
+            # No new recording: this is a Q&A turn
+            async for event in self.qa_agent.run_async(ctx):
+                yield event
+            return
+
+        timings = {}
+        start = time.perf_counter()
+
+        stage_start = time.perf_counter()
+        audio = await self._call_tool("get_audio_file", {"filename": filename})
+        timings["get_audio_file"] = round(time.perf_counter() - stage_start, 3)
+        if not audio.get("success"):
+            yield self._message_event(ctx, f"I could not find the audio file '{filename}': {audio.get('message')}")
+            return
+
+        stage_start = time.perf_counter()
+        transcription = await self._call_tool(
+            "transcribe_audio_file", {"audio_file_path": audio["audio_file_path"]}
+        )
+        timings["transcribe_audio_file"] = round(time.perf_counter() - stage_start, 3)
+        if not transcription.get("success"):
+            yield self._message_event(ctx, f"Transcription of '{filename}' failed: {transcription.get('message')}")
+            return
+
+        audio_stem = os.path.splitext(filename)[0]
+        yield self._message_event(
+            ctx,
+            f"Audio file {filename} transcribed and saved as {audio_stem}/Transcript.txt. "
+            f"Generating the processing files for audio file {audio_stem}.",
+            state_delta={STATE_AUDIO_FILENAME: audio_stem, STATE_TRANSCRIPT_SOURCE: None},
+        )
+
+        stage_start = time.perf_counter()
+        async for event in self.processing_agent.run_async(ctx):
+            yield event
+        timings[self.processing_agent.name] = round(time.perf_counter() - stage_start, 3)
+
+        report = {
+            "audio_file": filename,
+            "stage_seconds": timings,
+            "total_seconds": round(time.perf_counter() - start, 3),
+            "routing_llm_turns_skipped": ROUTING_LLM_TURNS_SKIPPED,
+        }
+        logging.info(f"Code-driven orchestration report: {report}")
+        yield self._message_event(
+            ctx,
+            f"All processing files for {filename} have been generated in {report['total_seconds']}s "
+            f"(skipped {ROUTING_LLM_TURNS_SKIPPED} routing model turns). Ask me anything about the consultation.",
+            state_delta={"processed_audio_file": filename, "orchestration_report": report},
+        )
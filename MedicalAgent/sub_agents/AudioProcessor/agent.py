@@ -1,20 +1,10 @@
 from google.adk.agents import LlmAgent
-#from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioServerParameters
-from ...utils.custom_adk_patches import CustomMCPToolset as MCPToolset
-from google.adk.tools.mcp_tool.mcp_session_manager import StdioServerParameters
-from pathlib import Path
+from ...utils.custom_adk_patches import shared_mcp_toolset
+from ...utils.transcript_prefetch import record_transcription
 from . import prompt
 
-# IMPORTANT: Dynamically compute the absolute path to your server.py script
-PATH_TO_MCP_SERVER_SCRIPT = str((Path(__file__).parent.parent.parent / "mcp_server" / "server.py").resolve())
-
-# Create MCP toolset
-mcp_toolset = MCPToolset(
-            connection_params=StdioServerParameters(
-                command="python3",
-                args=[PATH_TO_MCP_SERVER_SCRIPT],
-            )
-    )
+# Shared MCP toolset: one server process for the whole agent tree
+mcp_toolset = shared_mcp_toolset()
 
 AudioProcessor = LlmAgent(
     name="AudioProcessor",
@@ -24,5 +14,6 @@ AudioProcessor = LlmAgent(
     if not request the filename from the user.
     Once you have the filename, fetch it's exact location using the get_audio_file tool.
     Then, use the transcribe_audio tool to transcribe the audio file and delegte back to the calling agent.""",
-    tools=[mcp_toolset]  # Add the MCP toolset to the agent
+    tools=[mcp_toolset],  # Add the MCP toolset to the agent
+    after_tool_callback=record_transcription,  # Remember the transcribed file for transcript prefetch
 )
\ No newline at end of file
@@ -0,0 +1,17 @@
+from google.adk.agents import LlmAgent
+from ...utils.custom_adk_patches import shared_mcp_toolset
+from ...utils.context_cache import record_context_cache_usage, use_context_cache
+from .prompt import QA_PROMPT
+
+# Shared MCP toolset: one server process for the whole agent tree
+mcp_toolset = shared_mcp_toolset(tool_filter=["read_processing_files"])
+
+ConsultationQA = LlmAgent(
+    name="ConsultationQA",
+    model="gemini-2.0-flash",
+    description="Answers the user's questions about a processed consultation using its processing files.",
+    instruction=QA_PROMPT,
+    tools=[mcp_toolset],
+    before_model_callback=use_context_cache,  # Serve the shared transcript prefix from the context cache
+    after_model_callback=record_context_cache_usage,
+)
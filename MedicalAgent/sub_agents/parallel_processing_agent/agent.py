@@ -1,14 +1,22 @@
-from google.adk.agents import ParallelAgent
+from google.adk.agents import ParallelAgent, SequentialAgent
+from ...utils.transcript_prefetch import prefetch_transcript
 from .parallel_steps.AssessmentPlanner.agent import AssessmentPlanner
 from .parallel_steps.Critic.agent import Critic
 from .parallel_steps.Summariser.agent import Summariser
 from .parallel_steps.medical_template_agent.agent import medical_template_agent
 
 
+# The summary is written from the populated template, so it runs once the template has been saved
+template_summary_agent = SequentialAgent(
+    name="template_summary_agent",
+    sub_agents=[medical_template_agent, Summariser],
+    description="Populates and validates the medical template, then summarises it.",
+)
 
 parallel_processing_agent = ParallelAgent(
     name="parallel_processing_agent",
-    sub_agents=[medical_template_agent, AssessmentPlanner, Critic, Summariser],
+    sub_agents=[template_summary_agent, AssessmentPlanner, Critic],
     description="This agent orchestrates the parallel processing of medical template generation, assessment plan generation, " \
     "critic feedback generation, and summary generation using specialized sub-agents and ensures all the agents have executed their tasks.",   
+    before_agent_callback=prefetch_transcript,  # Load the transcript into state once for every branch
 )
\ No newline at end of file
@@ -1,23 +1,25 @@
 from google.adk.agents import LlmAgent
-from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioServerParameters
-from pathlib import Path
+from .....utils.custom_adk_patches import shared_mcp_toolset
+from .....utils.context_cache import record_context_cache_usage, use_context_cache
+from .....utils.artifact_manifest import artifact_manifest_callbacks
 from .prompt import PLAN_PROMPT
 
-# IMPORTANT: Dynamically compute the absolute path to your server.py script
-PATH_TO_MCP_SERVER_SCRIPT = str((Path(__file__).parent.parent.parent.parent.parent / "mcp_server" / "server.py").resolve())
+# Shared MCP toolset: one server process for the whole agent tree
+mcp_toolset = shared_mcp_toolset()
 
-# Create MCP toolset
-mcp_toolset = MCPToolset(
-            connection_params=StdioServerParameters(
-                command="python3",
-                args=[PATH_TO_MCP_SERVER_SCRIPT],
-            )
-    )
+MODEL = "gemini-2.0-flash"
+
+# Skip regeneration when the transcript, prompt and model are unchanged since the last run
+skip_if_up_to_date, record_artifact = artifact_manifest_callbacks("AssessmentPlan", PLAN_PROMPT, MODEL)
 
 AssessmentPlanner = LlmAgent(
     name="AssessmentPlanner",
-    model="gemini-2.0-flash", # This agent primarily uses the tool, but its LLM decides when to use it
+    model=MODEL, # This agent primarily uses the tool, but its LLM decides when to use it
     description="Generates the next plan of treatment/ follow-up for the patient",
     instruction= PLAN_PROMPT,  # The prompt that guides the agent's behavior
-    tools=[mcp_toolset]  # Add the MCP toolset to access file operations
+    tools=[mcp_toolset],  # Add the MCP toolset to access file operations
+    before_model_callback=use_context_cache,  # Serve the shared transcript prefix from the context cache
+    after_model_callback=record_context_cache_usage,
+    before_agent_callback=skip_if_up_to_date,
+    after_agent_callback=record_artifact,
 )
\ No newline at end of file
@@ -1,25 +1,27 @@
 from google.adk.agents import LlmAgent
-from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioServerParameters
-from pathlib import Path
+from .....utils.custom_adk_patches import shared_mcp_toolset
+from .....utils.context_cache import record_context_cache_usage, use_context_cache
+from .....utils.artifact_manifest import artifact_manifest_callbacks
 from .prompt import CRITIC_PROMPT
 
-# IMPORTANT: Dynamically compute the absolute path to your server.py script
-PATH_TO_MCP_SERVER_SCRIPT = str((Path(__file__).parent.parent.parent.parent.parent / "mcp_server" / "server.py").resolve())
+# Shared MCP toolset: one server process for the whole agent tree
+mcp_toolset = shared_mcp_toolset()
 
-# Create MCP toolset
-mcp_toolset = MCPToolset(
-            connection_params=StdioServerParameters(
-                command="python3",
-                args=[PATH_TO_MCP_SERVER_SCRIPT],
-            )
-    )
+MODEL = "gemini-2.0-flash"
+
+# Skip regeneration when the transcript, prompt and model are unchanged since the last run
+skip_if_up_to_date, record_artifact = artifact_manifest_callbacks("CriticReview", CRITIC_PROMPT, MODEL)
 
 Critic = LlmAgent(
     name="Critic",
-    model="gemini-2.0-flash", # This agent primarily uses the tool, but its LLM decides when to use it
+    model=MODEL, # This agent primarily uses the tool, but its LLM decides when to use it
     description="Agent that provides the doctor with criticism to improve their patient care capabilities.",
     instruction= CRITIC_PROMPT,  # The prompt that guides the agent's behavior
-    tools=[mcp_toolset]  # Add the MCP toolset to access file operations
+    tools=[mcp_toolset],  # Add the MCP toolset to access file operations
+    before_model_callback=use_context_cache,  # Serve the shared transcript prefix from the context cache
+    after_model_callback=record_context_cache_usage,
+    before_agent_callback=skip_if_up_to_date,
+    after_agent_callback=record_artifact,
     #state_variables=["audio_file_path"],  # The agent will use this variable to access the audio file path
     #{audio_file_path} is a placeholder that will be replaced by the actual audio file path in state.
     #tools=[audio_diarization_tool],  # Register the tool to perform audio diarization and transcription
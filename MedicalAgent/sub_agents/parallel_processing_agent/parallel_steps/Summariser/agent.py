@@ -1,25 +1,29 @@
 from google.adk.agents import LlmAgent
+from .....utils.custom_adk_patches import shared_mcp_toolset
+from .....utils.context_cache import record_context_cache_usage, use_context_cache
+from .....utils.artifact_manifest import artifact_manifest_callbacks
 from . import prompt
-from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioServerParameters
-from pathlib import Path
 
+# Shared MCP toolset: one server process for the whole agent tree
+mcp_toolset = shared_mcp_toolset()
 
-PATH_TO_MCP_SERVER_SCRIPT = str((Path(__file__).parent.parent.parent.parent.parent / "mcp_server" / "server.py").resolve())
+MODEL = "gemini-2.0-flash"
 
-# Create MCP toolset
-mcp_toolset = MCPToolset(
-            connection_params=StdioServerParameters(
-                command="python3",
-                args=[PATH_TO_MCP_SERVER_SCRIPT],
-            )
-    )
+# Skip regeneration when the transcript, template, prompt and model are unchanged since the last run
+skip_if_up_to_date, record_artifact = artifact_manifest_callbacks(
+    "MedicalSummary", prompt.SUMMARY_PROMPT, MODEL, inputs=["Transcript", "MedicalTemplate"]
+)
 
 Summariser = LlmAgent(
     name="Summariser",
-    model="gemini-2.0-flash", # This agent primarily uses the tool, but its LLM decides when to use it
+    model=MODEL, # This agent primarily uses the tool, but its LLM decides when to use it
     description="This agent generates patient summaries from the medical form template.",
     instruction= prompt.SUMMARY_PROMPT,  # The prompt that guides the agent's behavior
     tools = [mcp_toolset],  # The agent will use this variable to access the audio file path
+    before_model_callback=use_context_cache,  # Serve the shared transcript prefix from the context cache
+    after_model_callback=record_context_cache_usage,
+    before_agent_callback=skip_if_up_to_date,
+    after_agent_callback=record_artifact,
     #{audio_file_path} is a placeholder that will be replaced by the actual audio file path in state.
     #tools=[audio_diarization_tool],  # Register the tool to perform audio diarization and transcription
  
@@ -1,39 +1,27 @@
 from google.adk.agents import LlmAgent
-from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioServerParameters
-from pathlib import Path
+from .......utils.custom_adk_patches import shared_mcp_toolset
+from .......utils.context_cache import record_context_cache_usage, use_context_cache
+from .......utils.artifact_manifest import artifact_manifest_callbacks
 from .prompt import MEDICAL_TEMPLATE_PROMPT
 
-def find_mcp_server_path():
-    """Find the mcp-server directory by searching upward from current file."""
-    current_path = Path(__file__).resolve()
-    
-    # Search upward until we find a directory containing 'mcp-server'
-    for parent in current_path.parents:
-        mcp_server_path = parent / "mcp_server" / "server.py"
-        if mcp_server_path.exists():
-            return str(mcp_server_path)
-    
-    raise FileNotFoundError("Could not find mcp_server/server.py")
+# Shared MCP toolset: one server process for the whole agent tree
+mcp_toolset = shared_mcp_toolset()
 
-# IMPORTANT: Dynamically find the absolute path to your server.py script
-PATH_TO_MCP_SERVER_SCRIPT = find_mcp_server_path()
+MODEL = "gemini-2.0-flash"
 
-
-
-# Create MCP toolset
-mcp_toolset = MCPToolset(
-            connection_params=StdioServerParameters(
-                command="python3",
-                args=[PATH_TO_MCP_SERVER_SCRIPT],
-            )
-    )
+# Skip regeneration when the transcript, prompt and model are unchanged since the last run
+skip_if_up_to_date, record_artifact = artifact_manifest_callbacks("MedicalTemplate", MEDICAL_TEMPLATE_PROMPT, MODEL)
 
 MedicalTemplate = LlmAgent(
     name="MedicalTemplate",
-    model="gemini-2.0-flash", # This agent primarily uses the tool, but its LLM decides when to use it
+    model=MODEL, # This agent primarily uses the tool, but its LLM decides when to use it
     description="Agent to fill the medical form template using audio transcript.",
     instruction= MEDICAL_TEMPLATE_PROMPT,  # The prompt that guides the agent's behavior
-    tools=[mcp_toolset]  # Add the MCP toolset to access file operations
+    tools=[mcp_toolset],  # Add the MCP toolset to access file operations
+    before_model_callback=use_context_cache,  # Serve the shared transcript prefix from the context cache
+    after_model_callback=record_context_cache_usage,
+    before_agent_callback=skip_if_up_to_date,
+    after_agent_callback=record_artifact,
     #state_variables=["audio_file_path"],  # The agent will use this variable to access the audio file path
     #{audio_file_path} is a placeholder that will be replaced by the actual audio file path in state.
     #tools=[audio_diarization_tool],  # Register the tool to perform audio diarization and transcription
@@ -98,6 +98,12 @@ MEDICAL_TEMPLATE_PROMPT = '''You are a clinically-aware assistant, whos task is
 
 
 ---
-Fetch the transcript using the read_processing_file tool provided. And then fill out the template above with the information from the transcript.
-Finally, save the completed template using the save_processing_file tool provided as MedicalTemplate.
+Fill out the template above with the information from the transcript below. Only if the transcript is missing below,
+fetch it using the read_processing_file tool provided.
+Finally, save the completed template with a single save_processing_file call as MedicalTemplate, for audio file {audio_filename?}.
+
+---
+### Transcript
+
+{transcript?}
 '''
@@ -1,5 +1,7 @@
-TEMPLATE_VALIDATION_PROMPT = '''You are a strict validation agent. You will have to first fetch transcript and 
-the medical template using the read_processsing_file tool provided:
+TEMPLATE_VALIDATION_PROMPT = '''You are a strict validation agent. The transcript is included at the end of these instructions.
+First fetch the medical template for audio file {audio_filename?} with a single read_processing_files call
+(categories ["MedicalTemplate"], or ["MedicalTemplate", "Transcript"] only if the transcript is missing below).
+Do not make any other tool calls:
 
 1. A **transcript** of a telephone consultation between a **doctor and a patient**, and
 2. A **populated medical template** that was generated using the transcript.
@@ -39,4 +41,9 @@ Correction: [How it should have been written]
 
 If the template is fully accurate, return:
 `No discrepancies found. Template matches the audio.`
+
+---
+### Transcript
+
+{transcript?}
 '''
\ No newline at end of file
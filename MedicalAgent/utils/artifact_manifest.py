@@ -0,0 +1,197 @@
+"""
+Per-consultation artifact manifest for incremental re-processing.
+
+`processing_files/<stem>/manifest.json` records, for each generated artifact
+(MedicalTemplate, AssessmentPlan, CriticReview, MedicalSummary), the hashes of
+the inputs it was generated from (the transcript, plus the template for the
+summary), the hash of the agent's prompt, the model and the timings.
+
+`artifact_manifest_callbacks` returns a before/after agent callback pair for
+the agent that produces an artifact. The before callback skips the agent when
+its recorded inputs, prompt and model are unchanged and the artifact exists.
+The after callback records a new entry once the agent has saved the artifact.
+`skip_with` gates an agent that only checks an artifact (TemplateValidator) on
+the same entry: it is skipped whenever the artifact's producer was skipped.
+Setting the session state key `force_reprocess` disables skipping.
+
+An artifact derived from another one (MedicalSummary from MedicalTemplate) must
+run after its producer, so that the input hashes describe what it read.
+"""
+
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from .transcript_prefetch import STATE_AUDIO_FILENAME
+
+PROCESSING_DIR = Path(__file__).parent.parent / "mcp_server" / "processing_files"
+MANIFEST_FILENAME = "manifest.json"
+STATE_FORCE_REPROCESS = "force_reprocess"
+
+# category -> {"prompt_hash", "model", "inputs"} for every registered artifact agent
+ARTIFACT_FINGERPRINTS: Dict[str, dict] = {}
+
+# (invocation id, category) -> input hashes and start time captured before the agent ran
+_pending: Dict[Tuple[str, str], dict] = {}
+
+# (invocation id, category) of artifacts whose producer was skipped as up to date
+_skipped: Set[Tuple[str, str]] = set()
+
+
+def _sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _file_hash(path: Path) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def manifest_path(audio_filename: str) -> Path:
+    return PROCESSING_DIR / audio_filename / MANIFEST_FILENAME
+
+
+def load_manifest(audio_filename: str) -> dict:
+    """Returns the manifest of a consultation ({} if it has none yet)."""
+    try:
+        with open(manifest_path(audio_filename), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_manifest(audio_filename: str, manifest: dict) -> None:
+    path = manifest_path(audio_filename)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def input_hashes(audio_filename: str, inputs: List[str]) -> Dict[str, Optional[str]]:
+    """Hashes the current input files (e.g. Transcript, MedicalTemplate) of a consultation."""
+    return {name: _file_hash(PROCESSING_DIR / audio_filename / f"{name}.txt") for name in inputs}
+
+
+def is_up_to_date(audio_filename: str, category: str) -> bool:
+    """True when the artifact exists and was generated from the current inputs, prompt and model."""
+    fingerprint = ARTIFACT_FINGERPRINTS.get(category)
+    entry = load_manifest(audio_filename).get(category)
+    if not fingerprint or not entry:
+        return False
+    if not (PROCESSING_DIR / audio_filename / f"{category}.txt").exists():
+        return False
+    current_inputs = input_hashes(audio_filename, fingerprint["inputs"])
+    return (
+        None not in current_inputs.values()
+        and entry.get("inputs") == current_inputs
+        and entry.get("prompt_hash") == fingerprint["prompt_hash"]
+        and entry.get("model") == fingerprint["model"]
+    )
+
+
+def stale_categories(audio_filename: str) -> List[str]:
+    """Returns the registered artifacts that need to be (re)generated."""
+    return [category for category in ARTIFACT_FINGERPRINTS if not is_up_to_date(audio_filename, category)]
+
+
+def artifact_manifest_callbacks(category: str, instruction: str, model: str, inputs: Optional[List[str]] = None):
+    """
+    Builds the before/after agent callbacks for the agent producing `category`.
+
+    Args:
+        category (str): Artifact saved by the agent, e.g. "AssessmentPlan".
+        instruction (str): The agent's prompt template (hashed).
+        model (str): The agent's model name.
+        inputs (list): Processing files the artifact is derived from (default: Transcript).
+
+    Returns:
+        tuple: (before_agent_callback, after_agent_callback)
+    """
+    inputs = inputs or ["Transcript"]
+    ARTIFACT_FINGERPRINTS[category] = {
+        "prompt_hash": _sha256_text(instruction),
+        "model": model,
+        "inputs": inputs,
+    }
+
+    def skip_if_up_to_date(callback_context: CallbackContext) -> Optional[types.Content]:
+        audio_filename = callback_context.state.get(STATE_AUDIO_FILENAME)
+        if not audio_filename:
+            return None
+        if not callback_context.state.get(STATE_FORCE_REPROCESS) and is_up_to_date(audio_filename, category):
+            _skipped.add((callback_context.invocation_id, category))
+            return types.Content(
+                role="model",
+                parts=[types.Part(text=f"{category} for {audio_filename} is up to date; skipped regeneration.")],
+            )
+        _pending[(callback_context.invocation_id, category)] = {
+            "inputs": input_hashes(audio_filename, inputs),
+            "started_at": time.time(),
+        }
+        return None
+
+    def record_artifact(callback_context: CallbackContext) -> Optional[types.Content]:
+        audio_filename = callback_context.state.get(STATE_AUDIO_FILENAME)
+        pending = _pending.pop((callback_context.invocation_id, category), None)
+        if not audio_filename or pending is None:
+            return None
+        artifact_path = PROCESSING_DIR / audio_filename / f"{category}.txt"
+        if not artifact_path.exists() or artifact_path.stat().st_mtime < pending["started_at"]:
+            # The agent did not save its artifact in this run: leave the manifest alone
+            return None
+        if None in pending["inputs"].values():
+            # An input was missing when the agent started: the artifact cannot be up to date
+            return None
+
+        finished_at = time.time()
+        manifest = load_manifest(audio_filename)
+        manifest[category] = {
+            "inputs": pending["inputs"],
+            "prompt_hash": ARTIFACT_FINGERPRINTS[category]["prompt_hash"],
+            "model": model,
+            "artifact_hash": _file_hash(artifact_path),
+            "generated_at": datetime.fromtimestamp(finished_at, timezone.utc).isoformat(),
+            "seconds": round(finished_at - pending["started_at"], 3),
+        }
+        _write_manifest(audio_filename, manifest)
+        return None
+
+    return skip_if_up_to_date, record_artifact
+
+
+def skip_with(category: str, agent_name: str):
+    """
+    Builds a before_agent_callback that skips an agent whenever the producer of
+    `category` was skipped as up to date earlier in the same invocation.
+
+    Args:
+        category (str): Artifact the agent works on, e.g. "MedicalTemplate".
+        agent_name (str): Name reported in the skip message.
+
+    Returns:
+        callable: before_agent_callback
+    """
+
+    def skip_if_producer_skipped(callback_context: CallbackContext) -> Optional[types.Content]:
+        key = (callback_context.invocation_id, category)
+        if key not in _skipped:
+            return None
+        _skipped.discard(key)
+        return types.Content(
+            role="model",
+            parts=[types.Part(text=f"{category} is up to date; skipped {agent_name}.")],
+        )
+
+    return skip_if_producer_skipped
@@ -0,0 +1,280 @@
+"""
+Shared-prefix context caching for the agents' model calls.
+
+Every branch of parallel_processing_agent, and every Q&A turn afterwards, sends
+the same consultation transcript to Gemini. With context caching the
+transcript (plus a shared preamble and the MCP tool declarations) is uploaded
+once per consultation as a cached prefix, and each model call references it
+instead of re-sending it.
+
+The Gemini API does not accept a system instruction or tools alongside a
+cached prefix, so `use_context_cache` (a before_model_callback) rewrites the
+request: the tools move into the cache, and the agent's own instruction, with
+the transcript removed, is sent as the first user turn. Agents with different
+tools therefore get one cache each for the same transcript; they are all
+replaced when the consultation's transcript changes.
+
+Caches belong to a consultation scope kept in session state
+(STATE_CONTEXT_CACHE_SCOPE). Callers that end consultations themselves, like
+the batch runner, seed it with the session id and pass that to end_session.
+
+Backends:
+- "gemini": explicit Gemini context caches, with a TTL and deleted when the
+  consultation ends.
+- "local": in-memory stand-in with the same create/delete semantics and
+  estimated token counts. Used to measure hit rates and token savings
+  offline, e.g. with a fake model backend.
+- "off" (default): requests are left untouched.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from .transcript_prefetch import STATE_AUDIO_FILENAME, STATE_TRANSCRIPT
+
+CONTEXT_CACHE_BACKEND = os.getenv("CONTEXT_CACHE_BACKEND", "off").lower()
+CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("CONTEXT_CACHE_TTL_SECONDS", "900"))
+
+CACHE_PREAMBLE = (
+    "You are part of a team of clinical assistant agents working on one recorded telephone "
+    "consultation between a doctor and a patient. The consultation transcript follows; use it "
+    "as the only source of facts about the consultation."
+)
+
+TRANSCRIPT_PLACEHOLDER = "(The consultation transcript is provided in the cached context above.)"
+
+# Session state key naming the consultation scope the session's caches belong to
+STATE_CONTEXT_CACHE_SCOPE = "context_cache_scope"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (4 characters per token) used by the local stand-in."""
+    return max(1, len(text) // 4)
+
+
+@dataclass
+class CachedPrefix:
+    """A created cache entry for one consultation."""
+
+    name: str
+    token_count: int
+    created_at: float
+
+
+class LocalContextCacheBackend:
+    """In-memory stand-in for Gemini context caches."""
+
+    name = "local"
+
+    def __init__(self):
+        self._entries: Dict[str, dict] = {}
+        self._counter = 0
+
+    async def create(self, model: str, transcript: str, tools) -> CachedPrefix:
+        self._counter += 1
+        name = f"cachedContents/local-{self._counter}"
+        self._entries[name] = {"model": model, "preamble": CACHE_PREAMBLE, "transcript": transcript, "tools": tools}
+        return CachedPrefix(name, estimate_tokens(CACHE_PREAMBLE + transcript), time.time())
+
+    async def delete(self, name: str) -> None:
+        self._entries.pop(name, None)
+
+    def resolve(self, name: str) -> Optional[dict]:
+        """Returns what was cached under `name`, so a fake model can expand the prefix."""
+        return self._entries.get(name)
+
+
+class GeminiContextCacheBackend:
+    """Explicit Gemini context caches created through the genai client."""
+
+    name = "gemini"
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            from google import genai
+
+            self._client = genai.Client()
+        return self._client
+
+    async def create(self, model: str, transcript: str, tools) -> CachedPrefix:
+        cache = await self._get_client().aio.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                system_instruction=CACHE_PREAMBLE,
+                contents=[types.Content(role="user", parts=[types.Part(text=transcript)])],
+                tools=tools or None,
+                ttl=f"{self.ttl_seconds}s",
+                display_name="medical-consultation",
+            ),
+        )
+        token_count = getattr(cache.usage_metadata, "total_token_count", None) or estimate_tokens(transcript)
+        return CachedPrefix(cache.name, token_count, time.time())
+
+    async def delete(self, name: str) -> None:
+        await self._get_client().aio.caches.delete(name=name)
+
+
+class ContextCacheManager:
+    """Creates one cached prefix per consultation and applies it to model requests."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        # Keyed by (scope, audio filename, transcript hash, model, tools fingerprint)
+        self._entries: Dict[tuple, Optional[CachedPrefix]] = {}
+        self._scope_keys: Dict[str, set] = {}
+        self._locks: Dict[tuple, asyncio.Lock] = {}
+        self._stats = {
+            "requests": 0,
+            "hits": 0,
+            "misses": 0,
+            "create_errors": 0,
+            "prefix_tokens_reused": 0,
+            "cached_tokens_reported": 0,
+            "caches_deleted": 0,
+        }
+
+    @staticmethod
+    def _tools_fingerprint(tools) -> str:
+        if not tools:
+            return ""
+        return hashlib.sha256(
+            "".join(tool.model_dump_json(exclude_none=True) for tool in tools).encode("utf-8")
+        ).hexdigest()
+
+    async def _get_or_create(self, key: tuple, model: str, transcript: str, tools) -> Optional[CachedPrefix]:
+        if key in self._entries:
+            return self._entries[key]
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            if key in self._entries:
+                return self._entries[key]
+            # A consultation switched to a new transcript: drop the caches of the
+            # old one. Caches of the same transcript for other tool sets stay.
+            scope = key[0]
+            for old_key in list(self._scope_keys.get(scope, ())):
+                if old_key[1:3] != key[1:3]:
+                    await self._delete(old_key)
+            try:
+                entry = await self.backend.create(model, transcript, tools)
+            except Exception as e:
+                # e.g. prefix below the model's minimum cacheable size: remember and fall back
+                logging.warning(f"Context cache creation failed, sending full prompts: {e}")
+                self._stats["create_errors"] += 1
+                entry = None
+            self._entries[key] = entry
+            self._scope_keys.setdefault(scope, set()).add(key)
+            return entry
+
+    async def _delete(self, key: tuple) -> None:
+        entry = self._entries.pop(key, None)
+        self._locks.pop(key, None)
+        for keys in self._scope_keys.values():
+            keys.discard(key)
+        if entry is not None:
+            try:
+                await self.backend.delete(entry.name)
+                self._stats["caches_deleted"] += 1
+            except Exception as e:
+                logging.warning(f"Could not delete context cache {entry.name}: {e}")
+
+    async def apply(self, callback_context: CallbackContext, llm_request: LlmRequest) -> None:
+        """Points `llm_request` at the consultation's cached prefix when one is available."""
+        transcript = callback_context.state.get(STATE_TRANSCRIPT)
+        if not transcript or llm_request.config is None:
+            return
+        self._stats["requests"] += 1
+
+        scope = callback_context.state.get(STATE_CONTEXT_CACHE_SCOPE)
+        if scope is None:
+            scope = uuid.uuid4().hex
+            callback_context.state[STATE_CONTEXT_CACHE_SCOPE] = scope
+        tools = llm_request.config.tools
+        key = (
+            scope,
+            callback_context.state.get(STATE_AUDIO_FILENAME),
+            hashlib.sha256(transcript.encode("utf-8")).hexdigest(),
+            llm_request.model,
+            self._tools_fingerprint(tools),
+        )
+        is_new = key not in self._entries
+        entry = await self._get_or_create(key, llm_request.model, transcript, tools)
+        if entry is None:
+            return
+        if is_new:
+            self._stats["misses"] += 1
+        else:
+            self._stats["hits"] += 1
+            self._stats["prefix_tokens_reused"] += entry.token_count
+
+        # Cached requests may not carry their own system instruction or tools
+        instruction = (llm_request.config.system_instruction or "").replace(transcript, TRANSCRIPT_PLACEHOLDER)
+        if instruction:
+            llm_request.contents.insert(0, types.Content(role="user", parts=[types.Part(text=instruction)]))
+        llm_request.config.system_instruction = None
+        llm_request.config.tools = None
+        llm_request.config.tool_config = None
+        llm_request.config.cached_content = entry.name
+
+    def record_usage(self, llm_response: LlmResponse) -> None:
+        """Adds the cached token count the model reports to the stats."""
+        usage = getattr(llm_response, "usage_metadata", None)
+        cached = getattr(usage, "cached_content_token_count", None) if usage else None
+        if cached:
+            self._stats["cached_tokens_reported"] += cached
+
+    async def end_session(self, scope: str) -> None:
+        """Deletes every cache created for a consultation scope (STATE_CONTEXT_CACHE_SCOPE)."""
+        for key in list(self._scope_keys.pop(scope, ())):
+            await self._delete(key)
+
+    async def close(self) -> None:
+        """Deletes every cache this process created."""
+        for key in list(self._entries):
+            await self._delete(key)
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["active_caches"] = sum(1 for entry in self._entries.values() if entry is not None)
+        return stats
+
+
+def _create_manager() -> Optional[ContextCacheManager]:
+    if CONTEXT_CACHE_BACKEND == "gemini":
+        return ContextCacheManager(GeminiContextCacheBackend(CONTEXT_CACHE_TTL_SECONDS))
+    if CONTEXT_CACHE_BACKEND == "local":
+        return ContextCacheManager(LocalContextCacheBackend())
+    return None
+
+
+CONTEXT_CACHE = _create_manager()
+
+
+async def use_context_cache(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """before_model_callback: serve the shared transcript prefix from the context cache."""
+    if CONTEXT_CACHE is not None:
+        await CONTEXT_CACHE.apply(callback_context, llm_request)
+    return None
+
+
+def record_context_cache_usage(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+    """after_model_callback: count the cached tokens the model actually reused."""
+    if CONTEXT_CACHE is not None:
+        CONTEXT_CACHE.record_usage(llm_response)
+    return None
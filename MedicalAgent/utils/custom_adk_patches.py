@@ -7,23 +7,155 @@ configurable timeouts for StdioServerParameters connections.
 The google-adk 1.2.0 introduced a hardcoded 5-second timeout for stdio-based
 MCP connections, which can be too short for some legitimate operations like
 Spinach AI transcription and analysis.
+
+It also provides a shared, reference-counted session manager so that every
+sub-agent in the tree talks to one (or a small fixed pool of) MCP server
+process(es) instead of each toolset spawning its own interpreter. Those
+sessions are connected at start-up, pinged while idle, and replaced when
+their server dies; tool calls lost with it are retried when that is safe.
+
+With TRACE_FILE set, the agent tree's spans are exported alongside the MCP
+servers' (see mcp_server/tracing.py): tool calls carry the trace context to
+the server, and ParallelAgent branches keep their own span context.
 """
 
+import asyncio
+import contextvars
+import itertools
+import json
+import os
 import sys
+import time
 from contextlib import AsyncExitStack
 from datetime import timedelta
-from typing import Any, Dict, List, Optional, TextIO, Union
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, List, Optional, TextIO, Tuple, Union
 
+import anyio
+from google.adk.agents import parallel_agent
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.events import Event
+from google.adk.tools.mcp_tool.mcp_tool import MCPTool
 from google.adk.tools.mcp_tool.mcp_session_manager import MCPSessionManager, StdioServerParameters
 from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, SseServerParams, StreamableHTTPServerParams, ToolPredicate
+from mcp import types as mcp_types
 from mcp.client.session import ClientSession
 from mcp.client.sse import sse_client
 from mcp.client.stdio import stdio_client
 from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.exceptions import McpError
+
+from ..mcp_server import tracing
+from ..mcp_server.response_encoding import decode_parts
 
 # Configure your desired timeout for stdio-based MCP connections
 CUSTOM_STDIO_TIMEOUT_SECONDS = 180  # 60 seconds instead of the default 5 seconds
 
+# Number of MCP server processes shared by the whole agent tree
+MCP_SERVER_POOL_SIZE = max(1, int(os.getenv("MCP_SERVER_POOL_SIZE", "1")))
+
+# Connect the shared MCP server(s) as soon as the agents are loaded rather than on the first tool call
+MCP_WARMUP = os.getenv("MCP_WARMUP", "1").lower() not in ("0", "false", "no")
+
+# Seconds between health pings of each MCP session (0 disables them)
+MCP_HEALTH_PING_SECONDS = float(os.getenv("MCP_HEALTH_PING_SECONDS", "30"))
+
+# A server that does not answer a ping within this many seconds is replaced
+MCP_PING_TIMEOUT_SECONDS = float(os.getenv("MCP_PING_TIMEOUT_SECONDS", "5"))
+
+# Tools that are safe to call again when the server died while running them
+MCP_IDEMPOTENT_TOOLS = frozenset(
+    name.strip()
+    for name in os.getenv(
+        "MCP_IDEMPOTENT_TOOLS",
+        "get_audio_file,read_processing_file,read_processing_files,find_processing_files,"
+        "get_processing_file_history,get_transcription_cache_stats,get_gemini_client_stats,"
+        "get_response_encoding_stats",
+    ).split(",")
+    if name.strip()
+)
+
+# How long a replaced server gets to exit before the reconnect stops waiting for it
+MCP_DISCONNECT_TIMEOUT_SECONDS = 5.0
+
+# JSON-RPC error code given to calls still waiting when the connection closes
+CONNECTION_CLOSED = -32000
+
+# Tasks nobody awaits any more, referenced here until they finish
+_BACKGROUND_TASKS = set()
+
+# Absolute path to the MCP server script used by every sub-agent
+PATH_TO_MCP_SERVER_SCRIPT = str((Path(__file__).parent.parent / "mcp_server" / "server.py").resolve())
+
+
+def _is_process_gone(error: BaseException) -> bool:
+    """True for the error (or task group of errors) from terminating an already exited server."""
+    if isinstance(error, ProcessLookupError):
+        return True
+    nested = getattr(error, "exceptions", None)
+    return bool(nested) and all(_is_process_gone(e) for e in nested)
+
+
+class TracingClientSession(ClientSession):
+    """
+    ClientSession that sends the caller's trace context with every tool call.
+
+    The context goes in the request's `_meta`, where the server's
+    call_mcp_tool picks it up as the parent of its own span. Without
+    TRACE_FILE this is a plain ClientSession.
+
+    It also notices when the server goes away: `connected` turns False and
+    calls still waiting for a response fail with CONNECTION_CLOSED at once,
+    instead of hanging until their read timeout.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connected = True
+
+    async def _receive_loop(self) -> None:
+        try:
+            await super()._receive_loop()
+        finally:
+            # The server's output ended (it exited or was killed) or the session is closing
+            self.connected = False
+            for request_id, stream in list(self._response_streams.items()):
+                try:
+                    stream.send_nowait(
+                        mcp_types.JSONRPCError(
+                            jsonrpc="2.0",
+                            id=request_id,
+                            error=mcp_types.ErrorData(code=CONNECTION_CLOSED, message="MCP server connection closed"),
+                        )
+                    )
+                except (anyio.WouldBlock, anyio.ClosedResourceError, anyio.BrokenResourceError):
+                    pass
+
+    async def call_tool(
+        self,
+        name: str,
+        arguments: Optional[Dict[str, Any]] = None,
+        read_timeout_seconds: Optional[timedelta] = None,
+        progress_callback=None,
+    ) -> mcp_types.CallToolResult:
+        if not tracing.tracing_enabled():
+            return await super().call_tool(name, arguments, read_timeout_seconds, progress_callback)
+        # Round trip as the agent sees it; minus the server span, this is the stdio overhead
+        with tracing.span(f"mcp_client {name}", tool=name):
+            return await self.send_request(
+                mcp_types.ClientRequest(
+                    mcp_types.CallToolRequest(
+                        method="tools/call",
+                        params=mcp_types.CallToolRequestParams(
+                            name=name, arguments=arguments, _meta=tracing.inject_context()
+                        ),
+                    )
+                ),
+                mcp_types.CallToolResult,
+                request_read_timeout_seconds=read_timeout_seconds,
+                progress_callback=progress_callback,
+            )
+
 
 class CustomMcpSessionManager(MCPSessionManager):
     """
@@ -32,6 +164,14 @@ class CustomMcpSessionManager(MCPSessionManager):
     This class overrides the create_session method to apply a custom timeout
     for stdio-based MCP connections, addressing the hardcoded 5-second limit
     introduced in google-adk 1.2.0.
+
+    It also keeps its session healthy. The connection lives in its own task
+    (so any task can close or replace it), an idle session is pinged every
+    MCP_HEALTH_PING_SECONDS, and a server that died or stopped answering is
+    replaced by a new one. `call_tool` retries a call that the lost server
+    never received, and one it may have received if the tool is listed in
+    MCP_IDEMPOTENT_TOOLS. Connect, handshake and ping latencies are kept in
+    `stats()`.
     """
 
     def __init__(
@@ -45,16 +185,223 @@ class CustomMcpSessionManager(MCPSessionManager):
         self._errlog = errlog
         self._exit_stack: Optional[AsyncExitStack] = None
         self._session: Optional[ClientSession] = None
+        self._session_lock: Optional[asyncio.Lock] = None
+        # The task holding the current connection open, and the event that ends it
+        self._connection_task: Optional[asyncio.Task] = None
+        self._disconnect_requested: Optional[asyncio.Event] = None
+        self._ping_task: Optional[asyncio.Task] = None
+        # (transport, handshake) seconds of the last connection, set by _create_session
+        self._connect_timings: Tuple[float, float] = (0.0, 0.0)
+        self._stats: Dict[str, Any] = {
+            "connects": 0,
+            "reconnects": 0,
+            "connect_failures": 0,
+            "connect_seconds_total": 0.0,
+            "last_connect_seconds": None,
+            "last_transport_seconds": None,
+            "last_handshake_seconds": None,
+            "pings": 0,
+            "ping_failures": 0,
+            "last_ping_seconds": None,
+            "retried_calls": 0,
+            "lost_calls": 0,
+        }
+
+    def _live_session(self) -> Optional[ClientSession]:
+        session = self._session
+        return session if session is not None and getattr(session, "connected", True) else None
 
     async def create_session(self) -> ClientSession:
         """
         Creates and initializes an MCP client session with custom timeout for StdioServerParameters.
         
+        Concurrent callers (e.g. the ParallelAgent branches) are serialised on a lock
+        so that only one server process is spawned per session manager. A session
+        whose server has gone away is replaced.
+        """
+        session = self._live_session()
+        if session is not None:
+            return session
+
+        if self._session_lock is None:
+            self._session_lock = asyncio.Lock()
+
+        async with self._session_lock:
+            session = self._live_session()
+            if session is not None:
+                return session
+            return await self._connect()
+
+    async def replace_lost_session(self) -> None:
+        """Reconnects if the current session's server is gone; a live session is kept."""
+        if self._session_lock is None:
+            self._session_lock = asyncio.Lock()
+        async with self._session_lock:
+            if self._live_session() is None:
+                await self._connect()
+
+    async def _connect(self) -> ClientSession:
+        """Replaces any previous connection with a new one; the caller holds the session lock."""
+        reconnect = self._connection_task is not None
+        if reconnect:
+            await self._disconnect()
+            self._stats["reconnects"] += 1
+
+        # Spawn and handshake, paid by the warm-up or whichever tool call connects first
+        with tracing.span("mcp_connect", transport=type(self._connection_params).__name__) as current:
+            start = time.perf_counter()
+            ready = asyncio.get_running_loop().create_future()
+            self._disconnect_requested = asyncio.Event()
+            self._connection_task = asyncio.create_task(self._hold_connection(ready, self._disconnect_requested))
+            try:
+                session = await ready
+            except Exception:
+                self._connection_task = None
+                self._stats["connect_failures"] += 1
+                raise
+            connect_seconds = time.perf_counter() - start
+            transport_seconds, handshake_seconds = self._connect_timings
+            tracing.set_attributes(
+                current,
+                reconnect=reconnect,
+                transport_ms=round(transport_seconds * 1000, 1),
+                handshake_ms=round(handshake_seconds * 1000, 1),
+            )
+
+        self._stats["connects"] += 1
+        self._stats["connect_seconds_total"] += connect_seconds
+        self._stats["last_connect_seconds"] = connect_seconds
+        self._stats["last_transport_seconds"] = transport_seconds
+        self._stats["last_handshake_seconds"] = handshake_seconds
+        if MCP_HEALTH_PING_SECONDS > 0:
+            # Outside this connect's span: a reconnect is traced as its own mcp_connect
+            self._ping_task = asyncio.create_task(self._keep_alive(session), context=contextvars.Context())
+        return session
+
+    async def _hold_connection(self, ready: asyncio.Future, disconnect_requested: asyncio.Event) -> None:
+        """
+        Opens the connection and keeps it open until a disconnect is requested.
+
+        The stdio client's task group must be exited by the task that entered
+        it, so the connection is opened and closed here rather than in
+        whichever tool call or health ping happens to connect or replace it.
+        """
+        try:
+            session = await self._create_session()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            return
+        exit_stack = self._exit_stack
+        if not ready.done():
+            ready.set_result(session)
+        try:
+            await disconnect_requested.wait()
+        finally:
+            if self._exit_stack is exit_stack:
+                self._exit_stack = None
+            try:
+                await exit_stack.aclose()
+            except Exception as e:
+                # Terminating a server that already died fails; nothing is left to clean up
+                if not _is_process_gone(e):
+                    # Log the error but don't re-raise to avoid blocking shutdown
+                    print(f"Warning: Error during MCP session cleanup: {e}", file=self._errlog)
+
+    async def _disconnect(self) -> None:
+        """Closes the current connection, if any, and stops its health pings."""
+        if self._ping_task is not None and self._ping_task is not asyncio.current_task():
+            self._ping_task.cancel()
+        self._ping_task = None
+        task, self._connection_task = self._connection_task, None
+        self._session = None
+        if task is None:
+            return
+        self._disconnect_requested.set()
+        try:
+            # A hung server may ignore SIGTERM; don't hold up its replacement
+            await asyncio.wait_for(asyncio.shield(task), MCP_DISCONNECT_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            _BACKGROUND_TASKS.add(task)
+            task.add_done_callback(_BACKGROUND_TASKS.discard)
+            print(
+                f"Warning: MCP server did not stop within {MCP_DISCONNECT_TIMEOUT_SECONDS}s; not waiting for it",
+                file=self._errlog,
+            )
+
+    async def _keep_alive(self, session: ClientSession) -> None:
+        """Pings the session periodically and replaces it once its server is gone or unresponsive."""
+        while True:
+            await asyncio.sleep(MCP_HEALTH_PING_SECONDS)
+            if not getattr(session, "connected", True):
+                reason = "connection closed"
+                break
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(session.send_ping(), MCP_PING_TIMEOUT_SECONDS)
+            except Exception as e:
+                if not getattr(session, "connected", True):
+                    reason = "connection closed"
+                else:
+                    self._stats["ping_failures"] += 1
+                    reason = f"ping failed: {type(e).__name__}: {e}"
+                break
+            self._stats["pings"] += 1
+            self._stats["last_ping_seconds"] = time.perf_counter() - start
+
+        print(f"Warning: MCP server lost ({reason}); reconnecting", file=self._errlog)
+        try:
+            async with self._session_lock:
+                # A tool call may have replaced it already
+                if self._session is session or self._session is None:
+                    await self._connect()
+        except Exception as e:
+            # The next tool call tries again
+            print(f"Warning: MCP reconnect failed: {e}", file=self._errlog)
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> mcp_types.CallToolResult:
+        """
+        Calls a tool, reconnecting and retrying once if the server is lost.
+
+        A call that never reached the server is always retried; one the server
+        may have started on only when the tool is in MCP_IDEMPOTENT_TOOLS.
+        """
+        session = await self.create_session()
+        try:
+            return await session.call_tool(name, arguments=arguments)
+        except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+            # Not sent: the connection was already closed
+            pass
+        except McpError as e:
+            if e.error.code != CONNECTION_CLOSED:
+                raise
+            if name not in MCP_IDEMPOTENT_TOOLS:
+                self._stats["lost_calls"] += 1
+                raise
+        self._stats["retried_calls"] += 1
+        print(f"Warning: MCP server lost during {name}; retrying on a new connection", file=self._errlog)
+        session = await self.create_session()
+        return await session.call_tool(name, arguments=arguments)
+
+    async def warm_up(self) -> None:
+        """Connects now and lists the tools, so the first tool call finds a ready server."""
+        session = await self.create_session()
+        await session.list_tools()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns connection, ping and retry counters and the latest latencies."""
+        stats = {key: round(value, 4) if isinstance(value, float) else value for key, value in self._stats.items()}
+        stats["connected"] = self._live_session() is not None
+        stats["mean_connect_seconds"] = (
+            round(self._stats["connect_seconds_total"] / self._stats["connects"], 4) if self._stats["connects"] else None
+        )
+        return stats
+
+    async def _create_session(self) -> ClientSession:
+        """
         This is a complete copy of the original ADK create_session logic from 
         google-adk version 1.2.0, with only the timeout modification for StdioServerParameters.
         """
-        if self._session is not None:
-            return self._session
 
         # Create a new exit stack for this session
         self._exit_stack = AsyncExitStack()
@@ -88,13 +435,15 @@ class CustomMcpSessionManager(MCPSessionManager):
                     f' {self._connection_params}'
                 )
 
+            start = time.perf_counter()
             transports = await self._exit_stack.enter_async_context(client)
+            transport_seconds = time.perf_counter() - start
             
             # HERE IS THE CUSTOM TIMEOUT LOGIC:
             if isinstance(self._connection_params, StdioServerParameters):
                 print(f"CUSTOM_ADK: Applying custom timeout for StdioServerParameters: {CUSTOM_STDIO_TIMEOUT_SECONDS}s")
                 session = await self._exit_stack.enter_async_context(
-                    ClientSession(
+                    TracingClientSession(
                         *transports[:2],
                         read_timeout_seconds=timedelta(seconds=CUSTOM_STDIO_TIMEOUT_SECONDS),
                     )
@@ -102,10 +451,12 @@ class CustomMcpSessionManager(MCPSessionManager):
             else:
                 # Original logic for other connection types
                 session = await self._exit_stack.enter_async_context(
-                    ClientSession(*transports[:2])
+                    TracingClientSession(*transports[:2])
                 )
             
+            start = time.perf_counter()
             await session.initialize()
+            self._connect_timings = (transport_seconds, time.perf_counter() - start)
             self._session = session
             return session
 
@@ -118,17 +469,203 @@ class CustomMcpSessionManager(MCPSessionManager):
 
     async def close(self):
         """Closes the session and cleans up resources."""
-        if self._exit_stack:
-            try:
-                await self._exit_stack.aclose()
-            except Exception as e:
-                # Log the error but don't re-raise to avoid blocking shutdown
-                print(
-                    f'Warning: Error during MCP session cleanup: {e}', file=self._errlog
-                )
-            finally:
-                self._exit_stack = None
-                self._session = None
+        try:
+            await self._disconnect()
+        except Exception as e:
+            # Log the error but don't re-raise to avoid blocking shutdown
+            print(
+                f'Warning: Error during MCP session cleanup: {e}', file=self._errlog
+            )
+
+
+class PooledMcpSessionManager:
+    """
+    Session manager that spreads tool calls over a small fixed pool of MCP sessions.
+
+    Each pool slot is a CustomMcpSessionManager owning one server process. MCP
+    client sessions multiplex concurrent requests by request id, so a single
+    slot is enough for most workloads; a larger pool only helps when one slow
+    tool (e.g. transcription) would otherwise occupy the only server.
+    """
+
+    def __init__(
+        self,
+        connection_params: Union[StdioServerParameters, SseServerParams, StreamableHTTPServerParams],
+        pool_size: int = 1,
+        errlog: TextIO = sys.stderr,
+    ):
+        self._connection_params = connection_params
+        self._errlog = errlog
+        self._managers = [
+            CustomMcpSessionManager(connection_params, errlog=errlog)
+            for _ in range(max(1, pool_size))
+        ]
+        self._next_slot = itertools.cycle(range(len(self._managers)))
+        self._warm_up_task: Optional[asyncio.Task] = None
+
+    @property
+    def _session(self) -> Optional[ClientSession]:
+        """Returns the first live session, for compatibility with MCPToolset."""
+        for manager in self._managers:
+            session = manager._live_session()
+            if session is not None:
+                return session
+        return None
+
+    async def create_session(self) -> ClientSession:
+        """Returns a session from the next pool slot, connecting it if needed."""
+        return await self._managers[next(self._next_slot)].create_session()
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> mcp_types.CallToolResult:
+        """Calls a tool on the next pool slot (see CustomMcpSessionManager.call_tool)."""
+        return await self._managers[next(self._next_slot)].call_tool(name, arguments)
+
+    async def replace_lost_session(self) -> None:
+        """Reconnects the slots whose server is gone; live slots keep their sessions."""
+        await asyncio.gather(*(manager.replace_lost_session() for manager in self._managers))
+
+    async def warm_up(self) -> None:
+        """Connects every slot concurrently."""
+        await asyncio.gather(*(manager.warm_up() for manager in self._managers))
+
+    def start_warm_up(self) -> None:
+        """Starts warm_up in the background; needs a running event loop."""
+        if self._warm_up_task is None or self._warm_up_task.done():
+            self._warm_up_task = asyncio.get_running_loop().create_task(self._warm_up_in_background())
+
+    async def _warm_up_in_background(self) -> None:
+        try:
+            await self.warm_up()
+        except Exception as e:
+            # The first tool call connects instead
+            print(f"Warning: MCP warm-up failed: {e}", file=self._errlog)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Returns the stats of every pool slot."""
+        return [manager.stats() for manager in self._managers]
+
+    async def close(self):
+        """Closes every session in the pool."""
+        if self._warm_up_task is not None and not self._warm_up_task.done():
+            self._warm_up_task.cancel()
+        self._warm_up_task = None
+        for manager in self._managers:
+            await manager.close()
+
+
+def tool_response_payload(response: Any) -> Dict[str, Any]:
+    """
+    Extracts the JSON payload from an MCP CallToolResult returned by an MCP tool.
+
+    Our MCP server answers every tool call with a JSON object in the first
+    TextContent block. In compact mode (MCP_RESPONSE_MODE=compact) file bodies
+    follow as raw TextContent parts, referenced from the JSON by "content_part".
+    """
+    if isinstance(response, dict):
+        return response
+    texts = [getattr(part, "text", None) or "" for part in getattr(response, "content", None) or []]
+    if not texts or not texts[0]:
+        return {"success": False, "message": "Empty tool response"}
+    try:
+        return decode_parts(texts)
+    except json.JSONDecodeError:
+        return {"success": False, "message": texts[0]}
+
+
+# Shared session managers keyed by connection parameters: key -> [manager, refcount]
+_SHARED_SESSION_MANAGERS: Dict[str, List[Any]] = {}
+
+
+def _connection_key(
+    connection_params: Union[StdioServerParameters, SseServerParams, StreamableHTTPServerParams],
+) -> str:
+    """Builds a stable registry key from the connection parameters."""
+    # The forwarded environment is left out: toolsets created at different
+    # import times must still share one server
+    return f"{type(connection_params).__name__}:{connection_params.model_dump_json(exclude={'env'})}"
+
+
+def acquire_session_manager(
+    connection_params: Union[StdioServerParameters, SseServerParams, StreamableHTTPServerParams],
+    pool_size: int = MCP_SERVER_POOL_SIZE,
+    errlog: TextIO = sys.stderr,
+) -> PooledMcpSessionManager:
+    """
+    Returns the shared session manager for these connection parameters.
+
+    Every call increments the reference count; pair it with release_session_manager.
+    """
+    key = _connection_key(connection_params)
+    entry = _SHARED_SESSION_MANAGERS.get(key)
+    if entry is None:
+        entry = [PooledMcpSessionManager(connection_params, pool_size=pool_size, errlog=errlog), 0]
+        _SHARED_SESSION_MANAGERS[key] = entry
+        if MCP_WARMUP and _has_running_loop():
+            # Agents loaded by a running app (e.g. adk web) connect right away
+            entry[0].start_warm_up()
+    entry[1] += 1
+    return entry[0]
+
+
+async def release_session_manager(manager: PooledMcpSessionManager) -> None:
+    """Drops one reference and closes the server process(es) when none remain."""
+    for key, entry in list(_SHARED_SESSION_MANAGERS.items()):
+        if entry[0] is manager:
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del _SHARED_SESSION_MANAGERS[key]
+                await manager.close()
+            return
+
+
+def shared_session_stats() -> List[Tuple[str, int]]:
+    """Returns (connection key, reference count) for every shared session manager."""
+    return [(key, entry[1]) for key, entry in _SHARED_SESSION_MANAGERS.items()]
+
+
+def mcp_session_stats() -> List[Dict[str, Any]]:
+    """Returns connect/handshake latencies, pings and retries of every shared MCP session."""
+    return [
+        {"connection": key, "references": entry[1], "slots": entry[0].stats()}
+        for key, entry in _SHARED_SESSION_MANAGERS.items()
+    ]
+
+
+def _has_running_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def warm_up_shared_sessions() -> None:
+    """
+    Starts connecting every shared MCP session in the background.
+
+    Call it when an app starts its event loop (the batch CLI, the job
+    service), so the spawn and handshake overlap with the first model call
+    instead of delaying the first tool call. Toolsets created while a loop
+    is already running warm up on their own. A no-op with MCP_WARMUP=0.
+    """
+    if not MCP_WARMUP:
+        return
+    for manager, _ in _SHARED_SESSION_MANAGERS.values():
+        manager.start_warm_up()
+
+
+class ReconnectingMCPTool(MCPTool):
+    """
+    MCPTool that calls through the session manager's call_tool.
+
+    ADK's MCPTool closes the whole session manager and reconnects when a call
+    hits a closed connection, and has no answer for a server that dies while
+    the call is running. Here the manager replaces only the lost session and
+    retries the call when that is safe.
+    """
+
+    async def run_async(self, *, args, tool_context):
+        return await self._mcp_session_manager.call_tool(self.name, arguments=args)
 
 
 class CustomMCPToolset(MCPToolset):
@@ -144,6 +681,7 @@ class CustomMCPToolset(MCPToolset):
         connection_params: Union[StdioServerParameters, SseServerParams, StreamableHTTPServerParams],
         tool_filter: Union[ToolPredicate, List[str], None] = None,
         errlog: TextIO = sys.stderr,
+        shared: bool = False,
     ):
         """
         Initialize Custom MCPToolset with CustomMcpSessionManager.
@@ -152,14 +690,23 @@ class CustomMCPToolset(MCPToolset):
             connection_params: Parameters for the MCP connection
             tool_filter: Optional filter to select specific tools
             errlog: TextIO stream for error logging
+            shared: Reuse the reference-counted session manager (and server
+                process) of every other shared toolset with the same parameters
         """
         # Call BaseToolset's __init__ directly, bypassing MCPToolset's __init__
         # This prevents the original MCPToolset from creating the default MCPSessionManager
         super(MCPToolset, self).__init__(tool_filter=tool_filter)
 
+        self._connection_params = connection_params
+        self._errlog = errlog
+        self._shared = shared
+
         # Use our custom session manager instead of the default one
         # Note: ADK expects this to be named '_mcp_session_manager', not '_session_manager'
-        self._mcp_session_manager = CustomMcpSessionManager(connection_params, errlog=errlog)
+        if shared:
+            self._mcp_session_manager = acquire_session_manager(connection_params, errlog=errlog)
+        else:
+            self._mcp_session_manager = CustomMcpSessionManager(connection_params, errlog=errlog)
 
         # Initialize ALL instance variables as in the original MCPToolset
         self._tool_configs_by_name: Dict[str, Any] = {}
@@ -167,14 +714,116 @@ class CustomMCPToolset(MCPToolset):
         self._closed = False
         self._session: Optional[ClientSession] = None  # Normal attribute, not property
 
+    async def get_tools(self, readonly_context: Optional[ReadonlyContext] = None) -> List[MCPTool]:
+        """Returns the server's tools as ReconnectingMCPTools."""
+        tools = await super().get_tools(readonly_context)
+        return [
+            ReconnectingMCPTool(mcp_tool=tool._mcp_tool, mcp_session_manager=self._mcp_session_manager)
+            for tool in tools
+        ]
+
+    async def _reinitialize_session(self) -> None:
+        """
+        Called by ADK's get_tools retry when the session it used was closed.
+
+        ADK's version closes the whole session manager, which for a shared
+        toolset is every agent's pool. Only the lost connections are replaced.
+        """
+        await self._mcp_session_manager.replace_lost_session()
+
     @property  
     def _session(self):
-        """Getter for _session - returns the session from the session manager."""
-        return getattr(self._mcp_session_manager, "_session", None)
+        """Getter for _session - returns the live session from the session manager."""
+        session = getattr(self._mcp_session_manager, "_session", None)
+        return session if session is not None and getattr(session, "connected", True) else None
     
     @_session.setter
     def _session(self, value):
         """Setter for _session - this is needed for ADK compatibility but we ignore it since the session manager handles this."""
         # The ADK tries to set this, but we let the session manager handle it
         # We don't actually need to store it here since we get it from the session manager
-        pass
\ No newline at end of file
+        pass
+
+    async def close(self) -> None:
+        """Closes the toolset; shared toolsets only drop their reference."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if self._shared:
+                await release_session_manager(self._mcp_session_manager)
+            else:
+                await self._mcp_session_manager.close()
+        except Exception as e:
+            # Log the error but don't re-raise to avoid blocking shutdown
+            print(f"Warning: Error during MCPToolset cleanup: {e}", file=self._errlog)
+
+
+def mcp_server_params() -> StdioServerParameters:
+    """Connection parameters of the MedicalAgent MCP server."""
+    return StdioServerParameters(
+        command="python3",
+        args=[PATH_TO_MCP_SERVER_SCRIPT],
+        # Without this the MCP client only passes HOME/PATH/..., so server
+        # settings exported in the shell (not in .env) would never arrive
+        env=dict(os.environ),
+    )
+
+
+def shared_mcp_toolset(tool_filter: Union[ToolPredicate, List[str], None] = None) -> CustomMCPToolset:
+    """
+    Returns a toolset backed by the shared MedicalAgent MCP server process.
+
+    Args:
+        tool_filter: Optional filter to select specific tools
+
+    Returns:
+        CustomMCPToolset: A toolset sharing its session(s) with every other sub-agent
+    """
+    return CustomMCPToolset(
+        connection_params=mcp_server_params(),
+        tool_filter=tool_filter,
+        shared=True,
+    )
+
+
+async def _merge_agent_run_in_branch_contexts(agent_runs: List[Any]) -> AsyncGenerator[Event, None]:
+    """
+    Copy of ParallelAgent's event merge from google-adk 1.2.0, with one context per branch.
+
+    The original starts each step of a branch in a new task with a fresh copy
+    of the parent's context, so the branch's `agent_run` span is current only
+    for its first step and its later model and tool calls are traced as
+    children of parallel_processing_agent. Here every step of a branch runs
+    in that branch's own context.
+    """
+    contexts = [contextvars.copy_context() for _ in agent_runs]
+    tasks = [
+        asyncio.create_task(agent_run.__anext__(), context=context)
+        for agent_run, context in zip(agent_runs, contexts)
+    ]
+    pending_tasks = set(tasks)
+
+    while pending_tasks:
+        done, pending_tasks = await asyncio.wait(pending_tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            try:
+                yield task.result()
+
+                # Move the branch that produced this event on, in its own context
+                index = tasks.index(task)
+                tasks[index] = asyncio.create_task(agent_runs[index].__anext__(), context=contexts[index])
+                pending_tasks.add(tasks[index])
+            except StopAsyncIteration:
+                continue
+
+
+def configure_agent_tracing() -> bool:
+    """Exports the agent tree's spans to TRACE_FILE; returns True when tracing is on."""
+    if not tracing.configure_tracing("agents"):
+        return False
+    parallel_agent._merge_agent_run = _merge_agent_run_in_branch_contexts
+    return True
+
+
+configure_agent_tracing()
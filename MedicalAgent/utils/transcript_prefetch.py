@@ -0,0 +1,68 @@
+"""
+Prefetches the consultation transcript into ADK session state.
+
+Every branch of parallel_processing_agent needs the transcript. Without
+prefetching, each branch spends a model turn and an MCP round trip on
+read_processing_file('Transcript', ...). These callbacks load it once:
+
+- `record_transcription` (after_tool_callback on the transcribing agent)
+  stores the audio filename in state once transcribe_audio_file succeeds.
+- `prefetch_transcript` (before_agent_callback on parallel_processing_agent)
+  reads the transcript through the shared MCP server and stores it in state.
+
+The branch prompts template `{transcript?}` and `{audio_filename?}` directly,
+so each agent can write its artifact in its first model call.
+"""
+
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+from .custom_adk_patches import shared_mcp_toolset, tool_response_payload
+
+# State keys shared with the prompts (templated as {transcript?} / {audio_filename?})
+STATE_AUDIO_FILENAME = "audio_filename"
+STATE_TRANSCRIPT = "transcript"
+STATE_TRANSCRIPT_SOURCE = "transcript_audio_filename"
+
+_read_toolset = shared_mcp_toolset(tool_filter=["read_processing_file"])
+
+
+def record_transcription(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext, tool_response: Any) -> Optional[dict]:
+    """Remembers which audio file was transcribed so the transcript can be prefetched."""
+    if tool.name != "transcribe_audio_file":
+        return None
+    payload = tool_response_payload(tool_response)
+    if payload.get("success") and args.get("audio_file_path"):
+        tool_context.state[STATE_AUDIO_FILENAME] = Path(args["audio_file_path"]).stem
+        # A fresh transcription invalidates any transcript already in state
+        tool_context.state[STATE_TRANSCRIPT_SOURCE] = None
+    return None
+
+
+async def prefetch_transcript(callback_context: CallbackContext) -> None:
+    """Loads the transcript for the current audio file into session state (once per file)."""
+    audio_filename = callback_context.state.get(STATE_AUDIO_FILENAME)
+    if not audio_filename or callback_context.state.get(STATE_TRANSCRIPT_SOURCE) == audio_filename:
+        return None
+
+    try:
+        tools = await _read_toolset.get_tools()
+        response = await tools[0].run_async(
+            args={"file_category": "Transcript", "audio_filename": audio_filename},
+            tool_context=None,
+        )
+        payload = tool_response_payload(response)
+    except Exception as e:
+        # The branches can still fetch the transcript themselves
+        logging.warning(f"Transcript prefetch for {audio_filename} failed: {e}")
+        return None
+
+    if payload.get("success"):
+        callback_context.state[STATE_TRANSCRIPT] = payload.get("content", "")
+        callback_context.state[STATE_TRANSCRIPT_SOURCE] = audio_filename
+    return None
@@ -0,0 +1,147 @@
+"""
+Shared, connection-pooled HTTP client for the Streamlit front end.
+
+One `ApiClient` per backend (the ADK API server, the job service) is kept
+for the life of the Streamlit process, so every chat message reuses a
+keep-alive connection instead of opening a new one. Every call has connect
+and read timeouts. Idempotent calls (GET/HEAD/PUT/DELETE/OPTIONS) are
+retried a bounded number of times, with backoff, on connection errors and on
+429/502/503/504; non-idempotent calls (e.g. /run_sse) are only retried when
+the connection could not be made at all, so a message is never sent twice.
+Latency, errors and retries are recorded per endpoint.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "PUT", "DELETE", "OPTIONS"])
+RETRY_STATUSES = (429, 502, 503, 504)
+MAX_LATENCY_SAMPLES = 500
+
+
+def _percentile(samples: List[float], fraction: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class EndpointMetrics:
+    """Thread-safe per-endpoint call counts and latencies (time to response headers)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, dict] = {}
+
+    def record(self, endpoint: str, seconds: float, ok: bool, retries: int) -> None:
+        with self._lock:
+            entry = self._endpoints.setdefault(endpoint, {"calls": 0, "errors": 0, "retries": 0, "samples": []})
+            entry["calls"] += 1
+            entry["errors"] += 0 if ok else 1
+            entry["retries"] += retries
+            entry["samples"].append(seconds)
+            if len(entry["samples"]) > MAX_LATENCY_SAMPLES:
+                del entry["samples"][0]
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            endpoints = {name: dict(entry, samples=list(entry["samples"])) for name, entry in self._endpoints.items()}
+        report = {}
+        for name, entry in endpoints.items():
+            samples = entry.pop("samples")
+            entry["mean_seconds"] = round(sum(samples) / len(samples), 4) if samples else None
+            entry["p50_seconds"] = round(_percentile(samples, 0.5), 4) if samples else None
+            entry["p95_seconds"] = round(_percentile(samples, 0.95), 4) if samples else None
+            report[name] = entry
+        return report
+
+
+class ApiClient:
+    """Pooled keep-alive session with timeouts, bounded retries and per-endpoint metrics."""
+
+    def __init__(
+        self,
+        base_url: str,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        max_retries: int = 3,
+        backoff_factor: float = 0.3,
+        pool_size: int = 10,
+    ):
+        """
+        Args:
+            base_url (str): Server root, e.g. "http://127.0.0.1:8000".
+            connect_timeout (float): Seconds to wait for a TCP connection.
+            read_timeout (float): Seconds to wait between bytes of the response.
+            max_retries (int): Retries for idempotent calls (and for failed connects).
+            backoff_factor (float): Exponential backoff base between retries.
+            pool_size (int): Keep-alive connections kept per host.
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.metrics = EndpointMetrics()
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            # Read and status retries only apply to these; connect errors are always safe to retry
+            allowed_methods=IDEMPOTENT_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @staticmethod
+    def _retries(response: Optional[requests.Response]) -> int:
+        retries = getattr(getattr(response, "raw", None), "retries", None)
+        return len(retries.history) if retries is not None else 0
+
+    def request(self, method: str, path: str, endpoint: Optional[str] = None, timeout=None, **kwargs) -> requests.Response:
+        """
+        Sends a request and records its latency under `endpoint` (default "METHOD path").
+
+        Raises:
+            requests.RequestException: On connection errors or timeouts, after retries.
+        """
+        endpoint = endpoint or f"{method.upper()} {path}"
+        start = time.perf_counter()
+        response = None
+        try:
+            response = self.session.request(
+                method, f"{self.base_url}{path}", timeout=timeout or self.timeout, **kwargs
+            )
+            return response
+        finally:
+            ok = response is not None and response.status_code < 400
+            self.metrics.record(endpoint, time.perf_counter() - start, ok, self._retries(response))
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    @contextmanager
+    def stream(self, method: str, path: str, **kwargs):
+        """Like `request` with stream=True; the latency recorded is the time to the response headers."""
+        response = self.request(method, path, stream=True, **kwargs)
+        try:
+            yield response
+        finally:
+            response.close()
+
+    def close(self) -> None:
+        self.session.close()
@@ -0,0 +1,244 @@
+"""
+Deterministic fake Gemini backend for offline benchmarks.
+
+Two halves share one `FakeModelBackend` (latency and token model, call log):
+
+- `FakeGeminiLlm` is an ADK `BaseLlm` that replaces the model of every
+  LlmAgent in the real agent tree (`install_fake_models`). Each agent follows
+  a fixed script of tool calls (real MCP tools, real transfers), followed by a
+  final text reply. Which step comes next is decided by how many of the
+  agent's own function responses are already in the request, so a run is the
+  same every time.
+- `FakeGeminiServer` is an HTTP stand-in for the generateContent endpoint.
+  The MCP server's transcription calls reach it through GEMINI_BASE_URL and
+  get a canned transcript back.
+
+Latency per call is `latency_seconds + output_tokens * seconds_per_output_token`.
+Token counts are estimated from the text (4 characters per token), unless
+`output_tokens` fixes them.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import AsyncGenerator, Callable, Dict, List, Optional
+
+from google.adk.agents import LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+@dataclass
+class ModelCall:
+    """One fake model call, timed on the benchmark's perf_counter clock."""
+
+    agent: str
+    start: float
+    end: float
+    prompt_tokens: int
+    output_tokens: int
+    action: str  # tool name, "transfer_to_agent:<agent>" or "text"
+
+
+@dataclass
+class FakeModelBackend:
+    """Latency and token model shared by the in-process and HTTP fakes."""
+
+    latency_seconds: float = 0.2
+    seconds_per_output_token: float = 0.0
+    output_tokens: Optional[int] = None
+    calls: List[ModelCall] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def output_token_count(self, text: str) -> int:
+        return self.output_tokens if self.output_tokens is not None else estimate_tokens(text)
+
+    def delay_for(self, output_tokens: int) -> float:
+        return self.latency_seconds + output_tokens * self.seconds_per_output_token
+
+    def record(self, call: ModelCall) -> None:
+        with self._lock:
+            self.calls.append(call)
+
+
+# A script step returns (function name, args) for a tool call, or None to reply with text
+ScriptStep = Callable[[LlmRequest], Optional[tuple]]
+
+
+def call(name: str, **args) -> ScriptStep:
+    return lambda llm_request: (name, args)
+
+
+def transfer(agent_name: str) -> ScriptStep:
+    return call("transfer_to_agent", agent_name=agent_name)
+
+
+class FakeGeminiLlm(BaseLlm):
+    """Scripted stand-in for one agent's model."""
+
+    agent_name: str
+    script: List[ScriptStep]
+    final_text: str
+    backend: FakeModelBackend
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @staticmethod
+    def _own_function_responses(llm_request: LlmRequest) -> int:
+        # Other agents' events reach the request as plain "For context:" text,
+        # so the function responses left are this agent's own
+        return sum(
+            1
+            for content in llm_request.contents
+            for part in content.parts or []
+            if part.function_response is not None
+        )
+
+    @staticmethod
+    def _prompt_text(llm_request: LlmRequest) -> str:
+        texts = [str(llm_request.config.system_instruction or "")] if llm_request.config else []
+        for content in llm_request.contents:
+            for part in content.parts or []:
+                if part.text:
+                    texts.append(part.text)
+                elif part.function_response is not None:
+                    texts.append(str(part.function_response.response))
+        return "\n".join(texts)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        start = time.perf_counter()
+        step = self._own_function_responses(llm_request)
+        action = self.script[step](llm_request) if step < len(self.script) else None
+
+        if action is None:
+            part, action_name, output_text = types.Part(text=self.final_text), "text", self.final_text
+        else:
+            name, args = action
+            part = types.Part(function_call=types.FunctionCall(name=name, args=args))
+            action_name = f"{name}:{args['agent_name']}" if name == "transfer_to_agent" else name
+            output_text = json.dumps(args)
+
+        prompt_tokens = estimate_tokens(self._prompt_text(llm_request))
+        output_tokens = self.backend.output_token_count(output_text)
+        await asyncio.sleep(self.backend.delay_for(output_tokens))
+        self.backend.record(
+            ModelCall(self.agent_name, start, time.perf_counter(), prompt_tokens, output_tokens, action_name)
+        )
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[part]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=output_tokens,
+                total_token_count=prompt_tokens + output_tokens,
+            ),
+        )
+
+
+def _walk(agent):
+    yield agent
+    for sub_agent in agent.sub_agents:
+        yield from _walk(sub_agent)
+    for attribute in ("processing_agent", "qa_agent"):
+        # PipelineOrchestrator keeps its agents as fields as well as sub_agents
+        child = getattr(agent, attribute, None)
+        if child is not None and child not in agent.sub_agents:
+            yield from _walk(child)
+
+
+def install_fake_models(root_agent, scripts: Dict[str, List[ScriptStep]], backend: FakeModelBackend) -> List[str]:
+    """
+    Replaces the model of every LlmAgent in the tree with a scripted fake.
+
+    Args:
+        root_agent: The real root agent.
+        scripts: Tool-call steps per agent name; agents without a script reply with text at once.
+        backend: Shared latency/token model and call log.
+
+    Returns:
+        list: Names of the agents whose model was replaced.
+    """
+    replaced = []
+    for agent in _walk(root_agent):
+        if isinstance(agent, LlmAgent) and agent.name not in replaced:
+            agent.model = FakeGeminiLlm(
+                model=agent.model if isinstance(agent.model, str) else "gemini-2.0-flash",
+                agent_name=agent.name,
+                script=scripts.get(agent.name, []),
+                final_text=f"{agent.name} finished.",
+                backend=backend,
+            )
+            replaced.append(agent.name)
+    return replaced
+
+
+class FakeGeminiServer(ThreadingHTTPServer):
+    """Answers generateContent requests (the MCP server's transcription calls) with a canned transcript."""
+
+    daemon_threads = True
+
+    def __init__(self, transcript: str, backend: FakeModelBackend):
+        super().__init__(("127.0.0.1", 0), _FakeGeminiHandler)
+        self.transcript = transcript
+        self.backend = backend
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "FakeGeminiServer":
+        threading.Thread(target=self.serve_forever, name="fake-gemini", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class _FakeGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def do_POST(self):
+        start = time.perf_counter()
+        request_bytes = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        backend = self.server.backend
+        output_tokens = backend.output_token_count(self.server.transcript)
+        # Only the text parts count; inline audio is base64 and would dwarf them
+        request = json.loads(request_bytes or b"{}")
+        prompt_text = "".join(
+            part.get("text", "") for content in request.get("contents", []) for part in content.get("parts", [])
+        )
+        prompt_tokens = estimate_tokens(prompt_text)
+        time.sleep(backend.delay_for(output_tokens))
+        body = json.dumps({
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": self.server.transcript}]},
+                "finishReason": "STOP",
+            }],
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": output_tokens,
+                "totalTokenCount": prompt_tokens + output_tokens,
+            },
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        backend.record(ModelCall("mcp_server:transcription", start, time.perf_counter(), prompt_tokens, output_tokens, "text"))
+
+    def log_message(self, *args):
+        pass
@@ -0,0 +1,188 @@
+"""
+Load test: the Streamlit front end's HTTP calls against a local ADK API stub.
+
+Starts a stand-in for the ADK API server (HTTP/1.1 with keep-alive) that
+implements session creation, GET /list-apps and a short /run_sse event stream,
+optionally answering a fraction of GET requests with 503. Several concurrent
+simulated users then create a session, list apps and stream a run, first with
+bare `requests` calls (the previous front end) and then through the pooled
+ApiClient. The report compares TCP connections opened, wall time, errors,
+retries and per-endpoint latency.
+
+Usage:
+    python benchmarks/frontend_client_load.py [--users 8] [--rounds 10] [--latency-ms 5] [--fail-rate 0.1]
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api_client import ApiClient, EndpointMetrics  # noqa: E402
+
+SSE_EVENTS = [
+    {"author": "medical_template_agent", "partial": True, "content": {"role": "model", "parts": [{"text": "Working"}]}},
+    {"author": "medical_template_agent", "partial": True, "content": {"role": "model", "parts": [{"text": " on it."}]}},
+    {"author": "medical_template_agent", "content": {"role": "model", "parts": [{"text": "Working on it."}]}},
+]
+SSE_BODY = "".join(f"data: {json.dumps(event)}\n\n" for event in SSE_EVENTS).encode("utf-8")
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_seconds: float, fail_rate: float):
+        super().__init__(address, StubHandler)
+        self.latency_seconds = latency_seconds
+        self.fail_rate = fail_rate
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Minimal ADK API stand-in."""
+
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment, as a real server would; otherwise
+    # Nagle + delayed ACK add ~40 ms to every keep-alive response
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def do_GET(self):
+        time.sleep(self.server.latency_seconds)
+        if self.path == "/list-apps":
+            if random.random() < self.server.fail_rate:
+                self._send(503, b'{"error": "busy"}')
+            else:
+                self._send(200, b'["MedicalAgent"]')
+        else:
+            self._send(404, b"{}")
+
+    def do_POST(self):
+        self._read_body()
+        time.sleep(self.server.latency_seconds)
+        if self.path.startswith("/apps/") and "/sessions/" in self.path:
+            self._send(200, b"{}")
+        elif self.path == "/run_sse":
+            self._send(200, SSE_BODY, content_type="text/event-stream")
+        else:
+            self._send(404, b"{}")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def consume_stream(response) -> int:
+    return sum(1 for line in response.iter_lines(decode_unicode=True) if line and line.startswith("data:"))
+
+
+def bare_round(base_url: str, metrics: EndpointMetrics, user: int, round_index: int) -> None:
+    """The previous front end: a new connection per call, no timeouts, no retries."""
+    calls = [
+        ("create_session", lambda: requests.post(f"{base_url}/apps/MedicalAgent/users/u{user}/sessions/s{round_index}", data="{}")),
+        ("list_apps", lambda: requests.get(f"{base_url}/list-apps")),
+        ("run_sse", lambda: requests.post(f"{base_url}/run_sse", data="{}", stream=True)),
+    ]
+    for endpoint, call in calls:
+        start = time.perf_counter()
+        ok = False
+        try:
+            response = call()
+            ok = response.status_code < 400
+            if endpoint == "run_sse":
+                consume_stream(response)
+            response.close()
+        except requests.RequestException:
+            pass
+        metrics.record(endpoint, time.perf_counter() - start, ok, 0)
+
+
+def pooled_round(client: ApiClient, user: int, round_index: int) -> None:
+    try:
+        client.post(f"/apps/MedicalAgent/users/u{user}/sessions/s{round_index}", endpoint="create_session", data="{}")
+        client.get("/list-apps", endpoint="list_apps")
+        with client.stream("POST", "/run_sse", endpoint="run_sse", data="{}") as response:
+            consume_stream(response)
+    except requests.RequestException:
+        pass
+
+
+def run_mode(mode: str, users: int, rounds: int, latency_seconds: float, fail_rate: float) -> dict:
+    server = StubServer(("127.0.0.1", 0), latency_seconds, fail_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    client = ApiClient(base_url, connect_timeout=2, read_timeout=10, max_retries=3, backoff_factor=0.01, pool_size=users)
+    metrics = EndpointMetrics() if mode == "bare" else client.metrics
+
+    def simulate_user(user: int):
+        for round_index in range(rounds):
+            if mode == "bare":
+                bare_round(base_url, metrics, user, round_index)
+            else:
+                pooled_round(client, user, round_index)
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=users) as executor:
+            list(executor.map(simulate_user, range(users)))
+        wall_seconds = time.perf_counter() - start
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+    endpoints = metrics.snapshot()
+    return {
+        "mode": mode,
+        "requests": sum(entry["calls"] for entry in endpoints.values()),
+        "connections_opened": server.connections,
+        "wall_seconds": round(wall_seconds, 3),
+        "errors": sum(entry["errors"] for entry in endpoints.values()),
+        "retries": sum(entry["retries"] for entry in endpoints.values()),
+        "endpoints": endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=8, help="Concurrent simulated users")
+    parser.add_argument("--rounds", type=int, default=10, help="Create-session/list/run rounds per user")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Stub server latency per request")
+    parser.add_argument("--fail-rate", type=float, default=0.1, help="Fraction of GET /list-apps answered with 503")
+    args = parser.parse_args()
+
+    random.seed(0)
+    report = {
+        mode: run_mode(mode, args.users, args.rounds, args.latency_ms / 1000, args.fail_rate)
+        for mode in ("bare", "pooled")
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: connection reuse of the pooled Gemini client.
+
+Starts a local HTTP/1.1 stand-in for the generate_content endpoint that counts
+the TCP connections it accepts. The script then sends the same number of
+requests twice: once creating a fresh genai.Client per call (the old
+transcribe_audio_file behaviour) and once through GeminiClientPool. The pool
+should open one connection per client instead of one per request; the script
+exits non-zero when it does not.
+
+Usage:
+    python benchmarks/gemini_client_reuse.py [--calls 20] [--latency-ms 20]
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "MedicalAgent" / "mcp_server"))
+
+from google import genai  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from gemini_client import GeminiClientPool  # noqa: E402
+
+CANNED_RESPONSE = json.dumps({
+    "candidates": [{
+        "content": {"role": "model", "parts": [{"text": "Doctor: Hello.\nPatient: Hi."}]},
+        "finishReason": "STOP",
+    }],
+    "usageMetadata": {"promptTokenCount": 10, "candidatesTokenCount": 5, "totalTokenCount": 15},
+}).encode("utf-8")
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers every POST with a canned generate_content response."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+    connections = 0
+    latency_seconds = 0.0
+    _lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with StandInHandler._lock:
+            StandInHandler.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency_seconds)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(CANNED_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(CANNED_RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+def run_fresh_clients(base_url: str, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        client = genai.Client(api_key="stand-in", http_options=types.HttpOptions(base_url=base_url))
+        client.models.generate_content(model="stand-in-model", contents=["hello"])
+    return time.perf_counter() - start
+
+
+def run_pooled_clients(base_url: str, calls: int) -> tuple:
+    pool = GeminiClientPool(size=1, base_url=base_url, api_key="stand-in")
+    start = time.perf_counter()
+    for _ in range(calls):
+        with pool.acquire() as client:
+            pool.generate_content(client, model="stand-in-model", contents=["hello"])
+    elapsed = time.perf_counter() - start
+    stats = pool.stats()
+    pool.shutdown()
+    return elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Simulated model latency per request")
+    args = parser.parse_args()
+
+    StandInHandler.latency_seconds = args.latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        StandInHandler.connections = 0
+        fresh_seconds = run_fresh_clients(base_url, args.calls)
+        fresh_connections = StandInHandler.connections
+
+        StandInHandler.connections = 0
+        pooled_seconds, pool_stats = run_pooled_clients(base_url, args.calls)
+        pooled_connections = StandInHandler.connections
+    finally:
+        server.shutdown()
+
+    regressions = []
+    if pooled_connections >= fresh_connections:
+        regressions.append(
+            f"pooled clients opened {pooled_connections} connections for {args.calls} calls "
+            f"(fresh clients: {fresh_connections})"
+        )
+
+    print(json.dumps({
+        "calls": args.calls,
+        "fresh_client_per_call": {"connections": fresh_connections, "wall_seconds": round(fresh_seconds, 3)},
+        "pooled_client": {"connections": pooled_connections, "wall_seconds": round(pooled_seconds, 3), "stats": pool_stats},
+        "connections_reused": pooled_connections < fresh_connections,
+        "regressions": regressions,
+    }, indent=2))
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
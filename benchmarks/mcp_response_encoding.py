@@ -0,0 +1,107 @@
+"""
+Benchmark: MCP response size, legacy (indented JSON) vs compact encoding.
+
+Replays the tool responses of one consultation, built from real processing
+files (by default the CAR0002 sample in mcp_server/processing_files_dummy),
+through both encodings and reports the bytes on the wire and the estimated
+tokens the model sees. The call mix follows the current pipeline: the
+transcript prefetch, one save per artifact agent, TemplateValidator and
+Summariser bulk reads, and a Q&A turn reading every file.
+
+Usage:
+    python benchmarks/mcp_response_encoding.py [--consultation-dir path/to/CAR0002]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+MCP_SERVER_DIR = Path(__file__).parent.parent / "MedicalAgent" / "mcp_server"
+sys.path.insert(0, str(MCP_SERVER_DIR))
+
+from response_encoding import (  # noqa: E402
+    DROPPED_KEYS,
+    ResponseEncodingStats,
+    decode_parts,
+    encode_compact,
+    encode_legacy,
+)
+
+ARTIFACTS = ["MedicalTemplate", "AssessmentPlan", "CriticReview", "MedicalSummary"]
+
+
+def read_response(directory: Path, stem: str, category: str) -> dict:
+    path = directory / f"{category}.txt"
+    content = path.read_text(encoding="utf-8") if path.exists() else ""
+    return {
+        "success": True,
+        "message": f"{category} file read successfully: {stem}/{category}.txt ({len(content.encode('utf-8'))} bytes)",
+        "file_path": str(path),
+        "content": content,
+        "version": 1,
+    }
+
+
+def bulk_read_response(directory: Path, stem: str, categories: list) -> dict:
+    files = {category: read_response(directory, stem, category) for category in categories}
+    return {"success": True, "message": f"Read {len(files)} files for {stem}: {', '.join(files)}", "files": files}
+
+
+def save_response(directory: Path, stem: str, category: str) -> dict:
+    path = directory / f"{category}.txt"
+    size = path.stat().st_size if path.exists() else 0
+    return {
+        "success": True,
+        "message": f"{category} saved successfully to {stem}/{category}.txt ({size} bytes)",
+        "file_path": str(path),
+        "version": 1,
+    }
+
+
+def without_file_paths(value):
+    if isinstance(value, dict):
+        return {key: without_file_paths(item) for key, item in value.items() if key not in DROPPED_KEYS}
+    return value
+
+
+def consultation_responses(directory: Path) -> list:
+    stem = directory.name
+    available = [category for category in ARTIFACTS if (directory / f"{category}.txt").exists()]
+    return [
+        ("read_processing_file Transcript (prefetch)", read_response(directory, stem, "Transcript")),
+        *[(f"save_processing_file {category}", save_response(directory, stem, category)) for category in available],
+        ("read_processing_files (TemplateValidator)", bulk_read_response(directory, stem, ["MedicalTemplate"])),
+        ("read_processing_files (Summariser)", bulk_read_response(directory, stem, ["MedicalTemplate"])),
+        ("read_processing_files (Q&A)", bulk_read_response(directory, stem, ["Transcript", *available])),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--consultation-dir",
+        default=str(MCP_SERVER_DIR / "processing_files_dummy" / "CAR0002"),
+        help="Folder with Transcript.txt and the generated artifacts",
+    )
+    args = parser.parse_args()
+    directory = Path(args.consultation_dir)
+
+    stats = ResponseEncodingStats()
+    calls = []
+    for label, payload in consultation_responses(directory):
+        legacy, compact = encode_legacy(payload), encode_compact(payload)
+        # The compact encoding must round-trip to the same payload minus the dropped file paths
+        assert decode_parts(compact) == without_file_paths(payload), label
+        stats.record(directory.name, legacy, compact)
+        calls.append({
+            "call": label,
+            "legacy_bytes": sum(len(text.encode("utf-8")) for text in legacy),
+            "compact_bytes": sum(len(text.encode("utf-8")) for text in compact),
+        })
+
+    print(json.dumps({"consultation": directory.name, "calls": calls, "totals": stats.stats()[directory.name]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
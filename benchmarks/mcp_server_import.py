@@ -0,0 +1,200 @@
+"""
+Benchmark: MCP server cold start and what it imports.
+
+Two measurements, both with Python's `-X importtime` profile:
+
+- import: `import server` in a fresh interpreter; total import time and the
+  most expensive top-level imports.
+- serve: spawns the server over stdio and times the initialize handshake,
+  tools/list and a processing-file tool call. It runs once with an empty tool
+  schema cache (built through ADK) and once with the cache it wrote.
+
+It also works as a regression test. It exits with status 1 when the Gemini
+SDK, ADK, Vertex AI or NumPy is imported before the handshake or while
+serving the file tools from a warm cache, or when the import takes longer
+than --max-import-ms.
+
+Usage:
+    python benchmarks/mcp_server_import.py [--repeat 3] [--top 10] [--max-import-ms 0]
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+MCP_SERVER_DIR = (Path(__file__).parent.parent / "MedicalAgent" / "mcp_server").resolve()
+
+# Modules that must not load before the handshake or for the file tools
+HEAVY_MODULES = ("google.genai", "google.adk", "vertexai", "numpy")
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_importtime(stderr: str) -> list:
+    """Returns (module, self_us, cumulative_us, depth) for every -X importtime line."""
+    entries = []
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return entries
+
+
+def heavy_modules_loaded(entries: list) -> list:
+    loaded = {module for module, *_ in entries}
+    return [heavy for heavy in HEAVY_MODULES if any(m == heavy or m.startswith(heavy + ".") for m in loaded)]
+
+
+def server_env(work_dir: str, schema_cache: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "MCP_LOG_DIR": os.path.join(work_dir, "logs"),
+        "MCP_TOOL_SCHEMA_CACHE": schema_cache,
+        "TRANSCRIPTION_CACHE_DIR": os.path.join(work_dir, "transcription_cache"),
+    })
+    env.pop("TRACE_FILE", None)
+    return env
+
+
+def measure_import(work_dir: str, top: int) -> dict:
+    """Imports the server module in a fresh interpreter under -X importtime."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        cwd=MCP_SERVER_DIR,
+        env=server_env(work_dir, os.path.join(work_dir, "tool_schemas.json")),
+        capture_output=True,
+        text=True,
+    )
+    wall_seconds = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"import server failed:\n{result.stderr[-2000:]}")
+
+    entries = parse_importtime(result.stderr)
+    server_entry = next(entry for entry in reversed(entries) if entry[0] == "server")
+    # Direct imports of server.py are one level deeper than server itself
+    direct = [entry for entry in entries if entry[3] == server_entry[3] + 1]
+    direct.sort(key=lambda entry: entry[2], reverse=True)
+    return {
+        "process_wall_seconds": round(wall_seconds, 3),
+        "import_server_ms": round(server_entry[2] / 1000, 1),
+        "modules_imported": len(entries),
+        "heavy_modules_loaded": heavy_modules_loaded(entries),
+        "top_imports_ms": {module: round(cumulative / 1000, 1) for module, _, cumulative, _ in direct[:top]},
+    }
+
+
+def _request(process, message: dict) -> dict:
+    process.stdin.write(json.dumps(message) + "\n")
+    process.stdin.flush()
+    if "id" not in message:
+        return {}
+    return json.loads(process.stdout.readline())
+
+
+def measure_serve(work_dir: str, schema_cache: str) -> dict:
+    """Spawns the server, then times the handshake, tools/list and one file tool call."""
+    env = server_env(work_dir, schema_cache)
+    env["PYTHONPROFILEIMPORTTIME"] = "1"
+    stderr_path = os.path.join(work_dir, f"server-stderr-{time.monotonic_ns()}.txt")
+    timings = {}
+    with open(stderr_path, "w", encoding="utf-8") as stderr_file:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, str(MCP_SERVER_DIR / "server.py")],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=stderr_file,
+            text=True,
+            env=env,
+        )
+        try:
+            _request(process, {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": "2025-03-26",
+                    "capabilities": {},
+                    "clientInfo": {"name": "import-benchmark", "version": "0.1.0"},
+                },
+            })
+            timings["spawn_and_handshake_seconds"] = time.perf_counter() - start
+            _request(process, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+            step = time.perf_counter()
+            tools = _request(process, {"jsonrpc": "2.0", "id": 2, "method": "tools/list"})["result"]["tools"]
+            timings["list_tools_seconds"] = time.perf_counter() - step
+
+            step = time.perf_counter()
+            _request(process, {
+                "jsonrpc": "2.0",
+                "id": 3,
+                "method": "tools/call",
+                "params": {
+                    "name": "read_processing_file",
+                    "arguments": {"file_category": "Transcript", "audio_filename": "BENCH-missing"},
+                },
+            })
+            timings["file_tool_call_seconds"] = time.perf_counter() - step
+        finally:
+            process.stdin.close()
+            process.wait(timeout=30)
+
+    with open(stderr_path, encoding="utf-8") as stderr_file:
+        entries = parse_importtime(stderr_file.read())
+    return {
+        **{key: round(value, 4) for key, value in timings.items()},
+        "tools_listed": len(tools),
+        "heavy_modules_loaded": heavy_modules_loaded(entries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (median reported)")
+    parser.add_argument("--top", type=int, default=10, help="Most expensive direct imports to list")
+    parser.add_argument("--max-import-ms", type=float, default=0, help="Fail above this import time (0: no limit)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="mcp-import-") as work_dir:
+        imports = [measure_import(work_dir, args.top) for _ in range(args.repeat)]
+        schema_cache = os.path.join(work_dir, "serve_tool_schemas.json")
+        cold = measure_serve(work_dir, schema_cache)
+        warm_runs = [measure_serve(work_dir, schema_cache) for _ in range(args.repeat)]
+
+    median_import = dict(imports[-1])
+    for key in ("process_wall_seconds", "import_server_ms"):
+        median_import[key] = statistics.median(run[key] for run in imports)
+    warm = dict(warm_runs[-1])
+    for key in ("spawn_and_handshake_seconds", "list_tools_seconds", "file_tool_call_seconds"):
+        warm[key] = statistics.median(run[key] for run in warm_runs)
+
+    regressions = []
+    if median_import["heavy_modules_loaded"]:
+        regressions.append(f"import server loads {', '.join(median_import['heavy_modules_loaded'])}")
+    if warm["heavy_modules_loaded"]:
+        regressions.append(f"handshake and file tools load {', '.join(warm['heavy_modules_loaded'])}")
+    if args.max_import_ms and median_import["import_server_ms"] > args.max_import_ms:
+        regressions.append(f"import server took {median_import['import_server_ms']} ms (limit {args.max_import_ms:g})")
+
+    report = {
+        "import": median_import,
+        "serve_cold_schema_cache": cold,
+        "serve_warm_schema_cache": warm,
+        "regressions": regressions,
+    }
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark: MCP server processes spawned per consultation.
+
+Compares the old layout (one stdio server per sub-agent toolset) with the
+shared pool from MedicalAgent/utils/custom_adk_patches.py. For each layout it
+spawns the server processes concurrently, completes the MCP initialize
+handshake on each, and reports the wall-clock cold-start time and the total
+resident memory (VmRSS, Linux only) of the servers.
+
+Usage:
+    python benchmarks/mcp_server_spawn.py [--legacy 6] [--pool 1] [--repeat 3]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+PATH_TO_MCP_SERVER_SCRIPT = str((Path(__file__).parent.parent / "MedicalAgent" / "mcp_server" / "server.py").resolve())
+
+INITIALIZE_REQUEST = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2025-03-26",
+        "capabilities": {},
+        "clientInfo": {"name": "spawn-benchmark", "version": "0.1.0"},
+    },
+}
+
+
+def read_rss_kb(pid: int) -> int:
+    """Returns the resident set size of a process in kB (0 if unavailable)."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def spawn_and_handshake() -> tuple:
+    """Spawns one server, completes the initialize handshake, returns (process, seconds)."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, PATH_TO_MCP_SERVER_SCRIPT],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    process.stdin.write(json.dumps(INITIALIZE_REQUEST) + "\n")
+    process.stdin.flush()
+    process.stdout.readline()
+    return process, time.perf_counter() - start
+
+
+def run_layout(server_count: int) -> dict:
+    """Spawns `server_count` servers concurrently and measures the layout."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=server_count) as pool:
+        results = list(pool.map(lambda _: spawn_and_handshake(), range(server_count)))
+    wall_seconds = time.perf_counter() - start
+
+    total_rss_kb = sum(read_rss_kb(process.pid) for process, _ in results)
+    for process, _ in results:
+        process.kill()
+        process.wait()
+
+    return {
+        "servers": server_count,
+        "cold_start_wall_seconds": round(wall_seconds, 3),
+        "max_handshake_seconds": round(max(seconds for _, seconds in results), 3),
+        "total_rss_mb": round(total_rss_kb / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--legacy", type=int, default=6, help="Servers spawned by the per-agent layout")
+    parser.add_argument("--pool", type=int, default=1, help="Servers spawned by the shared pool")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per layout (median reported)")
+    args = parser.parse_args()
+
+    report = {}
+    for label, count in (("per_agent", args.legacy), ("shared_pool", args.pool)):
+        runs = [run_layout(count) for _ in range(args.repeat)]
+        report[label] = {
+            key: statistics.median(run[key] for run in runs) for key in runs[0]
+        }
+
+    report["rss_saved_mb"] = round(report["per_agent"]["total_rss_mb"] - report["shared_pool"]["total_rss_mb"], 1)
+    report["cold_start_saved_seconds"] = round(
+        report["per_agent"]["cold_start_wall_seconds"] - report["shared_pool"]["cold_start_wall_seconds"], 3
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
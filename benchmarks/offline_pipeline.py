@@ -0,0 +1,345 @@
+"""
+Offline end-to-end benchmark: the real agent tree on a fake Gemini backend.
+
+Drives the real root_agent (LLM or code orchestration), the real MCP server
+process and its real file tools. The only fake is the model
+(benchmarks/fake_gemini.py). Every LlmAgent gets a scripted model with
+configurable latency and token counts. The MCP server's transcription call
+goes to a local generateContent stand-in that returns the CAR0002 sample
+transcript. Results do not depend on the network or cost anything, so
+reports can be compared across commits.
+
+Each run copies the sample recording to a fresh name, so the transcription
+cache and the artifact manifests start cold, and removes it afterwards.
+
+Reported (JSON):
+- spawn: MCP server spawn + initialize handshake, and list_tools
+- mcp_overhead: round trip of a no-op tool and of a transcript read, against reading the file in-process
+- runs: per-stage latency (routing model turns, transcription, each parallel branch,
+  the validator), tool round trips seen by the agents, model calls and tokens per agent
+- median: per-stage medians over the runs
+
+Usage:
+    python benchmarks/offline_pipeline.py [--runs 3] [--latency-ms 200] [--ms-per-token 0]
+        [--output-tokens N] [--orchestration llm|code] [--mcp-calls 50] [--output report.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parent.parent
+MCP_SERVER_DIR = REPO_ROOT / "MedicalAgent" / "mcp_server"
+SAMPLE_AUDIO = MCP_SERVER_DIR / "upload" / "CAR0002.mp3"
+SAMPLE_ARTIFACTS = MCP_SERVER_DIR / "processing_files_dummy" / "CAR0002"
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_gemini import FakeGeminiServer, FakeModelBackend, call, install_fake_models, transfer  # noqa: E402
+
+APP_NAME = "MedicalAgent"
+ROUTING_AGENTS = ("medical_template_agent", "AudioProcessor")
+PARALLEL_AGENT = "parallel_processing_agent"
+
+
+def canned_artifacts() -> dict:
+    artifacts = {
+        category: (SAMPLE_ARTIFACTS / f"{category}.txt").read_text(encoding="utf-8")
+        for category in ("Transcript", "MedicalTemplate", "AssessmentPlan", "CriticReview")
+    }
+    artifacts["MedicalSummary"] = artifacts["MedicalTemplate"][:1500]
+    return artifacts
+
+
+def agent_scripts(stem: str, artifacts: dict) -> dict:
+    """What each agent's fake model does, in order, before its final text reply."""
+    filename = f"{stem}.mp3"
+
+    def save(category: str):
+        return call("save_processing_file", file_category=category, contents=artifacts[category], audio_filename=stem)
+
+    return {
+        "medical_template_agent": [transfer("AudioProcessor"), transfer(PARALLEL_AGENT)],
+        "AudioProcessor": [
+            call("get_audio_file", filename=filename),
+            call("transcribe_audio_file", audio_file_path=str(MCP_SERVER_DIR / "upload" / filename)),
+            transfer("medical_template_agent"),
+        ],
+        "MedicalTemplate": [save("MedicalTemplate")],
+        "TemplateValidator": [call("read_processing_files", file_categories=["MedicalTemplate"], audio_filename=stem)],
+        "AssessmentPlanner": [save("AssessmentPlan")],
+        "Critic": [save("CriticReview")],
+        "Summariser": [
+            call("read_processing_files", file_categories=["MedicalTemplate"], audio_filename=stem),
+            save("MedicalSummary"),
+        ],
+    }
+
+
+def configure_environment(args, fake_server: FakeGeminiServer, work_dir: str) -> None:
+    """Must run before MedicalAgent is imported: the shared toolsets forward os.environ to the server."""
+    os.environ.update({
+        "ORCHESTRATION_MODE": args.orchestration,
+        "GEMINI_BASE_URL": fake_server.base_url,
+        "GOOGLE_GENAI_USE_VERTEXAI": "FALSE",
+        "AUDIO_UPLOAD_BACKEND": "inline",
+        "TRANSCRIPTION_MODE": "single",
+        "TRANSCRIPTION_CACHE_DIR": os.path.join(work_dir, "transcription_cache"),
+        "CONTEXT_CACHE_BACKEND": "off",
+        "MCP_LOG_DIR": os.path.join(work_dir, "logs"),
+    })
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+
+def _seconds(start: float, end: float) -> float:
+    return round(end - start, 4)
+
+
+def _median(values):
+    return round(statistics.median(values), 4) if values else None
+
+
+async def measure_spawn(repeat: int) -> dict:
+    """Spawns private (unshared) servers: initialize handshake plus the first list_tools, then a second list_tools."""
+    from MedicalAgent.utils.custom_adk_patches import CustomMCPToolset, mcp_server_params
+
+    first, again = [], []
+    for _ in range(repeat):
+        toolset = CustomMCPToolset(connection_params=mcp_server_params())
+        try:
+            start = time.perf_counter()
+            await toolset.get_tools()
+            first.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            await toolset.get_tools()
+            again.append(time.perf_counter() - start)
+        finally:
+            await toolset.close()
+    return {
+        "spawn_handshake_list_tools_seconds": _median(first),
+        "list_tools_seconds": _median(again),
+        "spawn_and_handshake_seconds": _median([a - b for a, b in zip(first, again)]),
+        "repeat": repeat,
+    }
+
+
+async def measure_mcp_overhead(calls: int, stem: str) -> dict:
+    """Round trips through the shared server, against the same work done in-process."""
+    from MedicalAgent.utils.custom_adk_patches import shared_mcp_toolset, tool_response_payload
+
+    toolset = shared_mcp_toolset()
+    try:
+        tools = {tool.name: tool for tool in await toolset.get_tools()}
+        noop, reads, local_reads = [], [], []
+        transcript_path = MCP_SERVER_DIR / "processing_files" / stem / "Transcript.txt"
+        for _ in range(calls):
+            start = time.perf_counter()
+            await tools["get_response_encoding_stats"].run_async(args={}, tool_context=None)
+            noop.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            payload = tool_response_payload(await tools["read_processing_file"].run_async(
+                args={"file_category": "Transcript", "audio_filename": stem}, tool_context=None
+            ))
+            reads.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            transcript_path.read_text(encoding="utf-8")
+            local_reads.append(time.perf_counter() - start)
+    finally:
+        await toolset.close()
+
+    return {
+        "calls": calls,
+        "noop_round_trip_p50_seconds": _median(noop),
+        "noop_round_trip_max_seconds": round(max(noop), 4),
+        "transcript_read_round_trip_p50_seconds": _median(reads),
+        "transcript_read_in_process_p50_seconds": _median(local_reads),
+        "transcript_read_overhead_p50_seconds": _median([r - l for r, l in zip(reads, local_reads)]),
+        "transcript_bytes": len((payload.get("content") or "").encode("utf-8")),
+    }
+
+
+def stage_report(timed_events: list, backend: FakeModelBackend, run_start: float, run_end: float, calls_before: int) -> dict:
+    """Derives per-stage latency from the event arrival times and the fake model's call log."""
+    calls = backend.calls[calls_before:]
+    stages = {"total_seconds": _seconds(run_start, run_end)}
+
+    routing = [c for c in calls if c.agent in ROUTING_AGENTS]
+    stages["routing_seconds"] = round(sum(c.end - c.start for c in routing), 4)
+    stages["routing_model_calls"] = len(routing)
+
+    # Tool round trips as the agents saw them: function call event -> function response event
+    pending, tool_seconds = {}, {}
+    for arrived, event in timed_events:
+        for function_call in event.get_function_calls():
+            pending[function_call.id] = (function_call.name, arrived)
+        for function_response in event.get_function_responses():
+            if function_response.id in pending:
+                name, called = pending.pop(function_response.id)
+                tool_seconds.setdefault(name, []).append(_seconds(called, arrived))
+    stages["tool_round_trip_seconds"] = tool_seconds
+
+    transcription = tool_seconds.get("transcribe_audio_file")
+    if transcription:
+        stages["transcription_seconds"] = transcription[0]
+    else:
+        # Code orchestration calls the tool directly and reports its own timings
+        for _, event in timed_events:
+            report = (event.actions.state_delta or {}).get("orchestration_report")
+            if report:
+                stages["transcription_seconds"] = report["stage_seconds"].get("transcribe_audio_file")
+    stages["transcription_model_seconds"] = round(
+        sum(c.end - c.start for c in calls if c.agent == "mcp_server:transcription"), 4
+    )
+
+    branch_events = [(t, e) for t, e in timed_events if e.branch and f"{PARALLEL_AGENT}." in e.branch]
+    if branch_events:
+        first_branch_time = branch_events[0][0]
+        parallel_start = max((t for t, _ in timed_events if t < first_branch_time), default=run_start)
+        branches = {}
+        for arrived, event in branch_events:
+            branch = event.branch.split(f"{PARALLEL_AGENT}.", 1)[1].split(".")[0]
+            branches[branch] = _seconds(parallel_start, arrived)
+        stages["parallel_seconds"] = _seconds(parallel_start, branch_events[-1][0])
+        stages["branch_seconds"] = branches
+
+        template_done = max((t for t, e in branch_events if e.author == "MedicalTemplate"), default=None)
+        validator_done = max((t for t, e in branch_events if e.author == "TemplateValidator"), default=None)
+        if template_done is not None and validator_done is not None:
+            stages["validator_seconds"] = _seconds(template_done, validator_done)
+
+    per_agent = {}
+    for c in calls:
+        entry = per_agent.setdefault(c.agent, {"model_calls": 0, "model_seconds": 0.0, "prompt_tokens": 0, "output_tokens": 0})
+        entry["model_calls"] += 1
+        entry["model_seconds"] = round(entry["model_seconds"] + c.end - c.start, 4)
+        entry["prompt_tokens"] += c.prompt_tokens
+        entry["output_tokens"] += c.output_tokens
+    stages["agents"] = per_agent
+    return stages
+
+
+async def run_pipeline(runner, backend: FakeModelBackend, artifacts: dict) -> tuple:
+    """Processes one freshly named copy of the sample recording; returns (stage report, stem)."""
+    from google.genai import types
+
+    stem = f"BENCH-{uuid.uuid4().hex[:8]}"
+    shutil.copyfile(SAMPLE_AUDIO, MCP_SERVER_DIR / "upload" / f"{stem}.mp3")
+    install_fake_models(runner.agent, agent_scripts(stem, artifacts), backend)
+
+    session = await runner.session_service.create_session(app_name=APP_NAME, user_id="benchmark")
+    message = types.Content(role="user", parts=[types.Part(text=f"Please process the audio file {stem}.mp3")])
+
+    calls_before = len(backend.calls)
+    timed_events = []
+    run_start = time.perf_counter()
+    async for event in runner.run_async(user_id="benchmark", session_id=session.id, new_message=message):
+        timed_events.append((time.perf_counter(), event))
+    run_end = time.perf_counter()
+
+    report = stage_report(timed_events, backend, run_start, run_end, calls_before)
+    report["artifacts_written"] = sorted(
+        path.stem for path in (MCP_SERVER_DIR / "processing_files" / stem).glob("*.txt")
+    )
+    return report, stem
+
+
+def cleanup(stem: str) -> None:
+    (MCP_SERVER_DIR / "upload" / f"{stem}.mp3").unlink(missing_ok=True)
+    shutil.rmtree(MCP_SERVER_DIR / "processing_files" / stem, ignore_errors=True)
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def benchmark(args) -> dict:
+    backend = FakeModelBackend(
+        latency_seconds=args.latency_ms / 1000,
+        seconds_per_output_token=args.ms_per_token / 1000,
+        output_tokens=args.output_tokens,
+    )
+    artifacts = canned_artifacts()
+    fake_server = FakeGeminiServer(artifacts["Transcript"], backend).start()
+    work_dir = tempfile.mkdtemp(prefix="offline-pipeline-")
+    configure_environment(args, fake_server, work_dir)
+
+    # Imported only now: module-level toolsets capture the environment set above
+    from google.adk.runners import InMemoryRunner
+
+    from MedicalAgent.agent import root_agent
+
+    runner = InMemoryRunner(agent=root_agent, app_name=APP_NAME)
+    stems, runs = [], []
+    try:
+        spawn = await measure_spawn(args.spawn_repeat)
+        for _ in range(args.runs):
+            report, stem = await run_pipeline(runner, backend, artifacts)
+            stems.append(stem)
+            runs.append(report)
+        mcp_overhead = await measure_mcp_overhead(args.mcp_calls, stems[-1])
+    finally:
+        await runner.close()
+        for stem in stems:
+            cleanup(stem)
+        fake_server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    median_keys = ["total_seconds", "routing_seconds", "transcription_seconds", "parallel_seconds", "validator_seconds"]
+    median = {key: _median([run[key] for run in runs if run.get(key) is not None]) for key in median_keys}
+    median["branch_seconds"] = {
+        branch: _median([run["branch_seconds"][branch] for run in runs if branch in run.get("branch_seconds", {})])
+        for branch in runs[-1].get("branch_seconds", {})
+    }
+    return {
+        "revision": git_revision(),
+        "config": {
+            "orchestration": args.orchestration,
+            "model_latency_ms": args.latency_ms,
+            "ms_per_output_token": args.ms_per_token,
+            "output_tokens": args.output_tokens,
+            "runs": args.runs,
+        },
+        "spawn": spawn,
+        "mcp_overhead": mcp_overhead,
+        "runs": runs,
+        "median": median,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=3, help="Consultations processed (the first one spawns the server)")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Fixed latency of every fake model call")
+    parser.add_argument("--ms-per-token", type=float, default=0.0, help="Extra latency per output token")
+    parser.add_argument("--output-tokens", type=int, default=None, help="Fixed output token count (default: estimated)")
+    parser.add_argument("--orchestration", choices=["llm", "code"], default="llm", help="ORCHESTRATION_MODE to benchmark")
+    parser.add_argument("--mcp-calls", type=int, default=50, help="Round trips timed for the MCP overhead")
+    parser.add_argument("--spawn-repeat", type=int, default=3, help="Private servers spawned to time startup")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(benchmark(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,10 +10,13 @@ specified processing logic.
 import streamlit as st
 import requests
 import os
+import shutil
 import uuid
 import time
 import json
 
+from api_client import ApiClient
+
 #set page config
 st.set_page_config(
     page_title="Medical Assistant Agent",
@@ -24,6 +27,45 @@ st.set_page_config(
 #constants
 API_BASE_URL = "http://127.0.0.1:8000"
 APP_NAME = "MedicalAgent"
+UPLOAD_CHUNK_BYTES = 1024 * 1024  # Uploaded audio is copied to disk 1 MiB at a time
+RUN_CONNECT_TIMEOUT_SECONDS = float(os.getenv("ADK_API_CONNECT_TIMEOUT_SECONDS", "5"))
+RUN_READ_TIMEOUT_SECONDS = float(os.getenv("ADK_API_READ_TIMEOUT_SECONDS", "600"))  # Longest gap between streamed events
+API_MAX_RETRIES = int(os.getenv("ADK_API_MAX_RETRIES", "3"))
+PROCESSING_DIR = os.path.join("MedicalAgent", "mcp_server", "processing_files")
+
+# parallel_processing_agent branches and the artifact each one saves (None: text output only)
+PIPELINE_AGENTS = {
+    "MedicalTemplate": "MedicalTemplate",
+    "TemplateValidator": None,
+    "AssessmentPlanner": "AssessmentPlan",
+    "Critic": "CriticReview",
+    "Summariser": "MedicalSummary",
+}
+STATUS_ICONS = {"pending": "⏳", "running": "🔄", "done": "✅", "skipped": "⏭️", "incomplete": "⚠️"}
+SAVE_TOOLS = ("save_processing_file", "save_processing_files")
+
+# Background job service (python -m MedicalAgent.jobs); uploads fall back to
+# processing in the chat request if it is not running
+JOB_SERVICE_URL = os.getenv("JOB_SERVICE_URL", "http://127.0.0.1:8001")
+JOB_POLL_SECONDS = 2
+JOB_STATUS_ICONS = {"queued": "🕒", "running": "🔄", "done": "✅", "failed": "❌"}
+
+
+@st.cache_resource
+def get_api_clients():
+    """One pooled keep-alive client per backend, shared by every rerun and browser session."""
+    return {
+        "adk": ApiClient(
+            API_BASE_URL,
+            connect_timeout=RUN_CONNECT_TIMEOUT_SECONDS,
+            read_timeout=RUN_READ_TIMEOUT_SECONDS,
+            max_retries=API_MAX_RETRIES,
+        ),
+        # Short timeouts and a single retry: an absent job service should fail fast
+        "jobs": ApiClient(JOB_SERVICE_URL, connect_timeout=2, read_timeout=5, max_retries=1),
+    }
+
+API_CLIENTS = get_api_clients()
 
 
 #Initialize session state variables
@@ -57,16 +99,20 @@ def handle_file_upload(uploaded_file):
             file_extension = os.path.splitext(uploaded_file.name)[1].lower()
             
             # Validate file type
-            if file_extension not in ['.mp3', '.wav']:
-                st.error("Please upload only MP3 or WAV audio files.")
+            if file_extension not in ['.mp3', '.wav', '.m4a', '.ogg', '.flac']:
+                st.error("Please upload an MP3, WAV, M4A, OGG or FLAC audio file.")
                 return None
             
             # Create the file path (keeping original filename)
             file_path = os.path.join(upload_dir, uploaded_file.name)
             
-            # Save the uploaded file
-            with open(file_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
+            # Save the uploaded file in fixed-size chunks, then move it into place
+            # so the MCP server never sees a partially written recording
+            partial_path = f"{file_path}.part"
+            uploaded_file.seek(0)
+            with open(partial_path, "wb") as f:
+                shutil.copyfileobj(uploaded_file, f, length=UPLOAD_CHUNK_BYTES)
+            os.replace(partial_path, file_path)
             
             st.success(f"✅ Audio file '{uploaded_file.name}' uploaded successfully!")
             
@@ -99,11 +145,16 @@ def create_session():
         POST /apps/{app_name}/users/{user_id}/sessions/{session_id}
     """
     session_id = f"session-{int(time.time())}"
-    response = requests.post(
-        f"{API_BASE_URL}/apps/{APP_NAME}/users/{st.session_state.user_id}/sessions/{session_id}",
-        headers={"Content-Type": "application/json"},
-        data=json.dumps({})
-    )
+    try:
+        response = API_CLIENTS["adk"].post(
+            f"/apps/{APP_NAME}/users/{st.session_state.user_id}/sessions/{session_id}",
+            endpoint="create_session",
+            headers={"Content-Type": "application/json"},
+            data=json.dumps({})
+        )
+    except requests.RequestException as e:
+        st.error(f"Failed to create session: {e}")
+        return False
     
     if response.status_code == 200:
         st.session_state.session_id = session_id
@@ -113,15 +164,207 @@ def create_session():
         st.error(f"Failed to create session: {response.text}")
         return False
 
+def enqueue_job(filename):
+    """
+    Queues an uploaded recording with the background job service.
+    
+    Args:
+        filename (str): The uploaded audio filename (e.g., "CAR0002.mp3")
+        
+    Returns:
+        dict: The created job, or None if the job service is not reachable
+    
+    API Endpoint:
+        POST {JOB_SERVICE_URL}/jobs
+    """
+    try:
+        response = API_CLIENTS["jobs"].post(
+            "/jobs",
+            endpoint="enqueue_job",
+            headers={"Content-Type": "application/json"},
+            data=json.dumps({"audio_file": filename}),
+        )
+    except requests.RequestException:
+        return None
+    if response.status_code != 201:
+        st.error(f"Could not queue '{filename}': {response.text}")
+        return None
+    return response.json()
+
+def fetch_jobs(limit=10):
+    """Returns the most recent jobs from the job service, or None if it is not reachable."""
+    try:
+        response = API_CLIENTS["jobs"].get("/jobs", endpoint="list_jobs", params={"limit": limit})
+        response.raise_for_status()
+        return response.json()["jobs"]
+    except (requests.RequestException, ValueError, KeyError):
+        return None
+
+def render_jobs(jobs):
+    """Shows the job list with per-stage timings; returns True while any job is still active."""
+    active = False
+    for job in jobs:
+        active = active or job["status"] in ("queued", "running")
+        icon = JOB_STATUS_ICONS.get(job["status"], "•")
+        timing = f" · {job['total_seconds']:.1f}s" if job.get("total_seconds") is not None else ""
+        with st.expander(f"{icon} {job['audio_file']} — {job['status']}{timing}"):
+            st.caption(f"Job {job['job_id']} · queued at {job['created_at']}")
+            if job.get("queued_seconds") is not None:
+                st.write(f"Waited in queue: {job['queued_seconds']:.1f}s")
+            for stage, info in (job.get("stages") or {}).items():
+                st.write(f"{stage}: {info.get('status')} ({info.get('seconds', 0):.1f}s)")
+            if job.get("error"):
+                st.error(job["error"])
+            if job["status"] == "done" and st.session_state.session_id:
+                if st.button("💬 Discuss in chat", key=f"discuss-{job['job_id']}"):
+                    # The artifacts already exist, so the pipeline only reloads them
+                    send_message(f"Please process the uploaded audio file: {job['audio_file']}")
+                    st.rerun()
+    return active
+
+def iter_sse_events(response):
+    """
+    Parses a Server-Sent Events stream into ADK events as they arrive.
+
+    Args:
+        response: A streaming `requests` response from the /run_sse endpoint
+
+    Yields:
+        dict: One decoded ADK event per `data:` message
+    """
+    data_lines = []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+        elif not line and data_lines:
+            # A blank line ends the current message
+            payload = "\n".join(data_lines)
+            data_lines = []
+            try:
+                yield json.loads(payload)
+            except json.JSONDecodeError:
+                continue
+    if data_lines:
+        try:
+            yield json.loads("\n".join(data_lines))
+        except json.JSONDecodeError:
+            pass
+
+def read_artifact(audio_filename, category):
+    """Reads a saved processing file, or returns None if it does not exist (yet)."""
+    try:
+        with open(os.path.join(PROCESSING_DIR, audio_filename, f"{category}.txt"), "r", encoding="utf-8") as f:
+            return f.read()
+    except (OSError, TypeError):
+        return None
+
+class PipelineProgress:
+    """
+    Tracks the parallel processing branches from the streamed ADK events.
+
+    A branch is running from the first pipeline event until it saves its
+    artifact (or, for TemplateValidator, gives its final answer). Artifacts
+    are read from processing_files/<stem>/ as soon as the save returns.
+    """
+
+    def __init__(self, placeholder, audio_filename=None):
+        self.placeholder = placeholder
+        self.audio_filename = audio_filename
+        self.started_at = None
+        self.branches = {
+            name: {"status": "pending", "seconds": None, "category": category, "output": None}
+            for name, category in PIPELINE_AGENTS.items()
+        }
+
+    @property
+    def active(self):
+        return self.started_at is not None
+
+    def _finish(self, name, status, output):
+        branch = self.branches[name]
+        if branch["status"] in ("done", "skipped"):
+            return
+        branch["status"] = status
+        branch["seconds"] = time.perf_counter() - self.started_at
+        branch["output"] = output
+
+    def handle(self, event):
+        """Updates the branch of the event's author; returns True if anything changed."""
+        name = event.get("author")
+        if name not in self.branches:
+            return False
+        if self.started_at is None:
+            # The branches start together, so the first pipeline event starts every clock
+            self.started_at = time.perf_counter()
+        branch = self.branches[name]
+        if branch["status"] == "pending":
+            branch["status"] = "running"
+
+        for part in (event.get("content") or {}).get("parts") or []:
+            function_call = part.get("functionCall") or part.get("function_call")
+            function_response = part.get("functionResponse") or part.get("function_response")
+            if function_call and (function_call.get("args") or {}).get("audio_filename"):
+                self.audio_filename = function_call["args"]["audio_filename"]
+            elif function_response and function_response.get("name") in SAVE_TOOLS and branch["category"]:
+                artifact = read_artifact(self.audio_filename, branch["category"])
+                if artifact is not None:
+                    self._finish(name, "done", artifact)
+            elif part.get("text") and not event.get("partial"):
+                if "is up to date" in part["text"]:
+                    # Skipped by the artifact manifest: show the existing artifact
+                    output = read_artifact(self.audio_filename, branch["category"]) if branch["category"] else part["text"]
+                    self._finish(name, "skipped", output)
+                elif branch["category"] is None:
+                    self._finish(name, "done", part["text"])
+        return True
+
+    def close(self):
+        """Marks branches that never reported completion once the run has ended."""
+        for name, branch in self.branches.items():
+            if branch["status"] == "running":
+                output = read_artifact(self.audio_filename, branch["category"]) if branch["category"] else None
+                self._finish(name, "incomplete", output)
+
+    def summary(self):
+        """Branch states for the chat history; saved artifacts are re-read from disk when shown."""
+        return {
+            name: {key: value for key, value in branch.items() if key != "output" or not branch["category"]}
+            for name, branch in self.branches.items()
+        }
+
+    def render(self):
+        if not self.active:
+            return
+        with self.placeholder.container():
+            render_pipeline(self.branches, self.audio_filename, live_started_at=self.started_at)
+
+def render_pipeline(branches, audio_filename, live_started_at=None):
+    """Draws one row per branch with its status and elapsed time, and an expander per finished output."""
+    st.markdown(f"**Processing pipeline** {f'· `{audio_filename}`' if audio_filename else ''}")
+    for name, branch in branches.items():
+        seconds = branch["seconds"]
+        if seconds is None and live_started_at is not None and branch["status"] == "running":
+            seconds = time.perf_counter() - live_started_at
+        elapsed = f" · {seconds:.1f}s" if seconds is not None else ""
+        st.markdown(f"{STATUS_ICONS[branch['status']]} {name} — {branch['status']}{elapsed}")
+        output = branch.get("output")
+        if output is None and branch["status"] in ("done", "skipped", "incomplete") and branch["category"]:
+            output = read_artifact(audio_filename, branch["category"])
+        if output:
+            with st.expander(f"{branch['category'] or name}"):
+                st.markdown(output)
+
 def send_message(message):
     """
-    Send a message to the speaker agent and process the response.
+    Send a message to the speaker agent and stream the response as it is generated.
     
     This function:
     1. Adds the user message to the chat history
-    2. Sends the message to the ADK API
-    3. Processes the response to extract text and audio information
-    4. Updates the chat history with the assistant's response
+    2. Sends the message to the ADK API's streaming endpoint
+    3. Renders partial model text and tool progress while events arrive
+    4. Updates the chat history with the assistant's response and time-to-first-token
     
     Args:
         message (str): The user's message to send to the agent
@@ -130,12 +373,13 @@ def send_message(message):
         bool: True if message was sent and processed successfully, False otherwise
     
     API Endpoint:
-        POST /run
+        POST /run_sse (with streaming enabled)
         
     Response Processing:
-        - Parses the ADK event structure to extract text responses
-        - Looks for text_to_speech function responses to find audio file paths
-        - Adds both text and audio information to the chat history
+        - Parses each Server-Sent Event into an ADK event as soon as it arrives
+        - Partial events carry chunks of model text; the final (non-partial)
+          model text of the run becomes the assistant's message
+        - Function call and response parts are shown as tool progress
     """
     if not st.session_state.session_id:
         st.error("No active session. Please create a session first.")
@@ -143,41 +387,99 @@ def send_message(message):
     
     # Add user message to chat
     st.session_state.messages.append({"role": "user", "content": message})
+    st.chat_message("user").write(message)
     
-    # Send message to API
-    response = requests.post(
-        f"{API_BASE_URL}/run",
-        headers={"Content-Type": "application/json"},
-        data=json.dumps({
-            "app_name": APP_NAME,
-            "user_id": st.session_state.user_id,
-            "session_id": st.session_state.session_id,
-            "new_message": {
-                "role": "user",
-                "parts": [{"text": message}]
-            }
-        })
-    )
-    
-    if response.status_code != 200:
-        st.error(f"Error: {response.text}")
-        return False
-    
-    # Process the response
-    events = response.json()
+    with st.chat_message("assistant"):
+        progress = st.status("Working on it...", expanded=False)
+        pipeline = PipelineProgress(
+            st.empty(), os.path.splitext(st.session_state.get("uploaded_filename") or "")[0] or None
+        )
+        text_placeholder = st.empty()
+        ttft_placeholder = st.empty()
     
-    # Extract assistant's text response
+    start = time.perf_counter()
+    time_to_first_token = None
     assistant_message = None
-    audio_file_path = None
+    streaming_text = ""
+    streaming_author = None
     
-    for event in events:
-        # Look for the final text response from the model
-        if event.get("content", {}).get("role") == "model" and "text" in event.get("content", {}).get("parts", [{}])[0]:
-            assistant_message = event["content"]["parts"][0]["text"]
+    try:
+        # Send message to API and read the event stream incrementally
+        with API_CLIENTS["adk"].stream(
+            "POST",
+            "/run_sse",
+            endpoint="run_sse",
+            headers={"Content-Type": "application/json", "Accept": "text/event-stream"},
+            data=json.dumps({
+                "app_name": APP_NAME,
+                "user_id": st.session_state.user_id,
+                "session_id": st.session_state.session_id,
+                "new_message": {
+                    "role": "user",
+                    "parts": [{"text": message}]
+                },
+                "streaming": True
+            }),
+        ) as response:
+            if response.status_code != 200:
+                progress.update(label="Request failed", state="error")
+                st.error(f"Error: {response.text}")
+                return False
+            
+            for event in iter_sse_events(response):
+                if "error" in event and "content" not in event:
+                    progress.update(label="Agent error", state="error")
+                    st.error(f"Error: {event['error']}")
+                    return False
+                
+                if pipeline.handle(event):
+                    pipeline.render()
+                
+                author = event.get("author", "agent")
+                content = event.get("content") or {}
+                for part in content.get("parts") or []:
+                    function_call = part.get("functionCall") or part.get("function_call")
+                    function_response = part.get("functionResponse") or part.get("function_response")
+                    if function_call:
+                        progress.update(label=f"{author}: calling {function_call.get('name')}...")
+                        progress.write(f"🔧 **{author}** → `{function_call.get('name')}`")
+                    elif function_response:
+                        progress.write(f"✅ **{author}** ← `{function_response.get('name')}`")
+                    elif part.get("text") and content.get("role") == "model":
+                        if time_to_first_token is None:
+                            time_to_first_token = time.perf_counter() - start
+                            ttft_placeholder.caption(f"⏱️ First token after {time_to_first_token:.2f}s")
+                        if event.get("partial"):
+                            if author != streaming_author:
+                                streaming_author, streaming_text = author, ""
+                            streaming_text += part["text"]
+                            text_placeholder.markdown(streaming_text)
+                        else:
+                            # The final event of a model turn carries the complete text
+                            assistant_message = part["text"]
+                            streaming_author, streaming_text = None, ""
+                            text_placeholder.markdown(assistant_message)
+    except requests.RequestException as e:
+        progress.update(label="Connection error", state="error")
+        st.error(f"Error contacting the agent server: {e}")
+        return False
+    
+    total_seconds = time.perf_counter() - start
+    progress.update(label=f"Done in {total_seconds:.1f}s", state="complete")
+    if pipeline.active:
+        pipeline.close()
+        pipeline.render()
     
     # Add assistant response to chat
     if assistant_message:
-        st.session_state.messages.append({"role": "assistant", "content": assistant_message, "audio_path": audio_file_path})
+        st.session_state.messages.append({
+            "role": "assistant",
+            "content": assistant_message,
+            "time_to_first_token": time_to_first_token,
+            "total_seconds": total_seconds,
+            "pipeline": pipeline.summary() if pipeline.active else None,
+            "audio_filename": pipeline.audio_filename,
+        })
     
     return True
 
@@ -200,6 +502,14 @@ with st.sidebar:
     st.divider()
     st.caption("This app interacts with the Medical Agent via the ADK API Server.")
     st.caption("Make sure the ADK API Server is running on port 8000.")
+    
+    with st.expander("📈 API latency"):
+        for name, client in API_CLIENTS.items():
+            for endpoint, stats in client.metrics.snapshot().items():
+                st.caption(
+                    f"{name}/{endpoint}: {stats['calls']} calls, p50 {stats['p50_seconds']}s, "
+                    f"p95 {stats['p95_seconds']}s, {stats['errors']} errors, {stats['retries']} retries"
+                )
 
 # File upload section
 st.subheader("📁 Upload Audio File")
@@ -209,8 +519,8 @@ col1, col2 = st.columns([3, 1])
 with col1:
     uploaded_file = st.file_uploader(
         "Choose an audio file to process", 
-        type=['mp3', 'wav'],
-        help="Upload MP3 or WAV audio files for medical consultation processing"
+        type=['mp3', 'wav', 'm4a', 'ogg', 'flac'],
+        help="Upload MP3, WAV, M4A, OGG or FLAC audio files for medical consultation processing"
     )
 
 with col2:
@@ -218,8 +528,12 @@ with col2:
         if st.button("🚀 Upload", type="primary", use_container_width=True):
             filename = handle_file_upload(uploaded_file)
             if filename:
-                # Automatically send a message to process the uploaded file
-                if st.session_state.session_id:
+                job = enqueue_job(filename)
+                if job:
+                    # Processed in the background; progress is polled below
+                    st.info(f"Queued '{filename}' for processing (job {job['job_id']}).")
+                # Without the job service, process the uploaded file in the chat request
+                elif st.session_state.session_id:
                     process_message = f"Please process the uploaded audio file: {filename}"
                     send_message(process_message)
                     st.rerun()
@@ -228,6 +542,13 @@ with col2:
     else:
         st.button("🚀 Upload", disabled=True, use_container_width=True, help="Select a file first")
 
+# Background processing jobs (survive page reloads: state lives in the job service)
+jobs = fetch_jobs()
+jobs_active = False
+if jobs:
+    st.subheader("🗂️ Processing Jobs")
+    jobs_active = render_jobs(jobs)
+
 st.divider()
 
 # Chat interface
@@ -239,7 +560,14 @@ for msg in st.session_state.messages:
         st.chat_message("user").write(msg["content"])
     else:
         with st.chat_message("assistant"):
+            if msg.get("pipeline"):
+                render_pipeline(msg["pipeline"], msg.get("audio_filename"))
             st.write(msg["content"])
+            if msg.get("time_to_first_token") is not None:
+                st.caption(
+                    f"⏱️ First token after {msg['time_to_first_token']:.2f}s · "
+                    f"complete after {msg['total_seconds']:.1f}s"
+                )
 
 # Input for new messages
 if st.session_state.session_id:  # Only show input if session exists
@@ -248,4 +576,9 @@ if st.session_state.session_id:  # Only show input if session exists
         send_message(user_input)
         st.rerun()  # Rerun to update the UI with new messages
 else:
-    st.info("👈 Create a session to start chatting")
\ No newline at end of file
+    st.info("👈 Create a session to start chatting")
+
+# Poll the job service while jobs are queued or running
+if jobs_active:
+    time.sleep(JOB_POLL_SECONDS)
+    st.rerun()
\ No newline at end of file